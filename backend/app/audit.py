@@ -0,0 +1,275 @@
+"""Append-only audit log of task mutations, written in batches.
+
+``task_service`` records an entry on the session for every write. Once the
+transaction commits, the entry moves into this worker's in-memory buffer; it
+is never written inline with the request. ``AuditLog`` flushes the buffer
+with one multi-row INSERT per batch. A flush happens as soon as
+AUDIT_BATCH_SIZE entries are waiting, or AUDIT_FLUSH_INTERVAL_MS after the
+previous flush, whichever comes first.
+
+Memory is bounded by AUDIT_MAX_BUFFER. When the buffer is full (the
+database is slow or down), AUDIT_OVERFLOW_POLICY decides which entries to
+lose: ``drop_newest`` keeps the earliest history, ``drop_oldest`` the
+latest. Every dropped entry is counted and logged. Entries of a failed flush
+go back to the front of the buffer, space permitting, and are retried.
+
+On Postgres ``audit_log`` is range-partitioned by month. Migration 8
+creates the first partitions. ``get_partition_job()`` keeps
+AUDIT_PARTITION_MONTHS_AHEAD months created in advance, and old months can
+be detached or dropped for retention. A statement trigger rejects UPDATE,
+DELETE and TRUNCATE.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import Callable
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import get_engine, get_sessionmaker
+from app.migrations import create_monthly_partitions
+from app.models import AuditLogEntry
+from app.request_context import current_request
+from app.utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+_table = AuditLogEntry.__table__
+_PENDING_KEY = "audit.pending"
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest")
+
+
+class AuditLog:
+    """Bounded in-memory buffer of audit entries and its background flusher."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        *,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10_000,
+        overflow_policy: str = "drop_newest",
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"AUDIT_OVERFLOW_POLICY must be one of {OVERFLOW_POLICIES}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.overflow_policy = overflow_policy
+        self._buffer: deque[dict] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    # -------------------------------------------------
+    # Buffer
+    # -------------------------------------------------
+    def enqueue(self, entry: dict) -> bool:
+        """Buffer ``entry`` without blocking; returns False if one was dropped."""
+        accepted = True
+        if len(self._buffer) >= self.max_buffer:
+            accepted = False
+            self.dropped += 1
+            if self.overflow_policy == "drop_oldest":
+                self._buffer.popleft()
+                self._buffer.append(entry)
+            logger.error("Audit buffer full (%s entries); dropped one (%s)", self.max_buffer, self.overflow_policy)
+        else:
+            self._buffer.append(entry)
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return accepted
+
+    def _requeue(self, batch: list[dict]) -> None:
+        """Put a failed batch back ahead of newer entries, within max_buffer."""
+        entries = batch + list(self._buffer)
+        excess = len(entries) - self.max_buffer
+        if excess > 0:
+            self.dropped += excess
+            logger.error("Audit buffer full; dropped %s entries after a failed flush", excess)
+            entries = entries[: self.max_buffer] if self.overflow_policy == "drop_newest" else entries[excess:]
+        self._buffer = deque(entries)
+
+    # -------------------------------------------------
+    # Flushing
+    # -------------------------------------------------
+    async def flush(self) -> int:
+        """Write everything buffered (in batches); returns entries written."""
+        written = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(insert(_table), batch)
+                    await session.commit()
+            except Exception:
+                self.failed_flushes += 1
+                self._requeue(batch)
+                raise
+            written += len(batch)
+            self.written += len(batch)
+        return written
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Schedule the flush loop on the running event loop (idempotent)."""
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="audit-log-flusher")
+
+    async def stop(self) -> None:
+        """Stop the loop, then flush what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final audit flush failed; %s entries lost", len(self._buffer))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Audit flush failed; %s entries buffered for retry", len(self._buffer))
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+@lru_cache
+def get_audit_log() -> AuditLog:
+    """Return the worker's audit log (started/stopped in main.lifespan)."""
+    settings = get_settings()
+    return AuditLog(
+        lambda: get_sessionmaker()(),
+        batch_size=settings.AUDIT_BATCH_SIZE,
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+        max_buffer=settings.AUDIT_MAX_BUFFER,
+        overflow_policy=settings.AUDIT_OVERFLOW_POLICY,
+    )
+
+
+# -------------------------------------------------
+# Recording (buffered on commit)
+# -------------------------------------------------
+def record(session: AsyncSession, change: dict) -> None:
+    """Queue an audit entry for a task change (see change_feed.record)."""
+    ctx = current_request()
+    session.info.setdefault(_PENDING_KEY, []).append(
+        {
+            "occurred_at": datetime.fromisoformat(change["at"]),
+            "user_id": change["user_id"],
+            "action": change["type"],
+            "task_id": change["task_id"],
+            "version": change["version"],
+            "request_id": ctx.request_id if ctx is not None else None,
+            "details": json.dumps(change["task"], separators=(",", ":")) if change["task"] is not None else None,
+        }
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _buffer_after_commit(session: Session) -> None:
+    entries = session.info.pop(_PENDING_KEY, None)
+    if entries:
+        audit_log = get_audit_log()
+        for entry in entries:
+            audit_log.enqueue(entry)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+# -------------------------------------------------
+# Query
+# -------------------------------------------------
+async def query(
+    session: AsyncSession,
+    user_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    task_id: Optional[int] = None,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+) -> list[AuditLogEntry]:
+    """A user's entries, newest first, within ``[since, until)``.
+
+    Served by the (user_id, occurred_at) index; on Postgres the time range
+    also prunes partitions. Page with the last entry as an
+    ``(occurred_at, id)`` keyset cursor: pass its ``occurred_at`` as
+    ``until`` and its ``id`` as ``before_id``. Entries batched into the same
+    timestamp are then not skipped.
+    """
+    stmt = select(AuditLogEntry).where(AuditLogEntry.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(AuditLogEntry.occurred_at >= since)
+    if until is not None and before_id is not None:
+        # (occurred_at, id) < (until, before_id), spelled out so the range still prunes
+        stmt = stmt.where(
+            AuditLogEntry.occurred_at <= until,
+            or_(AuditLogEntry.occurred_at < until, AuditLogEntry.id < before_id),
+        )
+    elif until is not None:
+        stmt = stmt.where(AuditLogEntry.occurred_at < until)
+    if task_id is not None:
+        stmt = stmt.where(AuditLogEntry.task_id == task_id)
+    stmt = stmt.order_by(AuditLogEntry.occurred_at.desc(), AuditLogEntry.id.desc()).limit(limit)
+    return list((await session.execute(stmt)).scalars().all())
+
+
+# -------------------------------------------------
+# Partition maintenance (Postgres)
+# -------------------------------------------------
+async def ensure_partitions(engine: AsyncEngine, months_ahead: int) -> list[str]:
+    """Create this month's partition and ``months_ahead`` more (no-op elsewhere)."""
+    if engine.dialect.name != "postgresql":
+        return []
+    today = datetime.now(timezone.utc).date()
+    async with engine.begin() as conn:
+        return await conn.run_sync(create_monthly_partitions, "audit_log", today, months_ahead + 1)
+
+
+@lru_cache
+def get_partition_job() -> PeriodicTask:
+    """Daily creation of upcoming audit_log partitions (started in main.lifespan)."""
+    return PeriodicTask(
+        "audit-partition-maintenance",
+        lambda: ensure_partitions(get_engine(), get_settings().AUDIT_PARTITION_MONTHS_AHEAD),
+        24 * 3600,
+    )
@@ -2,28 +2,38 @@
 
 import jwt
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, Header, status
+from functools import lru_cache
 from typing import Optional
 
-from app.config import settings
+from app.config import get_settings
+from app.request_context import current_request
+from app.tracing import traced
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+
+@lru_cache
+def get_pwd_context():
+    """Build the passlib context on first use (passlib/bcrypt load lazily)."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     password = password[:72] # Truncate password to 72 characters as bcrypt has a limit
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.BETTER_AUTH_SECRET, algorithm=JWT_ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, get_settings().BETTER_AUTH_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
 
@@ -38,6 +48,7 @@ def create_test_token(user_id: str | int) -> str:
     """
     return create_access_token({"sub": str(user_id)})
 
+@traced("depends.get_current_user_id")
 async def get_current_user_id(
     authorization: Optional[str] = Header(None, alias="Authorization"),
 ) -> int:
@@ -47,10 +58,21 @@ async def get_current_user_id(
         scheme, token = authorization.split()
         if scheme.lower() != "bearer":
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication scheme")
-        payload = jwt.decode(token, settings.BETTER_AUTH_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, get_settings().BETTER_AUTH_SECRET, algorithms=[JWT_ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-        return int(user_id) # Ensure user_id is an int
+        user_id = int(user_id)  # Ensure user_id is an int
+        ctx = current_request()
+        if ctx is not None:
+            ctx.user_id = user_id  # for request-scoped logs
+        return user_id
     except jwt.PyJWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+
+async def require_admin(user_id: int = Depends(get_current_user_id)) -> int:
+    """Allow only users listed in ADMIN_USER_IDS (403 otherwise)."""
+    if user_id not in get_settings().admin_user_ids:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return user_id
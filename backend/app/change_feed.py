@@ -0,0 +1,317 @@
+"""Live per-user task change feed.
+
+``task_service`` records a create/update/delete event on the session for
+every write; it is published only once the transaction commits and dropped
+if it rolls back. Each worker fans events out through a ``ChangeHub`` to
+bounded per-connection queues, served as Server-Sent Events by
+``GET /api/tasks/stream``.
+
+Cross-worker delivery goes through a broker:
+
+- ``PostgresBroker`` sends events with ``pg_notify`` inside the committing
+  transaction (Postgres delivers them at commit, never on rollback) and
+  LISTENs on one dedicated connection per worker, feeding its local hub.
+- ``MemoryBroker`` publishes straight to the local hub after commit, for
+  SQLite or a single worker.
+
+An idle stream costs one small queue and a parked coroutine, and holds no
+DB session, so a worker can keep ~10k of them open (raise the process
+file-descriptor limit to match). A consumer that falls ``queue_size``
+events behind is dropped: it gets an ``event: reset`` and should refetch
+``GET /api/tasks`` before reconnecting.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import bindparam, event, make_url, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.types import Text
+
+from app.config import get_settings
+from app.schemas import TaskResponse
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "task_changes"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+_MAX_NOTIFY_BYTES = 7900
+_PENDING_KEY = "change_feed.pending"
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload").bindparams(
+    bindparam("payloads", type_=ARRAY(Text))
+)
+
+
+# -------------------------------------------------
+# Fan-out hub
+# -------------------------------------------------
+class Subscription:
+    """One live connection's bounded event queue."""
+
+    __slots__ = ("user_id", "queue", "dropped")
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = False
+
+    def offer(self, change: dict) -> bool:
+        """Queue ``change`` without waiting; a full queue drops the consumer."""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(change)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            return False
+
+
+class ChangeHub:
+    """Routes published changes to the subscriptions of their user."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[Subscription]] = {}
+        self.published = 0
+        self.dropped_consumers = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, change: dict) -> None:
+        """Deliver ``change`` to its user's connections (loop thread only)."""
+        self.published += 1
+        for subscription in tuple(self._subscribers.get(change["user_id"], ())):
+            if not subscription.dropped and not subscription.offer(change):
+                self.dropped_consumers += 1
+                logger.warning("Dropped slow change-feed consumer for user %s", subscription.user_id)
+
+    def stats(self) -> dict:
+        return {
+            "connections": sum(len(subs) for subs in self._subscribers.values()),
+            "users": len(self._subscribers),
+            "published": self.published,
+            "dropped_consumers": self.dropped_consumers,
+        }
+
+
+# -------------------------------------------------
+# Brokers
+# -------------------------------------------------
+class MemoryBroker:
+    """In-process delivery: publish to the local hub after commit."""
+
+    name = "memory"
+    transactional = False
+
+    def __init__(self, hub: ChangeHub):
+        self.hub = hub
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def publish(self, changes: list[dict]) -> None:
+        for change in changes:
+            self.hub.publish(change)
+
+
+class PostgresBroker:
+    """Cross-worker delivery through Postgres ``LISTEN/NOTIFY``."""
+
+    name = "postgres"
+    transactional = True
+
+    def __init__(self, hub: ChangeHub, dsn: str, channel: str = CHANNEL, retry_seconds: float = 5.0):
+        self.hub = hub
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="change-feed-listener")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self, session: Session, changes: list[dict]) -> None:
+        """Queue NOTIFYs on the committing transaction (sync session API)."""
+        payloads = [_encode_notify(change) for change in changes]
+        session.execute(_NOTIFY_SQL, {"channel": self.channel, "payloads": payloads})
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _conn: closed.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                logger.info("Change feed listening on %s", self.channel)
+                await closed.wait()
+                logger.warning("Change feed listener connection closed; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Change feed listener failed; retrying in %ss", self.retry_seconds)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.retry_seconds)
+
+    def _on_notify(self, _connection, _pid, _channel, payload: str) -> None:
+        try:
+            self.hub.publish(json.loads(payload))
+        except Exception:
+            logger.exception("Bad change feed payload: %.200s", payload)
+
+
+def _encode_notify(change: dict) -> str:
+    payload = json.dumps(change, separators=(",", ":"))
+    if len(payload.encode()) > _MAX_NOTIFY_BYTES:
+        # Clients refetch the task when the snapshot is missing
+        payload = json.dumps({**change, "task": None}, separators=(",", ":"))
+    return payload
+
+
+# -------------------------------------------------
+# Feed (hub + broker) and SSE streaming
+# -------------------------------------------------
+class ChangeFeed:
+    def __init__(self, hub: ChangeHub, broker, heartbeat_seconds: float = 15.0):
+        self.hub = hub
+        self.broker = broker
+        self.heartbeat_seconds = heartbeat_seconds
+
+    async def start(self) -> None:
+        await self.broker.start()
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+
+    def stats(self) -> dict:
+        return {"broker": self.broker.name, **self.hub.stats()}
+
+    async def stream(self, user_id: int) -> AsyncIterator[str]:
+        """Yield ``user_id``'s changes as SSE frames until disconnect or drop."""
+        subscription = self.hub.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.dropped:
+                try:
+                    change = await asyncio.wait_for(subscription.queue.get(), self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from timing out the idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if subscription.dropped:
+                    break
+                yield format_sse(change)
+            yield "event: reset\ndata: {}\n\n"
+        finally:
+            self.hub.unsubscribe(subscription)
+
+
+def format_sse(change: dict) -> str:
+    data = json.dumps(change, separators=(",", ":"))
+    return f"event: {change['type']}\ndata: {data}\n\n"
+
+
+def uses_postgres_broker(settings) -> bool:
+    """Whether workers share events over LISTEN/NOTIFY (one extra connection each)."""
+    if settings.CHANGE_FEED_BROKER != "auto":
+        return settings.CHANGE_FEED_BROKER == "postgres"
+    is_postgres = make_url(settings.async_database_url).get_backend_name() == "postgresql"
+    return is_postgres and settings.WEB_CONCURRENCY != 1
+
+
+@lru_cache
+def get_change_feed() -> ChangeFeed:
+    """Return the worker's change feed, built on first use."""
+    settings = get_settings()
+    hub = ChangeHub(settings.CHANGE_FEED_QUEUE_SIZE)
+    if uses_postgres_broker(settings):
+        dsn = make_url(settings.async_database_url).set(drivername="postgresql")
+        broker = PostgresBroker(hub, dsn.render_as_string(hide_password=False))
+    else:
+        broker = MemoryBroker(hub)
+    return ChangeFeed(hub, broker, settings.CHANGE_FEED_HEARTBEAT_SECONDS)
+
+
+# -------------------------------------------------
+# Recording changes on the session (published on commit)
+# -------------------------------------------------
+def record(
+    session: AsyncSession,
+    change_type: str,
+    user_id: int,
+    task_id: int,
+    task=None,
+) -> dict:
+    """Queue a ``task.created``/``task.updated``/``task.deleted`` event.
+
+    Nothing is sent until the session commits; a rollback discards it.
+    Returns the event.
+    """
+    change = {
+        "type": change_type,
+        "user_id": user_id,
+        "task_id": task_id,
+        "version": task.version if task is not None else None,
+        "task": TaskResponse.model_validate(task).model_dump(mode="json") if task is not None else None,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+    session.info.setdefault(_PENDING_KEY, []).append(change)
+    return change
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session: Session) -> None:
+    changes = session.info.get(_PENDING_KEY)
+    broker = get_change_feed().broker if changes else None
+    if broker is not None and broker.transactional:
+        del session.info[_PENDING_KEY]
+        broker.notify(session, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        get_change_feed().broker.publish(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
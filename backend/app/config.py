@@ -5,6 +5,7 @@ Phase II: Added BETTER_AUTH_SECRET for JWT verification.
 """
 
 import os
+from functools import lru_cache
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import model_validator
@@ -24,6 +25,91 @@ class Settings(BaseSettings):
         DEBUG: Enable debug mode (default: False).
         TESTING: Flag indicating test environment (default: 0).
         INTEGRATION_TESTS: Flag for running integration tests (default: 0).
+        DB_POOL_SIZE: Persistent connections per worker's engine pool.
+        DB_MAX_OVERFLOW: Extra connections a worker may open under burst.
+        DB_POOL_TIMEOUT: Seconds to wait for a pooled connection.
+        DB_MAX_CONNECTIONS: Connection budget of the database server; the
+                            production server sizes worker pools to fit it.
+        DB_RESERVED_CONNECTIONS: Part of the budget kept free for
+                                 migrations, admin sessions and listeners.
+        HOST / PORT: Bind address for ``python -m app.serve``.
+        WEB_CONCURRENCY: Worker processes (0 = one per CPU).
+        RUN_SINGLETON_JOBS: Run the cluster-wide maintenance jobs (idempotency
+                            cleanup, audit partitions, archival, counter
+                            repair) in this process. ``app.serve`` sets it for
+                            one worker only; set it to False on all but one
+                            instance when running several.
+        PRELOAD_APP: Import the app once in the supervisor before forking.
+        GRACEFUL_TIMEOUT: Seconds workers get to drain on SIGTERM.
+        WORKER_MAX_RESTARTS: Worker exits tolerated within
+                             WORKER_RESTART_WINDOW before the supervisor
+                             gives up and exits with status 1.
+        WORKER_RESTART_WINDOW: Seconds over which worker exits are counted.
+        AUTO_MIGRATE: Apply pending schema migrations at boot (default: True).
+                      When False, boot fails if the schema is behind.
+        HEALTH_PROBE_INTERVAL: Seconds between background DB health probes.
+        HEALTH_PROBE_WINDOW: Number of recent probes kept for percentiles.
+        HEALTH_PROBE_TIMEOUT: Seconds before a probe counts as failed.
+        PRIVILEGE_REFRESH_INTERVAL: Seconds between DB privilege re-checks.
+        LOG_LEVEL: Root log level (DEBUG=True forces DEBUG).
+        LOG_FORMAT: "json" (one object per line) or "text".
+        LOG_SAMPLE_RATE: Fraction of INFO records kept from LOG_SAMPLED_LOGGERS.
+        LOG_SAMPLED_LOGGERS: Comma-separated high-volume logger names to sample.
+        TRACING_ENABLED: Record spans for requests, dependencies, services and SQL.
+        TRACING_SAMPLE_RATE: Fraction of new traces recorded (callers' traceparent
+                             sampled flag wins when present).
+        TRACING_EXPORTER: "memory", "file" or "package.module:factory".
+        TRACING_FILE: JSON-lines output path for the file exporter.
+        LOOP_WATCHDOG_ENABLED: Run the event-loop blocking detector (default: True).
+        LOOP_BLOCK_THRESHOLD_MS: Loop block length that is logged and counted.
+        SLOW_QUERY_THRESHOLD_MS: Statements slower than this are recorded (0 disables).
+        SLOW_QUERY_CAPACITY: Slow statements kept per worker (ring buffer).
+        SLOW_QUERY_EXPLAIN_SAMPLE_RATE: Fraction of slow Postgres statements
+                                        re-run as EXPLAIN (FORMAT JSON) (0 disables).
+        IDEMPOTENCY_TTL_HOURS: How long Idempotency-Key responses are replayed.
+        IDEMPOTENCY_CLEANUP_INTERVAL: Seconds between purges of expired keys.
+        CHANGE_FEED_BROKER: "auto", "memory" or "postgres" (LISTEN/NOTIFY). "auto"
+                            uses Postgres unless on SQLite or WEB_CONCURRENCY=1.
+        CHANGE_FEED_QUEUE_SIZE: Events buffered per stream before it is dropped.
+        CHANGE_FEED_HEARTBEAT_SECONDS: Keep-alive interval on idle streams.
+        OUTBOX_BATCH_SIZE: Outbox events claimed per dispatcher round.
+        OUTBOX_POLL_INTERVAL: Seconds between polls when the outbox is idle.
+        OUTBOX_LEASE_SECONDS: How long a claimed event is hidden from other
+                              dispatchers (redelivered if not settled by then).
+        OUTBOX_HANDLER_TIMEOUT: Seconds one event's handlers may take.
+        OUTBOX_MAX_ATTEMPTS: Deliveries before an event is kept as a dead letter.
+        OUTBOX_RETRY_BASE_SECONDS / OUTBOX_RETRY_MAX_SECONDS: Exponential
+                              retry backoff (with jitter) and its cap.
+        WEBHOOK_ALLOW_HTTP: Accept plain http:// webhook URLs (default: https only).
+        WEBHOOK_ALLOW_PRIVATE_DESTINATIONS: Allow webhook hosts that resolve to
+                              loopback/private/link-local addresses (local
+                              development only; default: public addresses only).
+        WEBHOOK_TIMEOUT: Seconds per webhook HTTP request.
+        WEBHOOK_MAX_CONNECTIONS: Size of the shared outgoing connection pool.
+        WEBHOOK_BATCH_WINDOW_MS: How long events for one endpoint are coalesced.
+        WEBHOOK_MAX_BATCH_SIZE: Events per delivery (a full batch is sent at once).
+        WEBHOOK_ENDPOINT_CONCURRENCY: In-flight requests allowed per endpoint.
+        WEBHOOK_BREAKER_THRESHOLD: Consecutive failures that open an endpoint's circuit.
+        WEBHOOK_BREAKER_COOLDOWN: Seconds an open circuit fails fast before a trial request.
+        AUDIT_BATCH_SIZE: Audit entries per INSERT; a full batch flushes at once.
+        AUDIT_FLUSH_INTERVAL_MS: Longest an audit entry waits in memory.
+        AUDIT_MAX_BUFFER: Audit entries a worker may buffer (bounded memory).
+        AUDIT_OVERFLOW_POLICY: "drop_newest" or "drop_oldest" when the buffer is full.
+        AUDIT_PARTITION_MONTHS_AHEAD: Monthly audit_log partitions kept created
+                                      ahead of time (Postgres).
+        ARCHIVE_AFTER_DAYS: Completed tasks untouched this long move to
+                            tasks_archive (default 0: the archival job is off).
+        ARCHIVE_BATCH_SIZE: Tasks moved per archival transaction.
+        ARCHIVE_BATCH_PAUSE_MS: Pause between archival batches (rate limit).
+        ARCHIVE_INTERVAL: Seconds between archival runs.
+        TASKS_HASH_PARTITIONS: Hash partitions of tasks by owner_id, applied by
+                               migration 10 on Postgres (0 keeps one table).
+        TASK_STATS_REPAIR_INTERVAL: Seconds between recounts of the per-user
+                                    task counters (0 disables the repair job).
+        TASK_STATS_REPAIR_BATCH_SIZE: Users recounted per repair transaction.
+        ADMIN_USER_IDS: Comma-separated user IDs allowed on /api/admin routes.
+        PROFILER_ENABLED: Expose the on-demand sampling profiler (default: False).
+        PROFILER_MAX_SECONDS: Longest profile a single request may take.
     """
 
     DATABASE_URL: str = ""
@@ -35,6 +121,90 @@ class Settings(BaseSettings):
     TESTING: str = "0"
     INTEGRATION_TESTS: str = "0"
 
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_MAX_CONNECTIONS: int = 100
+    DB_RESERVED_CONNECTIONS: int = 10
+
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = 0
+    RUN_SINGLETON_JOBS: bool = True
+    PRELOAD_APP: bool = False
+    GRACEFUL_TIMEOUT: float = 30.0
+    WORKER_MAX_RESTARTS: int = 5
+    WORKER_RESTART_WINDOW: float = 60.0
+
+    AUTO_MIGRATE: bool = True
+
+    HEALTH_PROBE_INTERVAL: float = 10.0
+    HEALTH_PROBE_WINDOW: int = 60
+    HEALTH_PROBE_TIMEOUT: float = 5.0
+    PRIVILEGE_REFRESH_INTERVAL: float = 3600.0
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SAMPLE_RATE: float = 1.0
+    LOG_SAMPLED_LOGGERS: str = "app.access,app.services.task_service"
+
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATE: float = 1.0
+    TRACING_EXPORTER: str = "memory"
+    TRACING_FILE: str = "traces.jsonl"
+
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0
+
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_CAPACITY: int = 100
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.0
+
+    IDEMPOTENCY_TTL_HOURS: float = 24.0
+    IDEMPOTENCY_CLEANUP_INTERVAL: float = 3600.0
+
+    CHANGE_FEED_BROKER: str = "auto"
+    CHANGE_FEED_QUEUE_SIZE: int = 100
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15.0
+
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_POLL_INTERVAL: float = 1.0
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_HANDLER_TIMEOUT: float = 30.0
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+
+    WEBHOOK_ALLOW_HTTP: bool = False
+    WEBHOOK_ALLOW_PRIVATE_DESTINATIONS: bool = False
+    WEBHOOK_TIMEOUT: float = 10.0
+    WEBHOOK_MAX_CONNECTIONS: int = 100
+    WEBHOOK_BATCH_WINDOW_MS: float = 50.0
+    WEBHOOK_MAX_BATCH_SIZE: int = 100
+    WEBHOOK_ENDPOINT_CONCURRENCY: int = 4
+    WEBHOOK_BREAKER_THRESHOLD: int = 5
+    WEBHOOK_BREAKER_COOLDOWN: float = 30.0
+
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_MS: float = 1000.0
+    AUDIT_MAX_BUFFER: int = 10_000
+    AUDIT_OVERFLOW_POLICY: str = "drop_newest"
+    AUDIT_PARTITION_MONTHS_AHEAD: int = 2
+
+    ARCHIVE_AFTER_DAYS: float = 0.0
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_BATCH_PAUSE_MS: float = 200.0
+    ARCHIVE_INTERVAL: float = 3600.0
+
+    TASKS_HASH_PARTITIONS: int = 0
+
+    TASK_STATS_REPAIR_INTERVAL: float = 86400.0
+    TASK_STATS_REPAIR_BATCH_SIZE: int = 1000
+
+    ADMIN_USER_IDS: str = ""
+    PROFILER_ENABLED: bool = False
+    PROFILER_MAX_SECONDS: float = 60.0
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -82,6 +252,25 @@ class Settings(BaseSettings):
         """Parse CORS_ORIGINS string into a list."""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
+    @property
+    def admin_user_ids(self) -> set[int]:
+        """Parse ADMIN_USER_IDS string into a set of user IDs."""
+        return {int(uid) for uid in self.ADMIN_USER_IDS.split(",") if uid.strip()}
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide settings, built on first use.
+
+    Deferred (rather than built at import) so importing the app stays cheap
+    and free of side effects; call sites resolve settings when they run.
+    """
+    return Settings()
+
 
-# Global settings instance
-settings = Settings()
+def __getattr__(name: str):
+    # Backward compatibility: `from app.config import settings` still works,
+    # but builds the settings at that point. Prefer get_settings().
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,61 +2,84 @@ import logging
 import os
 from collections.abc import AsyncGenerator
 from datetime import datetime, timezone
+from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text
+from sqlalchemy import make_url, text
 from sqlmodel import SQLModel
 
-from app.config import settings
+from app.config import get_settings
+from app.slow_queries import get_slow_query_log
+from app import tracing
 
 # Import models to register them
 import app.models  # noqa: F401
 
-# -------------------------------------------------
-# Logging
-# -------------------------------------------------
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # -------------------------------------------------
-# Migration SQL (unchanged)
+# Engine (created lazily on first use, never at import)
 # -------------------------------------------------
-MIGRATION_SQL = {
-    "add_user_id": """
-        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS user_id VARCHAR(255);
-        UPDATE tasks SET user_id = 'legacy_user' WHERE user_id IS NULL;
-        ALTER TABLE tasks ALTER COLUMN user_id SET NOT NULL;
-    """,
-    "add_user_id_index": """
-        CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks(user_id);
-    """,
-    "timestamp_migration": [
-        "ALTER TABLE tasks ALTER COLUMN due_date TYPE timestamptz USING (due_date AT TIME ZONE 'UTC');",
-        "ALTER TABLE tasks ALTER COLUMN created_at TYPE timestamptz USING (created_at AT TIME ZONE 'UTC');",
-        "ALTER TABLE tasks ALTER COLUMN updated_at TYPE timestamptz USING (updated_at AT TIME ZONE 'UTC');",
-    ],
-}
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    """Return the process-wide engine, creating it on first use.
+
+    Creating it lazily keeps imports cheap and means a pre-forking server
+    never shares one connection pool across worker processes.
+    """
+    global _engine
+    if _engine is None:
+        settings = get_settings()
+        url = settings.async_database_url
+        pool_options = {}
+        if make_url(url).get_backend_name() == "postgresql":
+            # SQLite uses static/single-connection pools that take no sizing.
+            pool_options = {
+                "pool_size": settings.DB_POOL_SIZE,
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "pool_timeout": settings.DB_POOL_TIMEOUT,
+            }
+        _engine = create_async_engine(
+            url,
+            echo=settings.DEBUG,
+            pool_pre_ping=True,
+            **pool_options,
+        )
+        # Times every statement (request DB time) and records slow ones.
+        get_slow_query_log().install(_engine)
+        if settings.TRACING_ENABLED:
+            tracing.install(_engine)
+    return _engine
 
-# -------------------------------------------------
-# Engine
-# -------------------------------------------------
-engine: AsyncEngine = create_async_engine(
-    settings.async_database_url,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,
-)
 
 # -------------------------------------------------
 # Session factory
 # -------------------------------------------------
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
-)
+def get_sessionmaker() -> sessionmaker:
+    """Return the session factory bound to the engine."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            bind=get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+            autocommit=False,
+        )
+    return _session_factory
+
+
+def __getattr__(name: str):
+    # Backward compatibility for `from app.database import engine` in scripts.
+    if name == "engine":
+        return get_engine()
+    if name in ("AsyncSessionLocal", "async_session_maker"):
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # -------------------------------------------------
 # ✅ FASTAPI DEPENDENCY (FIX)
@@ -66,10 +89,13 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     FastAPI dependency.
     This is what routes MUST import.
     """
-    async with AsyncSessionLocal() as session:
+    with tracing.start_span("depends.get_db"):
+        session = get_sessionmaker()()
+    async with session:
         try:
             yield session
-            await session.commit()
+            with tracing.start_span("db.commit"):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -83,9 +109,13 @@ get_session = get_db
 # Startup helpers
 # -------------------------------------------------
 async def create_tables() -> None:
-    """Create tables if they don't exist. Does NOT drop existing tables."""
+    """Create tables if they don't exist. Does NOT drop existing tables.
+
+    Used by the standalone verification scripts; the app itself boots
+    through ``app.migrations.ensure_schema``.
+    """
     logger.info("Creating database tables if they don't exist...")
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
     logger.info("Database tables ready.")
 
@@ -93,43 +123,17 @@ async def create_tables() -> None:
 # Shutdown
 # -------------------------------------------------
 async def close_db() -> None:
-    await engine.dispose()
+    """Dispose the engine's pool (a no-op if it was never created)."""
+    if _engine is not None:
+        await _engine.dispose()
 
 # -------------------------------------------------
 # Health checks
 # -------------------------------------------------
 async def check_db_connection() -> dict:
     try:
-        async with engine.connect() as conn:
+        async with get_engine().connect() as conn:
             await conn.execute(text("SELECT 1"))
         return {"status": "healthy"}
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
-
-async def verify_schema_permissions() -> dict:
-    result = {
-        "can_create_table": False,
-        "can_create_index": False,
-        "can_alter_table": False,
-        "can_drop_table": False,
-        "issues": [],
-    }
-
-    try:
-        async with engine.begin() as conn:
-            try:
-                await conn.execute(text("CREATE TABLE _perm_test (id INT)"))
-                result["can_create_table"] = True
-            except Exception as e:
-                result["issues"].append(str(e))
-
-            if result["can_create_table"]:
-                try:
-                    await conn.execute(text("DROP TABLE _perm_test"))
-                    result["can_drop_table"] = True
-                except Exception as e:
-                    result["issues"].append(str(e))
-    except Exception as e:
-        result["issues"].append(str(e))
-
-    return result
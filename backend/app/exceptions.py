@@ -29,6 +29,40 @@ class TaskNotFoundError(TodoAPIException):
         self.task_id = task_id
 
 
+class TaskVersionConflictError(TodoAPIException):
+    """Raised when a conditional write's expected version is stale."""
+
+    def __init__(self, task_id: int, current_version: int):
+        super().__init__(
+            message=f"Task with ID {task_id} was modified (current version {current_version})",
+            code="VERSION_CONFLICT"
+        )
+        self.task_id = task_id
+        self.current_version = current_version
+
+
+class TaskCompletedError(TodoAPIException):
+    """Raised when editing a task that is already completed."""
+
+    def __init__(self, task_id: int):
+        super().__init__(
+            message="Cannot edit a completed task. Mark it as incomplete first.",
+            code="TASK_COMPLETED"
+        )
+        self.task_id = task_id
+
+
+class TaskArchivedError(TodoAPIException):
+    """Raised when editing a task that was moved to tasks_archive."""
+
+    def __init__(self, task_id: int):
+        super().__init__(
+            message=f"Task with ID {task_id} is archived and read-only",
+            code="TASK_ARCHIVED"
+        )
+        self.task_id = task_id
+
+
 class EmptyTitleError(TodoAPIException):
     """Raised when attempting to create/update a task with an empty title."""
 
@@ -47,3 +81,66 @@ class ValidationError(TodoAPIException):
             message=message,
             code="VALIDATION_ERROR"
         )
+
+
+class ProfilerBusyError(TodoAPIException):
+    """Raised when a profile is requested while one is already running."""
+
+    def __init__(self):
+        super().__init__(
+            message="A profile is already running on this worker",
+            code="PROFILER_BUSY"
+        )
+
+
+class IdempotencyKeyReusedError(TodoAPIException):
+    """Raised when an Idempotency-Key is replayed with a different request."""
+
+    def __init__(self, key: str):
+        super().__init__(
+            message=f"Idempotency-Key {key!r} was already used for a different request",
+            code="IDEMPOTENCY_KEY_REUSED"
+        )
+        self.key = key
+
+
+class IdempotencyKeyInProgressError(TodoAPIException):
+    """Raised when the original request for an Idempotency-Key hasn't finished."""
+
+    def __init__(self, key: str):
+        super().__init__(
+            message=f"A request with Idempotency-Key {key!r} is still in progress",
+            code="IDEMPOTENCY_KEY_IN_PROGRESS"
+        )
+        self.key = key
+
+
+class WebhookNotFoundError(TodoAPIException):
+    """Raised when a webhook subscription does not exist for the user."""
+
+    def __init__(self, webhook_id: int):
+        super().__init__(
+            message=f"Webhook with ID {webhook_id} not found",
+            code="WEBHOOK_NOT_FOUND"
+        )
+        self.webhook_id = webhook_id
+
+
+class WebhookDeliveryError(TodoAPIException):
+    """Raised when a webhook endpoint fails or rejects a delivery."""
+
+    def __init__(self, url: str, reason: str):
+        super().__init__(
+            message=f"Webhook delivery to {url} failed: {reason}",
+            code="WEBHOOK_DELIVERY_FAILED"
+        )
+        self.url = url
+        self.reason = reason
+
+
+class WebhookCircuitOpenError(WebhookDeliveryError):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+    def __init__(self, url: str):
+        super().__init__(url, "circuit open after repeated failures")
+        self.code = "WEBHOOK_CIRCUIT_OPEN"
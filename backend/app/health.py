@@ -0,0 +1,179 @@
+"""Background database health prober.
+
+A single job started from the app lifespan runs ``SELECT 1`` on an interval
+and keeps a rolling window of the results. Health endpoints answer from that
+window instead of opening a connection per request, so Docker HEALTHCHECKs,
+load balancer probes and uptime monitors don't churn the connection pool.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import get_settings
+from app.database import get_engine
+from app.utils.background import PeriodicTask
+
+
+@dataclass(frozen=True)
+class ProbeSample:
+    """Outcome of one ``SELECT 1`` round trip."""
+
+    checked_at: datetime
+    monotonic: float
+    latency_ms: Optional[float]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (``None`` when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class HealthProber:
+    """Samples DB latency in the background and serves results from memory.
+
+    Attributes:
+        interval: Seconds between probes.
+        timeout: Seconds before a probe counts as failed.
+        samples: Rolling window of the most recent probes.
+    """
+
+    def __init__(self, engine: AsyncEngine, interval: float, window: int, timeout: float):
+        self.engine = engine
+        self.interval = interval
+        self.timeout = timeout
+        self.samples: deque[ProbeSample] = deque(maxlen=window)
+        self._job = PeriodicTask("db-health-prober", self.probe, interval)
+        self._lock = asyncio.Lock()
+
+    def start(self) -> None:
+        self._job.start()
+
+    async def stop(self) -> None:
+        await self._job.stop()
+
+    async def probe(self) -> ProbeSample:
+        """Run one probe and record it in the window."""
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with self.engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            sample = ProbeSample(
+                checked_at=datetime.now(timezone.utc),
+                monotonic=time.monotonic(),
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+        except TimeoutError:
+            sample = self._failed(f"probe timed out after {self.timeout}s")
+        except Exception as e:
+            sample = self._failed(str(e))
+        self.samples.append(sample)
+        return sample
+
+    async def latest(self) -> ProbeSample:
+        """Return the newest sample, probing inline only when none is fresh.
+
+        Inline probes only happen while the background job isn't running
+        (e.g. in tests or before lifespan startup), and at most once per
+        interval thanks to the lock and the freshness check.
+        """
+        sample = self.samples[-1] if self.samples else None
+        if sample is not None and (self._job.running or self._age(sample) < self.interval):
+            return sample
+        async with self._lock:
+            sample = self.samples[-1] if self.samples else None
+            if sample is None or self._age(sample) >= self.interval:
+                sample = await self.probe()
+        return sample
+
+    async def snapshot(self) -> dict:
+        """Summarize the window: status, last-check age, percentiles, pool."""
+        last = await self.latest()
+        latencies = [s.latency_ms for s in self.samples if s.ok]
+        failures = sum(1 for s in self.samples if not s.ok)
+        report = {
+            "status": "healthy" if last.ok else "unhealthy",
+            "last_check": _isoformat(last.checked_at),
+            "last_check_age_seconds": round(self._age(last), 3),
+            "latency_ms": {
+                "last": _round(last.latency_ms),
+                "p50": _round(percentile(latencies, 50)),
+                "p95": _round(percentile(latencies, 95)),
+                "p99": _round(percentile(latencies, 99)),
+            },
+            "window": {"samples": len(self.samples), "failures": failures},
+            "pool": pool_status(self.engine),
+        }
+        if last.error:
+            report["error"] = last.error
+        return report
+
+    def _failed(self, error: str) -> ProbeSample:
+        return ProbeSample(
+            checked_at=datetime.now(timezone.utc),
+            monotonic=time.monotonic(),
+            latency_ms=None,
+            error=error,
+        )
+
+    @staticmethod
+    def _age(sample: ProbeSample) -> float:
+        return time.monotonic() - sample.monotonic
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """Report checked-out connections against pool capacity.
+
+    Pools without a fixed size (SQLite's static/null pools) only report
+    their class name.
+    """
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if hasattr(pool, "checkedout") and hasattr(pool, "size"):
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        checked_out = pool.checkedout()
+        status.update(
+            size=pool.size(),
+            checked_out=checked_out,
+            overflow=pool.overflow(),
+            saturation=round(checked_out / capacity, 3) if capacity else None,
+        )
+    return status
+
+
+def _isoformat(dt: datetime) -> str:
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+@lru_cache
+def get_prober() -> HealthProber:
+    """Process-wide prober (started/stopped in main.lifespan)."""
+    settings = get_settings()
+    return HealthProber(
+        get_engine(),
+        interval=settings.HEALTH_PROBE_INTERVAL,
+        window=settings.HEALTH_PROBE_WINDOW,
+        timeout=settings.HEALTH_PROBE_TIMEOUT,
+    )
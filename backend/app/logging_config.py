@@ -0,0 +1,145 @@
+"""Structured, non-blocking logging.
+
+The event loop only builds a ``LogRecord`` and puts it on a queue. A
+``QueueListener`` thread does the formatting (JSON by default) and the
+stream I/O. Records are stamped with the current request context (request
+id, user id, route, DB time, trace/span id) while still on the request's task, because the
+listener thread can't see ContextVars.
+
+High-volume INFO loggers (LOG_SAMPLED_LOGGERS) can be sampled with
+LOG_SAMPLE_RATE. WARNING and above are never dropped. Log with %-style
+arguments (``logger.info("Created task %s", task_id)``), so that records
+below the enabled level cost only a level check. Pass plain values, not ORM
+objects, because the message is rendered later on the listener thread.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import Settings
+from app.request_context import current_request
+from app.tracing import current_span
+
+# Standard LogRecord attributes; anything else passed via ``extra=`` is emitted.
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+_CONTEXT_FIELDS = ("request_id", "user_id", "route", "db_time_ms")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """Copy the current request context onto the record (runs on the caller)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = current_request()
+        if ctx is not None:
+            record.request_id = ctx.request_id
+            record.user_id = ctx.user_id
+            record.route = ctx.route
+            record.db_time_ms = round(ctx.db_time_ms, 3)
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep ``rate`` of INFO-and-below records from the listed loggers."""
+
+    def __init__(self, loggers: list[str], rate: float):
+        super().__init__()
+        self.loggers = tuple(loggers)
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno >= logging.WARNING:
+            return True
+        if not record.name.startswith(self.loggers):
+            return True
+        record.sample_rate = self.rate
+        return random.random() < self.rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock ``prepare`` merges ``msg % args`` and renders tracebacks on the
+    calling thread; here the record is enqueued as-is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat().replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the request id appended when present."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{line} [request_id={request_id}]" if request_id else line
+
+
+def configure_logging(settings: Settings) -> None:
+    """Route all logging through a queue drained by a listener thread.
+
+    Replaces the root logger's handlers, so it is safe to call once per
+    process (each pre-forked worker calls it from the lifespan).
+    """
+    global _listener
+    shutdown_logging()
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    sampled = [name.strip() for name in settings.LOG_SAMPLED_LOGGERS.split(",") if name.strip()]
+    if sampled and settings.LOG_SAMPLE_RATE < 1:
+        handler.addFilter(SamplingFilter(sampled, settings.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(logging.DEBUG if settings.DEBUG else settings.LOG_LEVEL.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Stop the listener after it drains the queue."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,195 @@
+"""Event-loop blocking detector.
+
+A heartbeat task on the loop wakes every ``interval`` seconds and records
+how late it was scheduled (event-loop lag). A watcher thread checks the
+heartbeat; if it goes stale for longer than ``threshold`` while the loop is
+running, a callback is blocking the loop. The watcher then captures the
+loop thread's stack (the blocking code, e.g. bcrypt in an async route),
+counts the block and logs it once the loop recovers. Logging happens on the
+watcher thread, not on the loop.
+
+``assert_loop_not_blocked`` wraps the same detector for tests: it raises
+``LoopBlockedError`` if the loop was blocked beyond the budget.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from app.config import get_settings
+from app.health import percentile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BlockEvent:
+    """One episode of the loop being blocked past the threshold."""
+
+    detected_at: datetime
+    duration_ms: float
+    stack: list[str]
+
+    def as_dict(self) -> dict:
+        return {
+            "detected_at": self.detected_at.isoformat().replace("+00:00", "Z"),
+            "duration_ms": round(self.duration_ms, 3),
+            "stack": self.stack,
+        }
+
+
+class LoopBlockedError(AssertionError):
+    """Raised by ``assert_loop_not_blocked`` when the budget was exceeded."""
+
+
+class LoopWatchdog:
+    """Measures event-loop lag continuously and reports blocking callbacks.
+
+    Attributes:
+        threshold: Seconds the loop must be blocked to count as a block.
+        interval: Seconds between heartbeats (lag sampling period).
+        lag_ms: Rolling window of heartbeat scheduling delays.
+        blocked_total: Blocks detected since start (metric counter).
+        blocks: Most recent block events, with stacks.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.05, window: int = 1200, keep: int = 20):
+        self.threshold = threshold
+        self.interval = interval
+        self.lag_ms: deque[float] = deque(maxlen=window)
+        self.blocks: deque[BlockEvent] = deque(maxlen=keep)
+        self.blocked_total = 0
+        self.max_block_ms = 0.0
+        self._beat = time.perf_counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watcher thread."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._heartbeat = asyncio.create_task(self._beat_loop(), name="loop-watchdog-heartbeat")
+        self._thread = threading.Thread(
+            target=self._watch, args=(threading.get_ident(),), name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop both halves; a block still in progress is recorded."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+        await asyncio.to_thread(self._thread.join)
+        self._heartbeat = None
+        self._thread = None
+
+    def snapshot(self) -> dict:
+        lags = list(self.lag_ms)
+        return {
+            "running": self.running,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": {
+                "p50": _round(percentile(lags, 50)),
+                "p99": _round(percentile(lags, 99)),
+                "max": _round(max(lags, default=None)),
+            },
+            "blocked_total": self.blocked_total,
+            "max_block_ms": round(self.max_block_ms, 3),
+            "recent_blocks": [event.as_dict() for event in self.blocks],
+        }
+
+    async def _beat_loop(self) -> None:
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._beat = now
+            self.lag_ms.append(max(0.0, (now - before - self.interval) * 1000))
+
+    def _watch(self, loop_thread: int) -> None:
+        poll = min(self.threshold / 2, self.interval)
+        episode_beat: Optional[float] = None
+        stack: list[str] = []
+        blocked = 0.0
+        while not self._stop.wait(poll):
+            beat = self._beat
+            if episode_beat is not None and beat != episode_beat:
+                self._record(blocked, stack)
+                episode_beat = None
+            if not self._loop.is_running():
+                continue  # an idle, stopped loop (e.g. between test phases) isn't blocked
+            late = time.perf_counter() - beat - self.interval
+            if late > self.threshold:
+                if episode_beat is None:
+                    episode_beat = beat
+                    frame = sys._current_frames().get(loop_thread)
+                    stack = traceback.format_stack(frame) if frame is not None else []
+                blocked = late
+        if episode_beat is not None:
+            self._record(blocked, stack)
+
+    def _record(self, blocked: float, stack: list[str]) -> None:
+        duration_ms = blocked * 1000
+        self.blocked_total += 1
+        self.max_block_ms = max(self.max_block_ms, duration_ms)
+        self.blocks.append(BlockEvent(datetime.now(timezone.utc), duration_ms, stack))
+        logger.warning(
+            "Event loop blocked for %.0f ms (threshold %.0f ms); blocking stack:\n%s",
+            duration_ms,
+            self.threshold * 1000,
+            "".join(stack),
+        )
+
+
+@asynccontextmanager
+async def assert_loop_not_blocked(budget_ms: float):
+    """Fail with ``LoopBlockedError`` if the loop blocks longer than ``budget_ms``.
+
+    Used by tests/conftest.py to enforce a blocking budget on async tests.
+    """
+    watchdog = LoopWatchdog(threshold=budget_ms / 1000, interval=min(0.01, budget_ms / 4000))
+    watchdog.start()
+    try:
+        yield watchdog
+    finally:
+        await watchdog.stop()
+    if watchdog.blocks:
+        worst = max(watchdog.blocks, key=lambda event: event.duration_ms)
+        raise LoopBlockedError(
+            f"event loop blocked for {worst.duration_ms:.0f} ms (budget {budget_ms:.0f} ms) at:\n"
+            + "".join(worst.stack)
+        )
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+@lru_cache
+def get_loop_watchdog() -> LoopWatchdog:
+    """Process-wide watchdog (started/stopped in main.lifespan)."""
+    return LoopWatchdog(threshold=get_settings().LOOP_BLOCK_THRESHOLD_MS / 1000)
@@ -1,23 +1,59 @@
-"""FastAPI application entry point"""
+"""FastAPI application entry point
 
+Importing this module only wires up routes: settings, the DB engine, the
+passlib context and logging (app.logging_config) are all created on first
+use or in ``lifespan``, which keeps worker boot and test collection fast
+(see tests/test_startup.py).
+"""
+
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-
-from app.config import settings
-from app.database import create_tables, close_db, check_db_connection
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.audit import get_audit_log, get_partition_job
+from app.change_feed import get_change_feed
+from app.config import get_settings
+from app.database import close_db, get_engine
+from app.migrations import ensure_schema
+from app.health import get_prober
+from app.privileges import get_privilege_cache
+from app.logging_config import configure_logging, shutdown_logging
+from app.loop_watchdog import get_loop_watchdog
+from app.request_context import RequestContextMiddleware
+from app.services.archive import get_archive_job
+from app.services.idempotency import get_cleanup_job
+from app.services.outbox import get_outbox_dispatcher
+from app.services.task_stats import get_repair_job
+from app.services.webhooks import get_webhook_deliverer
+from app.tracing import TracingMiddleware, get_tracer
 
 from app.routes.auth import router as auth_router
 from app.routes.tasks import router as tasks_router
 from app.routes.system import router as system_router
 from app.routes.users import router as users_router
+from app.routes.admin import router as admin_router
+from app.routes.webhooks import router as webhooks_router
+from app.routes.audit import router as audit_router
+from app.routes.bootstrap import router as bootstrap_router
+from app.routes.analytics import router as analytics_router
+
+logger = logging.getLogger(__name__)
 
 
 # -------------------------------------------------
 # CORS (configured via CORS_ORIGINS env variable)
 # -------------------------------------------------
-cors_origins = settings.cors_origins_list
-print(f"CORS Origins configured: {cors_origins}")
+class SettingsCORSMiddleware(CORSMiddleware):
+    """CORS middleware that reads allowed origins from settings.
+
+    Starlette builds the middleware stack on the first request/lifespan
+    event, so origins are resolved then rather than at import time.
+    """
+
+    def __init__(self, app, **kwargs):
+        super().__init__(app, allow_origins=get_settings().cors_origins_list, **kwargs)
 
 
 # -------------------------------------------------
@@ -25,25 +61,59 @@ print(f"CORS Origins configured: {cors_origins}")
 # -------------------------------------------------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print(f"Starting {settings.APP_NAME}...")
-    print(f"CORS Origins: {cors_origins}")
+    settings = get_settings()
+    configure_logging(settings)
+    app.title = settings.APP_NAME
+    logger.info("Starting %s (CORS origins: %s)", settings.APP_NAME, settings.cors_origins_list)
     try:
-        await create_tables()
-        print("Database ready")
-    except Exception as e:
-        print(f"DB warning: {e}")
+        version = await ensure_schema(get_engine(), settings.AUTO_MIGRATE)
+        logger.info("Database ready (schema version %s)", version)
+    except (OSError, OperationalError, InterfaceError) as e:
+        # Unreachable database: start anyway, /health reports it. An outdated
+        # schema (SchemaOutOfDateError) propagates and fails the boot.
+        logger.warning("DB warning: %s", e)
+    get_prober().start()
+    get_privilege_cache().start()
+    await get_change_feed().start()
+    get_audit_log().start()
+    if settings.RUN_SINGLETON_JOBS:
+        # Cluster-wide maintenance: under app.serve, only the primary worker
+        get_cleanup_job().start()
+        get_partition_job().start()
+        if settings.ARCHIVE_AFTER_DAYS > 0:
+            get_archive_job().start()
+        if settings.TASK_STATS_REPAIR_INTERVAL > 0:
+            get_repair_job().start()
+    await get_webhook_deliverer().start()
+    get_outbox_dispatcher().register(get_webhook_deliverer().handle, topic_prefix="task.")
+    get_outbox_dispatcher().start()
+    if settings.LOOP_WATCHDOG_ENABLED:
+        get_loop_watchdog().start()
 
     yield
 
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    await get_loop_watchdog().stop()
+    await get_prober().stop()
+    await get_cleanup_job().stop()
+    await get_outbox_dispatcher().stop()
+    await get_webhook_deliverer().stop()
+    await get_change_feed().stop()
+    await get_partition_job().stop()
+    await get_archive_job().stop()
+    await get_repair_job().stop()
+    await get_audit_log().stop()
+    await get_privilege_cache().stop()
     await close_db()
+    get_tracer().shutdown()
+    shutdown_logging()
 
 
 # -------------------------------------------------
 # CREATE APP (⚠️ MUST COME BEFORE include_router)
 # -------------------------------------------------
 app = FastAPI(
-    title=settings.APP_NAME,
+    title="Todo API",  # replaced by settings.APP_NAME in lifespan
     version="2.0.0",
     lifespan=lifespan,
 )
@@ -53,12 +123,13 @@ app = FastAPI(
 # Middleware
 # -------------------------------------------------
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=cors_origins,
+    SettingsCORSMiddleware,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 
 # -------------------------------------------------
@@ -68,6 +139,11 @@ app.include_router(auth_router, prefix="/api/auth")
 app.include_router(tasks_router)
 app.include_router(system_router)
 app.include_router(users_router, prefix="/api")
+app.include_router(admin_router)
+app.include_router(webhooks_router)
+app.include_router(audit_router)
+app.include_router(bootstrap_router)
+app.include_router(analytics_router)
 
 
 
@@ -78,11 +154,11 @@ app.include_router(users_router, prefix="/api")
 async def root():
     return {
         "status": "ok",
-        "app": settings.APP_NAME,
+        "app": get_settings().APP_NAME,
         "docs": "/docs",
     }
 
 
 @app.get("/health")
 async def health():
-    return await check_db_connection()
+    return await get_prober().snapshot()
@@ -0,0 +1,463 @@
+"""Versioned schema migrations.
+
+Migrations are registered in order with ``@migration(version, description)``
+and recorded in a ``schema_version`` table once applied. At boot a worker
+only reads the current version (one cheap query); when the schema is behind,
+``upgrade`` applies the pending migrations under a Postgres advisory lock so
+that workers starting at the same time don't race each other.
+
+Run out of band with::
+
+    python -m app.migrations upgrade
+    python -m app.migrations current
+    python -m app.migrations partition-tasks 16
+"""
+
+import asyncio
+import logging
+import sys
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import (
+    Column,
+    Connection,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    func,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import get_settings
+from app.models import (
+    AuditLogEntry,
+    IdempotencyKey,
+    OutboxEvent,
+    Task,
+    TaskArchive,
+    TaskRollup,
+    User,
+    UserTaskStats,
+    WebhookSubscription,
+)
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary but fixed key shared by every worker (pg_advisory_lock takes a bigint)
+ADVISORY_LOCK_KEY = 7_264_190_331
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """Raised when the database is behind and auto-migration is disabled."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single schema change.
+
+    Attributes:
+        version: Strictly increasing version number.
+        description: Short human-readable summary.
+        upgrade: Callable receiving a sync ``Connection`` (run via run_sync).
+        transactional: False for steps that can't run inside a transaction,
+                       such as ``CREATE INDEX CONCURRENTLY``; they run on an
+                       autocommit connection and must be idempotent.
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool = True
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, description: str, *, transactional: bool = True):
+    """Register the decorated function as the migration for ``version``."""
+
+    def decorator(fn: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"Migration {version} registered out of order")
+        MIGRATIONS.append(Migration(version, description, fn, transactional))
+        return fn
+
+    return decorator
+
+
+def head_version() -> int:
+    """Version the code expects the database to be at."""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+# -------------------------------------------------
+# Helpers for writing idempotent migrations
+# -------------------------------------------------
+def create_index_online(conn: Connection, name: str, table: str, columns: str) -> None:
+    """Build an index without blocking writes where the backend allows it.
+
+    On Postgres this uses ``CREATE INDEX CONCURRENTLY`` (the migration must be
+    registered with ``transactional=False``) and first drops an INVALID index
+    left behind by an interrupted build. Elsewhere it's a plain build.
+    """
+    if conn.dialect.name == "postgresql":
+        invalid = conn.execute(
+            text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name},
+        ).first()
+        if invalid:
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        conn.execute(text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON {table} ({columns})'))
+    else:
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON {table} ({columns})'))
+
+
+def add_column(conn: Connection, table: str, column: Column) -> None:
+    """Add ``column`` to ``table`` unless it already exists."""
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return
+    ddl = column.type.compile(dialect=conn.dialect)
+    clause = f'ALTER TABLE {table} ADD COLUMN "{column.name}" {ddl}'
+    if column.server_default is not None:
+        clause += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        clause += " NOT NULL"
+    conn.execute(text(clause))
+
+
+def create_monthly_partitions(conn: Connection, table: str, start: date, months: int) -> list[str]:
+    """Create the Postgres range partitions of ``table`` for ``months`` months from ``start``.
+
+    Partitions are named ``<table>_yYYYYmMM``; existing ones are left alone.
+    Returns the partition names.
+    """
+    names = []
+    year, month = start.year, start.month
+    for _ in range(months):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        name = f"{table}_y{year:04d}m{month:02d}"
+        conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{year:04d}-{month:02d}-01') TO ('{next_year:04d}-{next_month:02d}-01')"
+            )
+        )
+        names.append(name)
+        year, month = next_year, next_month
+    return names
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    """True if ``table`` is a Postgres partitioned table."""
+    if conn.dialect.name != "postgresql":
+        return False
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ).scalar()
+    return relkind == "p"
+
+
+def partition_tasks_by_owner(conn: Connection, partitions: int) -> bool:
+    """Rebuild ``tasks`` as ``partitions`` hash partitions on owner_id (Postgres).
+
+    Runs in the caller's transaction and holds an ACCESS EXCLUSIVE lock on
+    ``tasks`` while the rows are copied, so plan a maintenance window for a
+    large table. The primary key becomes (id, owner_id): a partitioned table's
+    keys must include the partition key, and ids stay unique through the
+    shared sequence. Indexes are built after the copy, once per partition.
+
+    Returns False (and does nothing) on other backends or when ``tasks`` is
+    already partitioned.
+    """
+    if partitions < 2:
+        raise ValueError("partitions must be at least 2")
+    if conn.dialect.name != "postgresql" or is_partitioned(conn, "tasks"):
+        return False
+    conn.execute(text("LOCK TABLE tasks IN ACCESS EXCLUSIVE MODE"))
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('tasks', 'id')")).scalar()
+    conn.execute(text("ALTER TABLE tasks RENAME TO tasks_unpartitioned"))
+    conn.execute(
+        text("CREATE TABLE tasks (LIKE tasks_unpartitioned INCLUDING DEFAULTS) PARTITION BY HASH (owner_id)")
+    )
+    width = len(str(partitions - 1))
+    for remainder in range(partitions):
+        conn.execute(
+            text(
+                f"CREATE TABLE tasks_p{remainder:0{width}d} PARTITION OF tasks "
+                f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+            )
+        )
+    conn.execute(text("INSERT INTO tasks SELECT * FROM tasks_unpartitioned"))
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY tasks.id"))
+    # Dropping the old table frees the constraint and index names reused below
+    conn.execute(text("DROP TABLE tasks_unpartitioned"))
+    conn.execute(text("ALTER TABLE tasks ADD CONSTRAINT tasks_pkey PRIMARY KEY (id, owner_id)"))
+    conn.execute(
+        text("ALTER TABLE tasks ADD CONSTRAINT tasks_owner_id_fkey FOREIGN KEY (owner_id) REFERENCES users (id)")
+    )
+    conn.execute(text("CREATE INDEX ix_tasks_owner_id ON tasks (owner_id)"))
+    conn.execute(text("CREATE INDEX ix_tasks_owner_created ON tasks (owner_id, created_at)"))
+    conn.execute(text("ANALYZE tasks"))
+    return True
+
+
+# -------------------------------------------------
+# Migrations (append only; never edit an applied one)
+# -------------------------------------------------
+@migration(1, "baseline users and tasks tables")
+def _baseline(conn: Connection) -> None:
+    User.__table__.create(conn, checkfirst=True)
+    Task.__table__.create(conn, checkfirst=True)
+
+
+@migration(2, "store task timestamps as timestamptz")
+def _timestamptz(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    for column in inspect(conn).get_columns("tasks"):
+        if column["name"] in ("created_at", "updated_at") and not getattr(column["type"], "timezone", True):
+            conn.execute(
+                text(
+                    f"ALTER TABLE tasks ALTER COLUMN {column['name']} TYPE timestamptz "
+                    f"USING ({column['name']} AT TIME ZONE 'UTC')"
+                )
+            )
+
+
+@migration(3, "index tasks by owner and creation time", transactional=False)
+def _tasks_owner_created_index(conn: Connection) -> None:
+    create_index_online(conn, "ix_tasks_owner_created", "tasks", "owner_id, created_at")
+
+
+@migration(4, "idempotency keys table")
+def _idempotency_keys(conn: Connection) -> None:
+    IdempotencyKey.__table__.create(conn, checkfirst=True)
+
+
+@migration(5, "task row versions for optimistic concurrency")
+def _task_version(conn: Connection) -> None:
+    add_column(conn, "tasks", Column("version", Integer, nullable=False, server_default="1"))
+
+
+@migration(6, "transactional outbox table")
+def _outbox_events(conn: Connection) -> None:
+    OutboxEvent.__table__.create(conn, checkfirst=True)
+
+
+@migration(7, "webhook subscriptions table")
+def _webhook_subscriptions(conn: Connection) -> None:
+    WebhookSubscription.__table__.create(conn, checkfirst=True)
+
+
+@migration(8, "append-only audit log, partitioned by month on Postgres")
+def _audit_log(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        AuditLogEntry.__table__.create(conn, checkfirst=True)
+        return
+    # Partitioned tables need the partition key in the primary key
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS audit_log ("
+            "id BIGSERIAL, occurred_at TIMESTAMPTZ NOT NULL, user_id INTEGER NOT NULL, "
+            "action VARCHAR(32) NOT NULL, task_id INTEGER, version INTEGER, "
+            "request_id VARCHAR(128), details TEXT, PRIMARY KEY (id, occurred_at)"
+            ") PARTITION BY RANGE (occurred_at)"
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_audit_log_user_time ON audit_log (user_id, occurred_at)"))
+    conn.execute(text("CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT"))
+    create_monthly_partitions(conn, "audit_log", datetime.now(timezone.utc).date(), 3)
+    conn.execute(
+        text(
+            "CREATE OR REPLACE FUNCTION audit_log_append_only() RETURNS trigger AS $$ "
+            "BEGIN RAISE EXCEPTION 'audit_log is append-only'; END $$ LANGUAGE plpgsql"
+        )
+    )
+    conn.execute(text("DROP TRIGGER IF EXISTS audit_log_append_only ON audit_log"))
+    conn.execute(
+        text(
+            "CREATE TRIGGER audit_log_append_only BEFORE UPDATE OR DELETE OR TRUNCATE ON audit_log "
+            "FOR EACH STATEMENT EXECUTE FUNCTION audit_log_append_only()"
+        )
+    )
+
+
+@migration(9, "archive table for completed tasks")
+def _tasks_archive(conn: Connection) -> None:
+    TaskArchive.__table__.create(conn, checkfirst=True)
+
+
+@migration(10, "hash-partition tasks by owner when TASKS_HASH_PARTITIONS is set (Postgres)")
+def _tasks_hash_partitions(conn: Connection) -> None:
+    partitions = get_settings().TASKS_HASH_PARTITIONS
+    if partitions:
+        partition_tasks_by_owner(conn, partitions)
+
+
+@migration(11, "per-user task counters, backfilled from tasks")
+def _user_task_stats(conn: Connection) -> None:
+    UserTaskStats.__table__.create(conn, checkfirst=True)
+    conn.execute(
+        text(
+            "INSERT INTO user_task_stats "
+            "(user_id, total, completed, low_priority, medium_priority, high_priority, updated_at) "
+            "SELECT owner_id, COUNT(*), "
+            "SUM(CASE WHEN completed THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN priority = 'low' THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN priority = 'medium' THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN priority = 'high' THEN 1 ELSE 0 END), "
+            "CURRENT_TIMESTAMP "
+            "FROM tasks WHERE owner_id IS NOT NULL GROUP BY owner_id"
+        )
+    )
+
+
+@migration(12, "hourly and daily task activity rollups")
+def _task_rollups(conn: Connection) -> None:
+    # History is filled by `python -m app.services.analytics backfill`
+    TaskRollup.__table__.create(conn, checkfirst=True)
+
+
+@migration(13, "store response headers (ETag) of idempotent requests for replay")
+def _idempotency_response_headers(conn: Connection) -> None:
+    add_column(conn, "idempotency_keys", Column("response_headers", Text, nullable=True))
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+async def current_version(engine: AsyncEngine) -> int:
+    """Return the applied schema version (0 for an unversioned database).
+
+    Connection errors propagate: an unreachable database is not version 0.
+    """
+    async with engine.connect() as conn:
+        if not await conn.run_sync(lambda c: inspect(c).has_table(schema_version.name)):
+            return 0
+        version = await conn.scalar(select(func.max(schema_version.c.version)))
+    return version or 0
+
+
+@asynccontextmanager
+async def _migration_lock(engine: AsyncEngine):
+    """Serialize migrators across workers with a session-level advisory lock."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        try:
+            yield
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+
+async def upgrade(engine: AsyncEngine, target: int | None = None) -> list[int]:
+    """Apply pending migrations up to ``target`` (default: head).
+
+    Returns:
+        The versions applied by this call (empty if another worker got there
+        first while we waited for the lock).
+    """
+    target = head_version() if target is None else target
+    applied = []
+    async with _migration_lock(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(schema_version.create, checkfirst=True)
+        # Re-read under the lock: a concurrent worker may have migrated already.
+        current = await current_version(engine)
+        for step in MIGRATIONS:
+            if step.version <= current or step.version > target:
+                continue
+            logger.info("Applying migration %s: %s", step.version, step.description)
+            if step.transactional:
+                async with engine.begin() as conn:
+                    await conn.run_sync(step.upgrade)
+                    await conn.execute(_record(step))
+            else:
+                async with engine.connect() as conn:
+                    conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    await conn.run_sync(step.upgrade)
+                async with engine.begin() as conn:
+                    await conn.execute(_record(step))
+            applied.append(step.version)
+    return applied
+
+
+async def ensure_schema(engine: AsyncEngine, auto_migrate: bool = True) -> int:
+    """Boot-time check: one version query when the schema is current.
+
+    Raises:
+        SchemaOutOfDateError: If the schema is behind and ``auto_migrate``
+                              is False.
+    """
+    current = await current_version(engine)
+    head = head_version()
+    if current >= head:
+        return current
+    if not auto_migrate:
+        raise SchemaOutOfDateError(
+            f"Database schema is at version {current}, code expects {head}. "
+            "Run `python -m app.migrations upgrade`."
+        )
+    await upgrade(engine)
+    return head
+
+
+def _record(step: Migration):
+    return schema_version.insert().values(
+        version=step.version,
+        description=step.description,
+        applied_at=datetime.now(timezone.utc),
+    )
+
+
+async def _main(command: str, *args: str) -> None:
+    from app.database import get_engine
+
+    engine = get_engine()
+    try:
+        if command == "upgrade":
+            applied = await upgrade(engine)
+            print(f"Applied migrations: {applied or 'none'} (head={head_version()})")
+        elif command == "current":
+            print(f"current={await current_version(engine)} head={head_version()}")
+        elif command == "partition-tasks":
+            if not args or not args[0].isdigit():
+                raise SystemExit("Usage: python -m app.migrations partition-tasks <partition count>")
+            async with _migration_lock(engine):
+                async with engine.begin() as conn:
+                    changed = await conn.run_sync(partition_tasks_by_owner, int(args[0]))
+            print("Partitioned tasks" if changed else "Nothing to do (tasks already partitioned, or not Postgres)")
+        else:
+            raise SystemExit(f"Unknown command: {command} (expected upgrade|current|partition-tasks)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(*(sys.argv[1:] or ["upgrade"])))
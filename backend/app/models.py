@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 from typing import List, Optional
 from sqlmodel import Field, SQLModel, Relationship
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, Index, Integer
 
 class User(SQLModel, table=True):
     __tablename__ = "users"
@@ -19,6 +19,7 @@ class User(SQLModel, table=True):
 
 class Task(SQLModel, table=True):
     __tablename__ = "tasks"
+    __table_args__ = (Index("ix_tasks_owner_created", "owner_id", "created_at"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(nullable=False)
     completed: bool = Field(default=False)
@@ -32,4 +33,148 @@ class Task(SQLModel, table=True):
         sa_column=Column(DateTime(timezone=True), nullable=False)
     )
     owner_id: Optional[int] = Field(default=None, foreign_key="users.id", index=True)
+    # Bumped by every write; served as the ETag and checked against If-Match
+    version: int = Field(default=1, sa_column=Column(Integer, nullable=False, server_default="1"))
     owner: Optional[User] = Relationship(back_populates="tasks")
+
+
+class TaskArchive(SQLModel, table=True):
+    """Completed tasks moved out of ``tasks`` by the archival job (read-only)."""
+
+    __tablename__ = "tasks_archive"
+    __table_args__ = (Index("ix_tasks_archive_owner_created", "owner_id", "created_at"),)
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})  # id it had in tasks
+    title: str = Field(nullable=False)
+    completed: bool = Field(default=True)
+    priority: str = Field(default="medium", nullable=False)
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    updated_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    owner_id: Optional[int] = Field(default=None)
+    version: int = Field(default=1, nullable=False)
+    archived_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+
+    @property
+    def archived(self) -> bool:
+        return True
+
+
+class UserTaskStats(SQLModel, table=True):
+    """Per-user task counters, kept current by delta updates in ``task_service``."""
+
+    __tablename__ = "user_task_stats"
+    user_id: int = Field(foreign_key="users.id", primary_key=True, sa_column_kwargs={"autoincrement": False})
+    total: int = Field(default=0, nullable=False)
+    completed: int = Field(default=0, nullable=False)
+    low_priority: int = Field(default=0, nullable=False)
+    medium_priority: int = Field(default=0, nullable=False)
+    high_priority: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+
+
+class TaskRollup(SQLModel, table=True):
+    """Task activity of one user in one hour or day (see ``services.analytics``)."""
+
+    __tablename__ = "task_rollups"
+    __table_args__ = (Index("ix_task_rollups_granularity_bucket", "granularity", "bucket"),)
+    user_id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    granularity: str = Field(primary_key=True, max_length=8)  # "hour" or "day"
+    bucket: datetime = Field(sa_column=Column(DateTime(timezone=True), primary_key=True))  # bucket start, UTC
+    created: int = Field(default=0, nullable=False)
+    completed: int = Field(default=0, nullable=False)
+    # Time-to-complete: total, plus a histogram over analytics.TTC_BIN_HOURS
+    ttc_seconds: float = Field(default=0.0, nullable=False)
+    ttc_0: int = Field(default=0, nullable=False)
+    ttc_1: int = Field(default=0, nullable=False)
+    ttc_2: int = Field(default=0, nullable=False)
+    ttc_3: int = Field(default=0, nullable=False)
+    ttc_4: int = Field(default=0, nullable=False)
+    ttc_5: int = Field(default=0, nullable=False)
+    ttc_6: int = Field(default=0, nullable=False)
+    ttc_7: int = Field(default=0, nullable=False)
+    ttc_8: int = Field(default=0, nullable=False)
+    ttc_9: int = Field(default=0, nullable=False)
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """Stored outcome of a request made with an ``Idempotency-Key`` header."""
+
+    __tablename__ = "idempotency_keys"
+    user_id: int = Field(primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(max_length=64, nullable=False)
+    status_code: Optional[int] = Field(default=None)  # None until the request completes
+    response_body: Optional[str] = Field(default=None)
+    response_headers: Optional[str] = Field(default=None)  # JSON, replayed with the body
+    response_hash: Optional[str] = Field(default=None, max_length=64)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False, index=True)
+    )
+
+
+class OutboxEvent(SQLModel, table=True):
+    """A side effect of a task write, dispatched after commit (transactional outbox)."""
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (Index("ix_outbox_events_available", "available_at"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    topic: str = Field(max_length=64, nullable=False)
+    user_id: int = Field(nullable=False)
+    payload: str = Field(nullable=False)  # JSON
+    attempts: int = Field(default=0, nullable=False)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    # Next time a dispatcher may claim the event (lease expiry or retry backoff)
+    available_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    # Set once attempts are exhausted; dead events are kept for inspection
+    dead_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+
+
+class WebhookSubscription(SQLModel, table=True):
+    """A user's endpoint that receives signed, batched task-change events."""
+
+    __tablename__ = "webhook_subscriptions"
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", index=True, nullable=False)
+    url: str = Field(max_length=2048, nullable=False)
+    secret: str = Field(max_length=128, nullable=False)  # HMAC-SHA256 signing key
+    events: str = Field(default="task.", max_length=255, nullable=False)  # comma-separated topic prefixes
+    active: bool = Field(default=True, nullable=False)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+
+
+class AuditLogEntry(SQLModel, table=True):
+    """Append-only history of task mutations (written in batches by app.audit).
+
+    On Postgres the table is range-partitioned by month on ``occurred_at``
+    with primary key (id, occurred_at); see migration 8.
+    """
+
+    __tablename__ = "audit_log"
+    __table_args__ = (Index("ix_audit_log_user_time", "user_id", "occurred_at"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    occurred_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    user_id: int = Field(nullable=False)
+    action: str = Field(max_length=32, nullable=False)
+    task_id: Optional[int] = Field(default=None)
+    version: Optional[int] = Field(default=None)
+    request_id: Optional[str] = Field(default=None, max_length=128)
+    details: Optional[str] = Field(default=None)  # JSON snapshot of the task after the change
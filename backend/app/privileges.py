@@ -0,0 +1,187 @@
+"""Database privilege introspection.
+
+Replaces the old ``CREATE TABLE _perm_test`` / ``DROP TABLE`` probe with
+read-only catalog queries, so checking permissions never takes DDL locks.
+The result is computed at startup, refreshed on a schedule and served from
+memory by ``/api/system/permissions``.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlmodel import SQLModel
+
+from app.config import get_settings
+from app.database import get_engine
+from app.utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+TABLE_PRIVILEGES = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+_PG_SCHEMA_SQL = text(
+    "SELECT current_user AS role, current_schema() AS schema, "
+    "has_schema_privilege(current_user, current_schema(), 'CREATE') AS can_create"
+)
+
+_PG_TABLES_SQL = text(
+    "SELECT t.table_name, "
+    "pg_has_role(current_user, pt.tableowner, 'MEMBER') AS owns, "
+    "has_table_privilege(quote_ident(t.table_schema) || '.' || quote_ident(t.table_name), 'SELECT') AS can_select, "
+    "has_table_privilege(quote_ident(t.table_schema) || '.' || quote_ident(t.table_name), 'INSERT') AS can_insert, "
+    "has_table_privilege(quote_ident(t.table_schema) || '.' || quote_ident(t.table_name), 'UPDATE') AS can_update, "
+    "has_table_privilege(quote_ident(t.table_schema) || '.' || quote_ident(t.table_name), 'DELETE') AS can_delete "
+    "FROM information_schema.tables t "
+    "JOIN pg_tables pt ON pt.schemaname = t.table_schema AND pt.tablename = t.table_name "
+    "WHERE t.table_schema = current_schema() AND t.table_name IN :tables"
+).bindparams(bindparam("tables", expanding=True))
+
+
+async def introspect_privileges(engine: AsyncEngine) -> dict:
+    """Inspect what the application role may do, without running any DDL.
+
+    Returns:
+        Dict with ``can_create_table``, ``can_create_index``,
+        ``can_alter_table``, ``can_drop_table``, per-table DML privileges,
+        ``issues`` and ``checked_at``.
+    """
+    tables = sorted(SQLModel.metadata.tables)
+    result = {
+        "dialect": engine.dialect.name,
+        "can_create_table": False,
+        "can_create_index": False,
+        "can_alter_table": False,
+        "can_drop_table": False,
+        "tables": {},
+        "issues": [],
+        "checked_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+    }
+
+    try:
+        async with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                await _introspect_postgres(conn, tables, result)
+            elif engine.dialect.name == "sqlite":
+                await _introspect_sqlite(conn, tables, result)
+            else:
+                result["issues"].append(
+                    f"Privilege introspection is not supported for {engine.dialect.name}"
+                )
+    except Exception as e:
+        result["issues"].append(str(e))
+
+    return result
+
+
+async def _introspect_postgres(conn: AsyncConnection, tables: list[str], result: dict) -> None:
+    schema = (await conn.execute(_PG_SCHEMA_SQL)).mappings().one()
+    result["can_create_table"] = bool(schema["can_create"])
+    if not schema["can_create"]:
+        result["issues"].append(
+            f"Role {schema['role']} lacks CREATE on schema {schema['schema']}"
+        )
+
+    rows = (await conn.execute(_PG_TABLES_SQL, {"tables": tables})).mappings().all()
+    owned = []
+    for row in rows:
+        owned.append(row["owns"])
+        result["tables"][row["table_name"]] = {
+            "owner": bool(row["owns"]),
+            "select": bool(row["can_select"]),
+            "insert": bool(row["can_insert"]),
+            "update": bool(row["can_update"]),
+            "delete": bool(row["can_delete"]),
+        }
+
+    missing = sorted(set(tables) - set(result["tables"]))
+    if missing:
+        result["issues"].append(f"Tables not found: {', '.join(missing)}")
+
+    # Indexes, ALTER and DROP all require owning the table.
+    owns_all = bool(owned) and all(owned)
+    result["can_create_index"] = owns_all
+    result["can_alter_table"] = owns_all
+    result["can_drop_table"] = owns_all
+    for name, privileges in result["tables"].items():
+        if not privileges["owner"]:
+            result["issues"].append(f"Role {schema['role']} does not own table {name}")
+        lacking = [p for p in TABLE_PRIVILEGES if not privileges[p.lower()]]
+        if lacking:
+            result["issues"].append(f"Missing {', '.join(lacking)} on table {name}")
+
+
+async def _introspect_sqlite(conn: AsyncConnection, tables: list[str], result: dict) -> None:
+    # SQLite has no roles: everything hinges on the file being writable.
+    query_only = (await conn.execute(text("PRAGMA query_only"))).scalar()
+    databases = (await conn.execute(text("PRAGMA database_list"))).mappings().all()
+    path = next((row["file"] for row in databases if row["name"] == "main"), "")
+
+    writable = not query_only
+    if query_only:
+        result["issues"].append("Connection is in query_only mode")
+    if path and not os.access(path, os.W_OK):
+        writable = False
+        result["issues"].append(f"Database file {path} is not writable")
+
+    existing = {
+        row[0]
+        for row in await conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table'")
+        )
+    }
+    for name in tables:
+        if name not in existing:
+            result["issues"].append(f"Table not found: {name}")
+            continue
+        result["tables"][name] = {
+            "owner": True,
+            "select": True,
+            "insert": writable,
+            "update": writable,
+            "delete": writable,
+        }
+
+    for key in ("can_create_table", "can_create_index", "can_alter_table", "can_drop_table"):
+        result[key] = writable
+
+
+class PrivilegeCache:
+    """Holds the latest introspection result and refreshes it periodically."""
+
+    def __init__(self, engine: AsyncEngine, interval: float):
+        self.engine = engine
+        self.result: Optional[dict] = None
+        self._job = PeriodicTask("privilege-refresh", self.refresh, interval)
+        self._lock = asyncio.Lock()
+
+    def start(self) -> None:
+        self._job.start()
+
+    async def stop(self) -> None:
+        await self._job.stop()
+
+    async def refresh(self) -> dict:
+        self.result = await introspect_privileges(self.engine)
+        if self.result["issues"]:
+            logger.warning("Database privilege issues: %s", self.result["issues"])
+        return self.result
+
+    async def get(self) -> dict:
+        """Return the cached result, computing it once if startup hasn't yet."""
+        if self.result is None:
+            async with self._lock:
+                if self.result is None:
+                    await self.refresh()
+        return self.result
+
+
+@lru_cache
+def get_privilege_cache() -> PrivilegeCache:
+    """Process-wide cache (started/stopped in main.lifespan)."""
+    return PrivilegeCache(get_engine(), interval=get_settings().PRIVILEGE_REFRESH_INTERVAL)
@@ -0,0 +1,229 @@
+"""On-demand sampling profiler for a running worker.
+
+A sampler thread wakes every ``interval`` seconds, reads the event-loop
+thread's current frame via ``sys._current_frames()`` and counts the
+collapsed stack. Nothing is installed globally (no ``sys.setprofile``), and
+nothing runs unless a profile has been requested, so the profiler costs
+nothing while idle.
+
+While profiling, a heartbeat task on the loop measures event-loop lag. If
+the sampler sees the heartbeat go stale for longer than ``lag_threshold``,
+it records a stall along with the loop thread's stack at that moment. This
+is how sync calls such as bcrypt show up inside async handlers.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Optional
+
+from app.exceptions import ProfilerBusyError
+from app.health import percentile
+
+MAX_STALLS = 50
+_HEARTBEAT_TICK = 0.01
+
+_active = threading.Lock()
+
+
+@dataclass
+class Stall:
+    """One episode of the event loop being blocked."""
+
+    offset_s: float
+    duration_ms: float
+    stack: tuple[str, ...]
+
+    def as_dict(self) -> dict:
+        return {
+            "offset_s": round(self.offset_s, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "stack": list(self.stack),
+        }
+
+
+@dataclass
+class Profile:
+    """Collected samples (stacks are root-first) and loop-lag measurements."""
+
+    interval: float
+    duration: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+    stalls: list[Stall] = field(default_factory=list)
+    lag_ms: list[float] = field(default_factory=list)
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.stacks.values())
+
+    def to_collapsed(self) -> str:
+        """Brendan Gregg's collapsed format (``a;b;c count``), one stack per line."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def to_speedscope(self, name: str = "todo-api") -> dict:
+        """Speedscope "sampled" profile (https://www.speedscope.app)."""
+        frames: list[dict] = []
+        index: dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(round(count * self.interval, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "todo-api profiler",
+            "name": name,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": round(sum(weights), 6),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "loopLag": self.loop_lag_summary(),
+        }
+
+    def loop_lag_summary(self) -> dict:
+        return {
+            "max_ms": _round(max(self.lag_ms, default=None)),
+            "p50_ms": _round(percentile(self.lag_ms, 50)),
+            "p99_ms": _round(percentile(self.lag_ms, 99)),
+            "stalls": [stall.as_dict() for stall in self.stalls],
+        }
+
+
+class SamplingProfiler:
+    """Samples the event-loop thread (or every thread) for a fixed duration.
+
+    Attributes:
+        interval: Seconds between samples.
+        lag_threshold: Seconds the loop must be blocked to count as a stall.
+        all_threads: Also sample non-loop threads (each rooted at its name).
+    """
+
+    def __init__(self, interval: float = 0.005, lag_threshold: float = 0.05, all_threads: bool = False):
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.all_threads = all_threads
+        self._beat = time.perf_counter()
+
+    async def run(self, seconds: float) -> Profile:
+        """Profile the current worker for ``seconds`` and return the result.
+
+        Raises:
+            ProfilerBusyError: Another profile is already running in this process.
+        """
+        if not _active.acquire(blocking=False):
+            raise ProfilerBusyError()
+        try:
+            return await self._run(seconds)
+        finally:
+            _active.release()
+
+    async def _run(self, seconds: float) -> Profile:
+        profile = Profile(interval=self.interval)
+        loop_thread = threading.get_ident()
+        stop = threading.Event()
+        self._beat = time.perf_counter()
+        heartbeat = asyncio.create_task(self._heartbeat(profile))
+        sampler = threading.Thread(
+            target=self._sample, args=(profile, loop_thread, stop), name="sampling-profiler", daemon=True
+        )
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stop.set()
+            heartbeat.cancel()
+            await asyncio.to_thread(sampler.join)
+        profile.duration = time.perf_counter() - started
+        return profile
+
+    async def _heartbeat(self, profile: Profile) -> None:
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(_HEARTBEAT_TICK)
+            now = time.perf_counter()
+            self._beat = now
+            profile.lag_ms.append(max(0.0, (now - before - _HEARTBEAT_TICK) * 1000))
+
+    def _sample(self, profile: Profile, loop_thread: int, stop: threading.Event) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        started = time.perf_counter()
+        stall: Optional[Stall] = None
+        stalled_beat = None
+        while not stop.wait(self.interval):
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            loop_frame = frames.get(loop_thread)
+            if loop_frame is not None:
+                profile.stacks[_collapse(loop_frame)] += 1
+            if self.all_threads:
+                for ident, frame in frames.items():
+                    if ident not in (loop_thread, me):
+                        root = f"thread:{names.get(ident, ident)}"
+                        profile.stacks[(root, *_collapse(frame))] += 1
+
+            # Stall detection: the heartbeat hasn't advanced for too long.
+            beat = self._beat
+            blocked = now - beat - _HEARTBEAT_TICK
+            if blocked > self.lag_threshold and loop_frame is not None:
+                if stall is None or stalled_beat != beat:
+                    stalled_beat = beat
+                    stall = Stall(offset_s=max(0.0, beat - started), duration_ms=0.0, stack=_collapse(loop_frame))
+                    if len(profile.stalls) < MAX_STALLS:
+                        profile.stalls.append(stall)
+                stall.duration_ms = blocked * 1000
+            else:
+                stall = None
+
+
+def _collapse(frame: Optional[FrameType]) -> tuple[str, ...]:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+@lru_cache(maxsize=4096)
+def _frame_name(code: CodeType) -> str:
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _path_prefixes():
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+@lru_cache
+def _path_prefixes() -> tuple[str, ...]:
+    paths = {os.path.join(os.path.abspath(p), "") for p in sys.path if p}
+    paths.add(os.path.join(os.getcwd(), ""))
+    return tuple(sorted(paths, key=len, reverse=True))
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
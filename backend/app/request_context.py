@@ -0,0 +1,111 @@
+"""Per-request context available anywhere below the ASGI app.
+
+``RequestContextMiddleware`` stores a ``RequestContext`` in a ContextVar
+for each HTTP request. Code that has no access to the ``Request`` (SQL event
+listeners, log records) can then still tell which request it serves: its
+request id, the authenticated user, the route, and the DB time spent so far.
+"""
+
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_HEADER = "x-request-id"
+MAX_REQUEST_ID_LENGTH = 128
+
+access_logger = logging.getLogger("app.access")
+
+
+@dataclass
+class RequestContext:
+    """What is known about the request currently being served.
+
+    Attributes:
+        request_id: Incoming X-Request-ID, or a generated one.
+        user_id: Set by ``auth.get_current_user_id`` once authenticated.
+        db_time_ms: Time spent in SQL statements (see app.slow_queries).
+        db_queries: Number of SQL statements executed.
+    """
+
+    method: str
+    path: str
+    request_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    user_id: Optional[int] = None
+    db_time_ms: float = 0.0
+    db_queries: int = 0
+    scope: dict = field(repr=False, default_factory=dict)
+
+    @property
+    def route(self) -> str:
+        """Route template (``/api/tasks/{task_id}``) once routing matched it."""
+        route = self.scope.get("route")
+        template = getattr(route, "path", None) or self.path
+        return f"{self.method} {template}"
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request() -> Optional[RequestContext]:
+    """Context of the request being served (``None`` outside requests)."""
+    return _current.get()
+
+
+def current_route() -> Optional[str]:
+    ctx = _current.get()
+    return ctx.route if ctx is not None else None
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware, so the ContextVar reaches the route's task.
+
+    Echoes the request id in the response's X-Request-ID header and writes
+    one ``app.access`` record per request with status, duration and DB time.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext(method=scope["method"], path=scope["path"], scope=scope)
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode() and 0 < len(value) <= MAX_REQUEST_ID_LENGTH:
+                ctx.request_id = value.decode("latin-1")
+                break
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode(), ctx.request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(ctx)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if access_logger.isEnabledFor(logging.INFO):
+                access_logger.info(
+                    "%s %s",
+                    ctx.route,
+                    status_code,
+                    extra={
+                        "status": status_code,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                        "db_queries": ctx.db_queries,
+                    },
+                )
+            _current.reset(token)
@@ -0,0 +1,140 @@
+"""Admin API routes.
+
+Operational endpoints for diagnosing a live worker. Every route requires a
+user listed in ADMIN_USER_IDS; each answers for the worker process that
+served the request (see the X-Worker-Pid header).
+"""
+
+import os
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from app.audit import get_audit_log
+from app.auth import require_admin
+from app.change_feed import get_change_feed
+from app.config import get_settings
+from app.exceptions import ProfilerBusyError
+from app.loop_watchdog import get_loop_watchdog
+from app.profiler import SamplingProfiler
+from app.services.outbox import get_outbox_dispatcher
+from app.services.webhooks import get_webhook_deliverer
+from app.slow_queries import get_slow_query_log
+from app.tracing import InMemoryExporter, get_tracer
+
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, description="How long to sample"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Milliseconds between samples"),
+    lag_threshold_ms: float = Query(50.0, ge=1, description="Loop block length reported as a stall"),
+    format: Literal["speedscope", "collapsed"] = Query("speedscope"),
+    all_threads: bool = Query(False, description="Also sample threads other than the event loop"),
+):
+    """Sample this worker's stacks for ``seconds`` and return the profile.
+
+    Disabled unless PROFILER_ENABLED is set (404 otherwise).
+
+    Returns:
+        ``speedscope``: a speedscope JSON document; loop-lag percentiles
+        and stalls (with the blocking stack) are under ``loopLag``.
+        ``collapsed``: ``frame;frame;frame count`` lines for flamegraph.pl,
+        with the loop-lag summary in X-Loop-Lag-* headers.
+    """
+    settings = get_settings()
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiler is disabled")
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must be <= {settings.PROFILER_MAX_SECONDS}",
+        )
+
+    profiler = SamplingProfiler(
+        interval=interval_ms / 1000,
+        lag_threshold=lag_threshold_ms / 1000,
+        all_threads=all_threads,
+    )
+    try:
+        profile = await profiler.run(seconds)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.message)
+
+    headers = {"X-Worker-Pid": str(os.getpid()), "X-Profile-Samples": str(profile.sample_count)}
+    if format == "collapsed":
+        lag = profile.loop_lag_summary()
+        headers.update(
+            {
+                "X-Loop-Lag-Max-Ms": str(lag["max_ms"]),
+                "X-Loop-Lag-P99-Ms": str(lag["p99_ms"]),
+                "X-Loop-Stalls": str(len(lag["stalls"])),
+            }
+        )
+        return PlainTextResponse(profile.to_collapsed(), headers=headers)
+    return JSONResponse(profile.to_speedscope(name=f"worker {os.getpid()}"), headers=headers)
+
+
+@router.get("/event-loop")
+async def event_loop_stats():
+    """Event-loop lag and blocking stats from this worker's watchdog.
+
+    Returns:
+        Lag percentiles, the blocked_total counter, the longest block and
+        the most recent blocks with the stack that was running
+    """
+    return JSONResponse(get_loop_watchdog().snapshot(), headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@router.get("/change-feed")
+async def change_feed_stats():
+    """Live task-stream connections on this worker and the broker in use.
+
+    ``dropped_consumers`` counts streams closed for falling behind.
+    """
+    return JSONResponse(get_change_feed().stats(), headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@router.get("/outbox")
+async def outbox_stats():
+    """Outbox backlog (pending and dead events) and this worker's dispatch counters."""
+    return JSONResponse(await get_outbox_dispatcher().snapshot(), headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@router.get("/webhooks")
+async def webhook_stats():
+    """This worker's webhook delivery counters and endpoints with open circuits."""
+    return JSONResponse(get_webhook_deliverer().stats(), headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@router.get("/audit")
+async def audit_log_stats():
+    """This worker's audit buffer: entries waiting, written and dropped on overflow."""
+    return JSONResponse(get_audit_log().stats(), headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@router.get("/slow-queries")
+async def slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """Recent statements slower than SLOW_QUERY_THRESHOLD_MS on this worker.
+
+    Parameters are reported by type only. On Postgres, sampled entries
+    carry an ``explain`` plan once the background EXPLAIN completes.
+    """
+    return JSONResponse(get_slow_query_log().snapshot(limit), headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@router.get("/traces")
+async def recent_traces(limit: int = Query(20, ge=1, le=200)):
+    """Most recent traces on this worker (TRACING_EXPORTER=memory only).
+
+    Each trace is a list of spans: the request, its dependencies,
+    task_service calls and SQL statements, linked by parent_id.
+    """
+    exporter = get_tracer().exporter
+    if not isinstance(exporter, InMemoryExporter):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="In-memory trace exporter is not enabled")
+    traces = list(exporter.traces)[-limit:]
+    return JSONResponse(list(reversed(traces)), headers={"X-Worker-Pid": str(os.getpid())})
@@ -0,0 +1,61 @@
+"""Productivity analytics routes, secured by JWT."""
+
+from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user_id, require_admin
+from app.database import get_session
+from app.schemas import TrendsResponse
+from app.services import analytics
+from app.utils.datetime_utils import ensure_aware_utc
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+Granularity = Literal["hour", "day", "week"]
+
+# Default window, and the longest one allowed, per granularity
+_DEFAULT_SPAN = {"hour": timedelta(hours=48), "day": timedelta(days=30), "week": timedelta(weeks=12)}
+_MAX_SPAN = {"hour": timedelta(days=31), "day": timedelta(days=731), "week": timedelta(weeks=260)}
+
+
+async def _trends(
+    session: AsyncSession,
+    user_id: Optional[int],
+    granularity: str,
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> dict:
+    until = ensure_aware_utc(until) if until else datetime.now(timezone.utc)
+    since = ensure_aware_utc(since) if since else until - _DEFAULT_SPAN[granularity]
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if until - since > _MAX_SPAN[granularity]:
+        raise HTTPException(status_code=400, detail=f"Range too long for granularity={granularity}")
+    series = await analytics.trends(session, user_id, granularity, since, until)
+    return {"granularity": granularity, "since": since, "until": until, **series}
+
+
+@router.get("/trends", response_model=TrendsResponse)
+async def get_trends(
+    user_id: int = Depends(get_current_user_id),
+    granularity: Granularity = Query("day"),
+    since: Optional[datetime] = Query(None, description="Start of the range (default depends on granularity)"),
+    until: Optional[datetime] = Query(None, description="End of the range, exclusive (default: now)"),
+    session: AsyncSession = Depends(get_session),
+):
+    """The caller's tasks created and completed per bucket, and time to complete."""
+    return await _trends(session, user_id, granularity, since, until)
+
+
+@router.get("/trends/global", response_model=TrendsResponse, dependencies=[Depends(require_admin)])
+async def get_global_trends(
+    granularity: Granularity = Query("day"),
+    since: Optional[datetime] = Query(None),
+    until: Optional[datetime] = Query(None),
+    session: AsyncSession = Depends(get_session),
+):
+    """The same series summed over every user (admins only)."""
+    return await _trends(session, None, granularity, since, until)
@@ -0,0 +1,34 @@
+"""Audit log routes, secured by JWT."""
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import audit
+from app.auth import get_current_user_id
+from app.database import get_session
+from app.schemas import AuditEntryResponse
+
+router = APIRouter(prefix="/api/audit", tags=["audit"])
+
+
+@router.get("", response_model=list[AuditEntryResponse])
+async def get_audit_log(
+    user_id: int = Depends(get_current_user_id),
+    since: Optional[datetime] = Query(None, description="Entries at or after this time"),
+    until: Optional[datetime] = Query(None, description="Entries before this time"),
+    before_id: Optional[int] = Query(
+        None, description="With until: entries before (until, before_id); pass the last entry's occurred_at and id to page"
+    ),
+    task_id: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+):
+    """History of the user's task mutations, newest first.
+
+    Entries are written in batches, so the latest changes may take up to
+    AUDIT_FLUSH_INTERVAL_MS to appear.
+    """
+    return await audit.query(session, user_id, since, until, task_id, limit, before_id)
@@ -0,0 +1,44 @@
+"""Dashboard bootstrap route, secured by JWT."""
+
+import hashlib
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user_id
+from app.database import get_session, get_sessionmaker
+from app.schemas import BootstrapResponse
+from app.services import bootstrap
+
+router = APIRouter(prefix="/api/bootstrap", tags=["bootstrap"])
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+@router.get("", response_model=BootstrapResponse)
+async def get_bootstrap(
+    user_id: int = Depends(get_current_user_id),
+    limit: int = Query(50, ge=1, le=500, description="Tasks in the first page"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Profile, first page of tasks and task counts in one response.
+
+    The ETag covers the whole bundle; send it back as ``If-None-Match`` to
+    get 304 Not Modified when nothing changed.
+    """
+    # Separate pooled connections only help on Postgres; SQLite has one
+    session_factory = get_sessionmaker() if session.bind.dialect.name == "postgresql" else None
+    bundle = await bootstrap.load(session, user_id, limit, session_factory)
+    if bundle is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    body = BootstrapResponse.model_validate(bundle).model_dump_json().encode()
+    etag = _etag(body)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,14 +1,15 @@
 """System API routes.
 
 Provides system health and diagnostic endpoints.
-Phase II: Public endpoints (no auth required).
+Phase II: Public endpoints (no auth required), except ``/permissions``,
+which names the DB role and its grants and is limited to ADMIN_USER_IDS.
 """
 
-from datetime import datetime, timezone
+from fastapi import APIRouter, Depends
 
-from fastapi import APIRouter
-
-from app.database import check_db_connection, verify_schema_permissions
+from app.auth import require_admin
+from app.health import get_prober
+from app.privileges import get_privilege_cache
 
 
 router = APIRouter(prefix="/api/system", tags=["system"])
@@ -16,53 +17,62 @@ router = APIRouter(prefix="/api/system", tags=["system"])
 
 @router.get("/db-health")
 async def db_health():
-    """Test database connectivity (no auth required).
+    """Report database connectivity from the background prober (no auth required).
+
+    Answers from memory; ``sample_time`` is when the last probe ran.
 
     Returns:
-        JSON with database_ok status and sample_time
+        JSON with database_ok status, sample_time and sample age
 
     Response Examples:
         Success:
         {
             "database_ok": true,
-            "sample_time": "2025-01-15T10:30:00Z"
+            "sample_time": "2025-01-15T10:30:00Z",
+            "sample_age_seconds": 2.417
         }
 
         Failure:
         {
             "database_ok": false,
             "sample_time": "2025-01-15T10:30:00Z",
+            "sample_age_seconds": 2.417,
             "error": "connection refused"
         }
     """
-    db_status = await check_db_connection()
+    snapshot = await get_prober().snapshot()
 
     response = {
-        "database_ok": db_status["status"] == "healthy",
-        "sample_time": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        "database_ok": snapshot["status"] == "healthy",
+        "sample_time": snapshot["last_check"],
+        "sample_age_seconds": snapshot["last_check_age_seconds"],
     }
 
-    if db_status.get("error"):
-        response["error"] = db_status["error"]
+    if snapshot.get("error"):
+        response["error"] = snapshot["error"]
 
     return response
 
 
 @router.get("/db-health/detailed")
 async def db_health_detailed():
-    """Detailed database health check with schema info (no auth required).
+    """Detailed database health from the background prober (no auth required).
 
     Returns:
-        Full database connectivity status including schema info
+        Status, last-check age, latency percentiles over the rolling
+        window and connection pool saturation
     """
-    return await check_db_connection()
+    return await get_prober().snapshot()
 
 
-@router.get("/permissions")
+@router.get("/permissions", dependencies=[Depends(require_admin)])
 async def check_permissions():
-    """Check database permissions (no auth required).
+    """Report database permissions (admin only).
+
+    Served from a cache filled at startup and refreshed every
+    PRIVILEGE_REFRESH_INTERVAL seconds; no DDL is executed.
 
     Returns:
         JSON with permission status for various operations
     """
-    return await verify_schema_permissions()
+    return await get_privilege_cache().get()
@@ -1,42 +1,134 @@
 """Task API routes, secured by JWT."""
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Path, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.change_feed import get_change_feed
 from app.database import get_session
-from app.schemas import TaskCreate, TaskUpdate, TaskResponse, TaskStatusUpdate
-from app.services import task_service
-from app.exceptions import TaskNotFoundError
+from app.schemas import TaskCreate, TaskUpdate, TaskResponse, TaskStatsResponse, TaskStatusUpdate
+from app.services import task_service, task_stats
+from app.services.idempotency import run_idempotent
+from app.exceptions import TaskArchivedError, TaskCompletedError, TaskNotFoundError, TaskVersionConflictError
 from app.auth import get_current_user_id
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
+IdempotencyKeyHeader = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Retries with the same key replay the first response instead of executing again",
+)
+
+IfMatchHeader = Header(
+    None,
+    alias="If-Match",
+    description="ETag from a previous read; the write fails with 412 if the task has changed since",
+)
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _expected_version(if_match: Optional[str]) -> Optional[int | frozenset[int]]:
+    """Parse ``If-Match`` into the task versions it accepts (``None`` = unconditional).
+
+    The header is ``*`` or a comma-separated list of ETags (RFC 9110); the
+    write goes ahead if the task is at any listed version.
+    """
+    if if_match is None:
+        return None
+    versions = set()
+    for tag in (part.strip() for part in if_match.split(",")):
+        if tag == "*":
+            return None
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        try:
+            versions.add(int(tag.strip('"')))
+        except ValueError:
+            continue  # not one of our ETags, so it can never match
+    if not versions:
+        raise HTTPException(status_code=412, detail="If-Match does not match the task's current ETag")
+    return versions.pop() if len(versions) == 1 else frozenset(versions)
+
+
+def _write_error(e: Exception) -> HTTPException:
+    """Map a conditional-write failure from the service to an HTTP error."""
+    if isinstance(e, TaskNotFoundError):
+        return HTTPException(status_code=404, detail=e.message)
+    if isinstance(e, TaskVersionConflictError):
+        return HTTPException(status_code=412, detail=e.message, headers={"ETag": _etag(e.current_version)})
+    if isinstance(e, TaskArchivedError):
+        return HTTPException(status_code=409, detail=e.message)
+    return HTTPException(status_code=400, detail=e.message)
+
 
 @router.get("", response_model=list[TaskResponse])
 async def get_tasks(
     user_id: int = Depends(get_current_user_id),
     status: Optional[str] = Query(None, pattern="^(completed|pending)$"),
+    include_archived: bool = Query(False, description="Also return archived (old completed) tasks"),
+    limit: Optional[int] = Query(None, ge=1, description="Return only the newest N tasks"),
     session: AsyncSession = Depends(get_session)
 ):
     """Get all tasks for the authenticated user."""
-    tasks = await task_service.get_tasks(session, user_id, status)
+    tasks = await task_service.get_tasks(session, user_id, status, include_archived, limit)
     return tasks
 
 
 @router.post("", response_model=TaskResponse, status_code=201)
 async def create_task(
     task_data: TaskCreate,
+    request: Request,
+    response: Response,
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_session),
+    idempotency_key: Optional[str] = IdempotencyKeyHeader,
+):
+    """Create a new task for the authenticated user (supports Idempotency-Key)."""
+
+    async def operation():
+        task = await task_service.create_task(session, task_data, user_id)
+        response.headers["ETag"] = _etag(task.version)
+        return task
+
+    return await run_idempotent(
+        session, request, user_id, idempotency_key, operation, TaskResponse, status_code=201, response=response
+    )
+
+
+@router.get("/stream")
+async def stream_task_changes(user_id: int = Depends(get_current_user_id)):
+    """Stream the user's task changes as Server-Sent Events.
+
+    Emits ``task.created``, ``task.updated`` and ``task.deleted`` events after
+    their transaction commits. No DB session is held while streaming. An
+    ``event: reset`` means this stream fell behind and was closed; refetch
+    ``GET /api/tasks`` and reconnect.
+    """
+    return StreamingResponse(
+        get_change_feed().stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stats", response_model=TaskStatsResponse)
+async def get_task_stats(
     user_id: int = Depends(get_current_user_id),
     session: AsyncSession = Depends(get_session)
 ):
-    """Create a new task for the authenticated user."""
-    task = await task_service.create_task(session, task_data, user_id)
-    return task
+    """Task counts for the dashboard, read from maintained counters (one row lookup)."""
+    return await task_stats.get_stats(session, user_id)
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
+    response: Response,
     task_id: int = Path(..., description="Task ID"),
     user_id: int = Depends(get_current_user_id),
     session: AsyncSession = Depends(get_session)
@@ -44,59 +136,95 @@ async def get_task(
     """Get a single task by ID."""
     try:
         task = await task_service.get_task_by_id(session, task_id, user_id)
-        return task
     except TaskNotFoundError as e:
         raise HTTPException(status_code=404, detail=e.message)
+    response.headers["ETag"] = _etag(task.version)
+    return task
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
 async def update_task(
     task_data: TaskUpdate,
+    request: Request,
+    response: Response,
     task_id: int = Path(..., description="Task ID"),
     user_id: int = Depends(get_current_user_id),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    idempotency_key: Optional[str] = IdempotencyKeyHeader,
+    if_match: Optional[str] = IfMatchHeader,
 ):
-    """Update an existing task. Rejects updates if the task is completed."""
-    try:
-        # Get the current task to check if it's completed
-        current_task = await task_service.get_task_by_id(session, task_id, user_id)
-        if current_task.completed:
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot edit a completed task. Mark it as incomplete first."
+    """Update an existing task. Rejects updates if the task is completed (supports Idempotency-Key and If-Match)."""
+    expected_version = _expected_version(if_match)
+
+    async def operation():
+        try:
+            task = await task_service.update_task(
+                session,
+                task_id,
+                task_data,
+                user_id,
+                expected_version=expected_version,
+                require_incomplete=True,
             )
-        task = await task_service.update_task(session, task_id, task_data, user_id)
+        except (TaskNotFoundError, TaskVersionConflictError, TaskCompletedError, TaskArchivedError) as e:
+            raise _write_error(e)
+        response.headers["ETag"] = _etag(task.version)
         return task
-    except TaskNotFoundError as e:
-        raise HTTPException(status_code=404, detail=e.message)
+
+    return await run_idempotent(
+        session, request, user_id, idempotency_key, operation, TaskResponse, response=response
+    )
 
 
 @router.patch("/{task_id}/status", response_model=TaskResponse)
 async def update_task_status(
     status_data: TaskStatusUpdate,
+    request: Request,
+    response: Response,
     task_id: int = Path(..., description="Task ID"),
     user_id: int = Depends(get_current_user_id),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    idempotency_key: Optional[str] = IdempotencyKeyHeader,
+    if_match: Optional[str] = IfMatchHeader,
 ):
-    """Update only the completion status of a task."""
-    try:
-        task = await task_service.update_task_status(
-            session, task_id, status_data.completed, user_id
-        )
+    """Update only the completion status of a task (supports Idempotency-Key and If-Match)."""
+    expected_version = _expected_version(if_match)
+
+    async def operation():
+        try:
+            task = await task_service.update_task_status(
+                session, task_id, status_data.completed, user_id, expected_version=expected_version
+            )
+        except (TaskNotFoundError, TaskVersionConflictError, TaskArchivedError) as e:
+            raise _write_error(e)
+        response.headers["ETag"] = _etag(task.version)
         return task
-    except TaskNotFoundError as e:
-        raise HTTPException(status_code=404, detail=e.message)
+
+    return await run_idempotent(
+        session, request, user_id, idempotency_key, operation, TaskResponse, response=response
+    )
 
 
 @router.delete("/{task_id}", status_code=204)
 async def delete_task(
+    request: Request,
     task_id: int = Path(..., description="Task ID"),
     user_id: int = Depends(get_current_user_id),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_session),
+    idempotency_key: Optional[str] = IdempotencyKeyHeader,
+    if_match: Optional[str] = IfMatchHeader,
 ):
-    """Delete a task."""
-    try:
-        await task_service.delete_task(session, task_id, user_id)
-    except TaskNotFoundError as e:
-        raise HTTPException(status_code=404, detail=e.message)
+    """Delete a task (supports Idempotency-Key and If-Match).
+
+    A retried delete with the same key replays 204 instead of returning 404.
+    """
+    expected_version = _expected_version(if_match)
+
+    async def operation():
+        try:
+            await task_service.delete_task(session, task_id, user_id, expected_version=expected_version)
+        except (TaskNotFoundError, TaskVersionConflictError) as e:
+            raise _write_error(e)
+
+    return await run_idempotent(session, request, user_id, idempotency_key, operation, None, status_code=204)
 
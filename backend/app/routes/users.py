@@ -6,11 +6,13 @@ from app.database import get_session
 from app.models import User
 from app.schemas import UserResponse
 from app.auth import get_current_user_id
+from app.utils.coalesce import coalesce
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/me", response_model=UserResponse)
+@coalesce()
 async def read_users_me(
     user_id: int = Depends(get_current_user_id),
     session: AsyncSession = Depends(get_session),
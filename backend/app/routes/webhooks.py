@@ -0,0 +1,50 @@
+"""Webhook subscription routes, secured by JWT."""
+
+from fastapi import APIRouter, Depends, HTTPException, Path
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import get_current_user_id
+from app.database import get_session
+from app.exceptions import WebhookNotFoundError
+from app.schemas import WebhookCreate, WebhookCreated, WebhookResponse
+from app.services import webhooks
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+
+@router.post("", response_model=WebhookCreated, status_code=201)
+async def create_webhook(
+    data: WebhookCreate,
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_session),
+):
+    """Subscribe a URL to the user's task events.
+
+    The response includes the signing secret; it is not shown again.
+    """
+    try:
+        return await webhooks.create_webhook(session, user_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("", response_model=list[WebhookResponse])
+async def list_webhooks(
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_session),
+):
+    """List the user's webhook subscriptions."""
+    return await webhooks.list_webhooks(session, user_id)
+
+
+@router.delete("/{webhook_id}", status_code=204)
+async def delete_webhook(
+    webhook_id: int = Path(..., description="Webhook ID"),
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_session),
+):
+    """Delete a webhook subscription."""
+    try:
+        await webhooks.delete_webhook(session, webhook_id, user_id)
+    except WebhookNotFoundError as e:
+        raise HTTPException(status_code=404, detail=e.message)
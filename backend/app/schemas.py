@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr, validator
+import json
+
+from pydantic import BaseModel, EmailStr, HttpUrl, validator
 from datetime import datetime
 
 
@@ -70,6 +72,102 @@ class TaskResponse(BaseModel):
     priority: str
     created_at: datetime
     owner_id: int | None = None
+    version: int = 1
+    archived: bool = False
+
+    class Config:
+        from_attributes = True
+
+
+class TaskStatsResponse(BaseModel):
+    """Dashboard counters for the caller's (non-archived) tasks."""
+    total: int
+    completed: int
+    pending: int
+    by_priority: dict[str, int]
+
+
+class TrendSummary(BaseModel):
+    created: int
+    completed: int
+    median_hours_to_complete: float | None = None
+    mean_hours_to_complete: float | None = None
+
+
+class TrendPoint(TrendSummary):
+    bucket: datetime  # start of the hour, day or ISO week (UTC)
+
+
+class TrendsResponse(BaseModel):
+    """Task activity series served from the rollup buckets."""
+    granularity: str
+    since: datetime
+    until: datetime
+    points: list[TrendPoint]
+    summary: TrendSummary
+
+
+class BootstrapResponse(BaseModel):
+    """Everything the dashboard needs on load (GET /api/bootstrap)."""
+    user: UserResponse
+    tasks: list[TaskResponse]
+    # True when the user has more tasks than the first page holds
+    has_more_tasks: bool
+    stats: TaskStatsResponse
+
+
+# -------------------------------------------------
+# WEBHOOK SCHEMAS
+# -------------------------------------------------
+
+class WebhookCreate(BaseModel):
+    url: HttpUrl
+    # Topic prefixes to deliver, e.g. ["task.created"]; default is every task event
+    events: list[str] = ["task."]
+
+    @validator("events")
+    def validate_events(cls, v):
+        if not v or any(not event.startswith("task.") or "," in event for event in v):
+            raise ValueError("events must be non-empty task.* topic prefixes.")
+        return v
+
+
+class WebhookResponse(BaseModel):
+    id: int
+    url: str
+    events: list[str]
+    active: bool
+    created_at: datetime
+
+    @validator("events", pre=True)
+    def split_events(cls, v):
+        return v.split(",") if isinstance(v, str) else v
+
+    class Config:
+        from_attributes = True
+
+
+class WebhookCreated(WebhookResponse):
+    """Returned once on creation: the secret used to sign deliveries."""
+    secret: str
+
+
+# -------------------------------------------------
+# AUDIT SCHEMAS
+# -------------------------------------------------
+
+class AuditEntryResponse(BaseModel):
+    id: int
+    occurred_at: datetime
+    action: str
+    task_id: int | None = None
+    version: int | None = None
+    request_id: str | None = None
+    details: dict | None = None
+
+    @validator("details", pre=True)
+    def parse_details(cls, v):
+        return json.loads(v) if isinstance(v, str) else v
 
     class Config:
         from_attributes = True
@@ -0,0 +1,357 @@
+"""Production server: pre-forking supervisor running N uvicorn workers.
+
+Usage:
+    python -m app.serve                    # one worker per CPU
+    python -m app.serve --workers 4 --preload
+
+The supervisor applies pending migrations, binds the listening socket once
+and forks workers that all accept on it. Each worker builds its own engine
+after the fork (the engine is created lazily, see app.database.get_engine),
+with a pool sized so that all workers together stay under DB_MAX_CONNECTIONS.
+The budget also counts each worker's change-feed LISTEN connection, which
+is opened outside the pool. Pools never shrink below the connections one
+dashboard bootstrap reads on at once.
+
+One worker, the primary, runs the cluster-wide maintenance jobs (archival,
+counter repair, audit partitions, idempotency cleanup); the others run with
+RUN_SINGLETON_JOBS=False. A primary that dies is replaced by a new primary.
+
+A worker that exits unexpectedly is respawned after a delay that doubles
+with each exit in the last WORKER_RESTART_WINDOW seconds. More than
+WORKER_MAX_RESTARTS exits in that window means workers crash on boot (bad
+config, unreachable database): the supervisor stops the remaining workers
+and exits with status 1, so the process manager sees the failure.
+
+On SIGTERM/SIGINT the supervisor forwards the signal to every worker. Each
+worker stops accepting, finishes in-flight requests (up to GRACEFUL_TIMEOUT),
+runs the lifespan shutdown, which disposes its engine, and exits. Workers
+still alive after the timeout are killed.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import uvicorn
+
+from app.config import get_settings
+
+logger = logging.getLogger("app.serve")
+
+APP_PATH = "app.main:app"
+
+
+@dataclass(frozen=True)
+class PoolPlan:
+    """Per-worker pool sizing derived from the DB connection budget."""
+
+    workers: int
+    pool_size: int
+    max_overflow: int
+    listeners: int = 0
+
+    @property
+    def total_connections(self) -> int:
+        return self.workers * (self.pool_size + self.max_overflow + self.listeners)
+
+
+def plan_pools(
+    workers: int,
+    max_connections: int,
+    reserved: int,
+    pool_size: int,
+    max_overflow: int,
+    *,
+    listeners: int = 0,
+    min_pool_size: int = 1,
+) -> PoolPlan:
+    """Shrink the configured pool so ``workers`` pools fit the budget.
+
+    ``listeners`` are connections each worker opens outside its pool. Overflow
+    is dropped first, then the persistent pool size, down to ``min_pool_size``.
+
+    Raises:
+        ValueError: Even the smallest pools don't fit the budget.
+    """
+    per_worker = (max_connections - reserved) // workers - listeners
+    if per_worker < min_pool_size:
+        raise ValueError(
+            f"{workers} workers need at least {workers * (min_pool_size + listeners)} connections "
+            f"but only {max_connections - reserved} are available; use fewer workers "
+            "or raise DB_MAX_CONNECTIONS"
+        )
+    size = max(min_pool_size, min(pool_size, per_worker))
+    overflow = max(0, min(max_overflow, per_worker - size))
+    return PoolPlan(workers=workers, pool_size=size, max_overflow=overflow, listeners=listeners)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def migrate_before_fork() -> None:
+    """Bring the schema to head once, so workers only check the version.
+
+    Uses a throwaway engine: the global one must not exist before the fork,
+    or workers would inherit its pooled connections.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.migrations import ensure_schema
+
+    settings = get_settings()
+
+    async def _run() -> None:
+        engine = create_async_engine(settings.async_database_url)
+        try:
+            await ensure_schema(engine, settings.AUTO_MIGRATE)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(_run())
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class RespawnBackoff:
+    """Delay before respawning an exited worker, or ``None`` to give up.
+
+    Each exit within the last ``window`` seconds doubles the delay, from
+    ``base`` up to ``max_delay``. More than ``max_restarts`` exits in the
+    window is a crash loop.
+    """
+
+    def __init__(
+        self,
+        max_restarts: int = 5,
+        window: float = 60.0,
+        base: float = 0.5,
+        max_delay: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_restarts = max_restarts
+        self.window = window
+        self.base = base
+        self.max_delay = max_delay
+        self.clock = clock
+        self._exits: deque[float] = deque()
+
+    def next_delay(self) -> float | None:
+        """Record a worker exit; return how long to wait before respawning."""
+        now = self.clock()
+        self._exits.append(now)
+        while self._exits[0] < now - self.window:
+            self._exits.popleft()
+        if len(self._exits) > self.max_restarts:
+            return None
+        return min(self.max_delay, self.base * 2 ** (len(self._exits) - 1))
+
+
+class Supervisor:
+    """Forks workers onto a shared socket and drains them on shutdown."""
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int,
+        graceful_timeout: float,
+        log_level: str,
+        backoff: RespawnBackoff | None = None,
+    ):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.backoff = backoff or RespawnBackoff()
+        self.children: set[int] = set()
+        self.primary: int | None = None  # the worker running the singleton jobs
+        self.stopping = False
+        self.exit_code = 0
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for index in range(self.workers):
+            self._spawn(primary=index == 0)
+        logger.info("Supervisor %s serving with %s workers", os.getpid(), self.workers)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            self.children.discard(pid)
+            if self.stopping:
+                continue
+            delay = self.backoff.next_delay()
+            if delay is None:
+                logger.error(
+                    "Workers exited %s times within %ss; giving up",
+                    self.backoff.max_restarts + 1,
+                    self.backoff.window,
+                )
+                self.exit_code = 1
+                self._stop("crash loop")
+                continue
+            logger.warning("Worker %s exited (status %s); respawning in %.1fs", pid, status, delay)
+            self._sleep(delay)
+            if not self.stopping:
+                self._spawn(primary=pid == self.primary)
+        signal.alarm(0)
+        logger.info("All workers drained; supervisor exiting")
+        return self.exit_code
+
+    def _sleep(self, seconds: float) -> None:
+        """Sleep, but wake up early once a stop signal arrives."""
+        deadline = time.monotonic() + seconds
+        while not self.stopping and (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(remaining, 0.1))
+
+    def _spawn(self, primary: bool = False) -> None:
+        pid = os.fork()
+        if pid:
+            self.children.add(pid)
+            if primary:
+                self.primary = pid
+            return
+        # Worker process
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        os.environ["RUN_SINGLETON_JOBS"] = str(primary)
+        get_settings.cache_clear()
+        code = 0
+        try:
+            config = uvicorn.Config(
+                self.app,
+                log_level=self.log_level,
+                timeout_graceful_shutdown=self.graceful_timeout,
+                proxy_headers=True,
+            )
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stop(signal.Signals(signum).name)
+
+    def _stop(self, reason: str) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Stopping (%s); draining %s workers", reason, len(self.children))
+        self.sock.close()  # workers keep their own copy until they stop accepting
+        for pid in list(self.children):
+            _signal(pid, signal.SIGTERM)
+        signal.signal(signal.SIGALRM, self._handle_deadline)
+        signal.alarm(int(self.graceful_timeout) + 5)
+
+    def _handle_deadline(self, signum, frame) -> None:
+        for pid in list(self.children):
+            logger.warning("Worker %s did not drain in time; killing", pid)
+            _signal(pid, signal.SIGKILL)
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def main(argv: list[str] | None = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run the Todo API with multiple workers.")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY or default_workers())
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=settings.PRELOAD_APP)
+    parser.add_argument("--graceful-timeout", type=float, default=settings.GRACEFUL_TIMEOUT)
+    parser.add_argument("--log-level", default="debug" if settings.DEBUG else "info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper())
+    workers = max(1, args.workers)
+    # Workers read these from the environment when they build settings.
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    get_settings.cache_clear()
+    settings = get_settings()
+
+    from app.change_feed import uses_postgres_broker
+    from app.services.bootstrap import CONCURRENT_READS
+
+    try:
+        plan = plan_pools(
+            workers,
+            settings.DB_MAX_CONNECTIONS,
+            settings.DB_RESERVED_CONNECTIONS,
+            settings.DB_POOL_SIZE,
+            settings.DB_MAX_OVERFLOW,
+            listeners=1 if uses_postgres_broker(settings) else 0,
+            min_pool_size=CONCURRENT_READS,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    logger.info(
+        "Pool per worker: size=%s overflow=%s listeners=%s (total %s of %s, %s reserved)",
+        plan.pool_size,
+        plan.max_overflow,
+        plan.listeners,
+        plan.total_connections,
+        settings.DB_MAX_CONNECTIONS,
+        settings.DB_RESERVED_CONNECTIONS,
+    )
+    os.environ["DB_POOL_SIZE"] = str(plan.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(plan.max_overflow)
+    get_settings.cache_clear()
+
+    if not hasattr(os, "fork"):
+        # No fork (Windows): fall back to uvicorn's spawn-based supervisor.
+        uvicorn.run(
+            APP_PATH,
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            log_level=args.log_level,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            proxy_headers=True,
+        )
+        return 0
+
+    migrate_before_fork()
+
+    app = APP_PATH
+    if args.preload:
+        # Import once so workers share the loaded code pages copy-on-write.
+        # Safe: importing app.main creates no engine, settings or sockets.
+        from app.main import app
+
+    sock = _bind(args.host, args.port)
+    backoff = RespawnBackoff(settings.WORKER_MAX_RESTARTS, settings.WORKER_RESTART_WINDOW)
+    return Supervisor(app, sock, workers, args.graceful_timeout, args.log_level, backoff).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""Productivity analytics served from incremental time-bucket rollups.
+
+``task_rollups`` holds one row per user per hour and per day (UTC). Each row
+counts tasks created and completed in that bucket, and how long the
+completed ones took. ``task_service`` records each creation, and each
+completion (a pending task becoming completed), in the write's own
+transaction. That is one two-row upsert adding to the hour and the day
+bucket. Rollups count events, so reopening or deleting a task leaves
+history as it was.
+
+Medians can't be added up across buckets. Time-to-complete is therefore kept
+as a histogram over TTC_BIN_HOURS: histograms sum across buckets and users,
+and the median is interpolated within the bin that holds it. ``trends``
+serves per-user and global (summed over users) series by hour, day or ISO
+week without reading ``tasks``.
+
+``backfill`` rebuilds the buckets before a cutoff from ``tasks`` and
+``tasks_archive``, in keyset-paginated chunks. Rows only hold a task's
+current state, so a completed task counts as completed at its
+``updated_at``, and tasks deleted earlier are missing. Run it once after
+deploying, with the cutoff no later than the deploy:
+
+    python -m app.services.analytics backfill --until 2026-10-19
+"""
+
+import argparse
+import asyncio
+import bisect
+import logging
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Task, TaskArchive, TaskRollup
+from app.utils.datetime_utils import ensure_aware_utc
+
+logger = logging.getLogger(__name__)
+
+_table = TaskRollup.__table__
+GRANULARITIES = ("hour", "day")
+# Upper bounds of the time-to-complete bins, in hours; a last bin takes the rest
+TTC_BIN_HOURS = (1, 4, 12, 24, 48, 96, 168, 336, 720)
+TTC_COLUMNS = tuple(f"ttc_{index}" for index in range(len(TTC_BIN_HOURS) + 1))
+COUNTERS = ("created", "completed", "ttc_seconds", *TTC_COLUMNS)
+# Rows per upsert statement, well under the drivers' bind-parameter limits
+_UPSERT_ROWS = 1000
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    """Start of the hour or day (UTC) containing ``at``."""
+    at = ensure_aware_utc(at)
+    if granularity == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def completion(created_at: datetime, completed_at: datetime) -> dict:
+    """Counter increments for one task completed at ``completed_at``."""
+    seconds = max(0.0, (ensure_aware_utc(completed_at) - ensure_aware_utc(created_at)).total_seconds())
+    return {
+        "completed": 1,
+        "ttc_seconds": seconds,
+        TTC_COLUMNS[bisect.bisect_left(TTC_BIN_HOURS, seconds / 3600)]: 1,
+    }
+
+
+# -------------------------------------------------
+# Recording (in the write's transaction)
+# -------------------------------------------------
+async def _upsert(session: AsyncSession, rows: Iterable[dict]) -> None:
+    """Add each row's counters to its bucket, inserting missing buckets."""
+    insert = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+    rows = list(rows)
+    for start in range(0, len(rows), _UPSERT_ROWS):
+        stmt = insert(_table).values(rows[start : start + _UPSERT_ROWS])
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "granularity", "bucket"],
+                set_={name: _table.c[name] + stmt.excluded[name] for name in COUNTERS},
+            )
+        )
+
+
+def _row(user_id: int, granularity: str, bucket: datetime, counts: Mapping[str, float]) -> dict:
+    return {
+        "user_id": user_id,
+        "granularity": granularity,
+        "bucket": bucket,
+        **{name: counts.get(name, 0) for name in COUNTERS},
+    }
+
+
+async def _add(session: AsyncSession, user_id: int, at: datetime, counts: Mapping[str, float]) -> None:
+    await _upsert(session, (_row(user_id, g, bucket_start(at, g), counts) for g in GRANULARITIES))
+
+
+async def record_created(session: AsyncSession, user_id: int, at: datetime) -> None:
+    """Count a task created at ``at``."""
+    await _add(session, user_id, at, {"created": 1})
+
+
+async def record_completed(session: AsyncSession, user_id: int, created_at: datetime, at: datetime) -> None:
+    """Count a task created at ``created_at`` and completed at ``at``."""
+    await _add(session, user_id, at, completion(created_at, at))
+
+
+# -------------------------------------------------
+# Trend queries
+# -------------------------------------------------
+def median_hours(histogram: Sequence[int]) -> Optional[float]:
+    """Median time-to-complete, interpolated within its TTC_BIN_HOURS bin."""
+    total = sum(histogram)
+    if not total:
+        return None
+    middle = total / 2
+    seen = 0
+    for index, count in enumerate(histogram):
+        if count and seen + count >= middle:
+            lower = TTC_BIN_HOURS[index - 1] if index else 0
+            if index == len(TTC_BIN_HOURS):
+                return float(lower)  # open-ended last bin: report its lower bound
+            return round(lower + (TTC_BIN_HOURS[index] - lower) * (middle - seen) / count, 2)
+        seen += count
+    return None
+
+
+def summarize(counts: Mapping[str, float]) -> dict:
+    """Created/completed totals and completion times of summed buckets."""
+    completed = counts.get("completed", 0)
+    return {
+        "created": counts.get("created", 0),
+        "completed": completed,
+        "median_hours_to_complete": median_hours([counts.get(name, 0) for name in TTC_COLUMNS]),
+        "mean_hours_to_complete": round(counts["ttc_seconds"] / completed / 3600, 2) if completed else None,
+    }
+
+
+async def trends(
+    session: AsyncSession,
+    user_id: Optional[int],
+    granularity: str = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    """Series of bucket summaries in ``[since, until)`` plus a summary of the range.
+
+    ``user_id=None`` sums every user's buckets (global trends). ``week``
+    series are summed from day buckets, by ISO week starting on Monday.
+    """
+    source = "hour" if granularity == "hour" else "day"
+    stmt = (
+        select(_table.c.bucket, *(func.sum(_table.c[name]).label(name) for name in COUNTERS))
+        .where(_table.c.granularity == source)
+        .group_by(_table.c.bucket)
+        .order_by(_table.c.bucket)
+    )
+    if user_id is not None:
+        stmt = stmt.where(_table.c.user_id == user_id)
+    if since is not None:
+        stmt = stmt.where(_table.c.bucket >= bucket_start(since, source))
+    if until is not None:
+        stmt = stmt.where(_table.c.bucket < ensure_aware_utc(until))
+
+    points: dict[datetime, Counter] = {}
+    total: Counter = Counter(dict.fromkeys(COUNTERS, 0))
+    for row in await session.execute(stmt):
+        start = ensure_aware_utc(row.bucket)
+        if granularity == "week":
+            start -= timedelta(days=start.weekday())
+        counts = {name: row._mapping[name] or 0 for name in COUNTERS}
+        points.setdefault(start, Counter(dict.fromkeys(COUNTERS, 0))).update(counts)
+        total.update(counts)
+    return {
+        "points": [{"bucket": start, **summarize(counts)} for start, counts in points.items()],
+        "summary": summarize(total),
+    }
+
+
+# -------------------------------------------------
+# Backfill
+# -------------------------------------------------
+async def backfill(
+    session_factory: Callable[[], AsyncSession],
+    until: Optional[datetime] = None,
+    chunk_size: int = 10_000,
+) -> int:
+    """Rebuild every bucket before ``until`` (rounded down to a day) from stored tasks.
+
+    Buckets from that day on are left to live recording. Returns the tasks
+    read.
+    """
+    boundary = bucket_start(until or datetime.now(timezone.utc), "day")
+    async with session_factory() as session:
+        await session.execute(delete(_table).where(_table.c.bucket < boundary))
+        await session.commit()
+
+    read = 0
+    for model in (Task, TaskArchive):
+        last_id = 0
+        while True:
+            async with session_factory() as session:
+                rows = (
+                    await session.execute(
+                        select(model.id, model.owner_id, model.completed, model.created_at, model.updated_at)
+                        .where(model.id > last_id, model.created_at < boundary)
+                        .order_by(model.id)
+                        .limit(chunk_size)
+                    )
+                ).all()
+                if not rows:
+                    break
+                buckets: dict[tuple, Counter] = defaultdict(Counter)
+                for row in rows:
+                    if row.owner_id is None:
+                        continue
+                    for granularity in GRANULARITIES:
+                        buckets[row.owner_id, granularity, bucket_start(row.created_at, granularity)]["created"] += 1
+                    if row.completed and ensure_aware_utc(row.updated_at) < boundary:
+                        counts = completion(row.created_at, row.updated_at)
+                        for granularity in GRANULARITIES:
+                            buckets[row.owner_id, granularity, bucket_start(row.updated_at, granularity)].update(counts)
+                await _upsert(session, (_row(*key, counts) for key, counts in buckets.items()))
+                await session.commit()
+            last_id = rows[-1].id
+            read += len(rows)
+            if len(rows) < chunk_size:
+                break
+    logger.info("Backfilled task rollups before %s from %s tasks", boundary.date(), read)
+    return read
+
+
+async def _main(argv: Optional[list[str]] = None) -> None:
+    from app.database import close_db, get_sessionmaker
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.analytics")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="cutoff date (default: today)")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+    try:
+        read = await backfill(lambda: get_sessionmaker()(), args.until, args.chunk_size)
+        print(f"Backfilled rollups from {read} tasks")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,116 @@
+"""Archival of old completed tasks into ``tasks_archive``.
+
+Completed tasks not updated for ARCHIVE_AFTER_DAYS are moved out of
+``tasks``, which keeps the hot table and its indexes sized to live work. The
+job moves rows in batches of ARCHIVE_BATCH_SIZE. Each batch is one
+transaction that selects ids (``FOR UPDATE SKIP LOCKED``, so it never waits
+on a request), copies them with INSERT ... SELECT, then deletes them. The job
+sleeps ARCHIVE_BATCH_PAUSE_MS between batches to limit its I/O and
+replication impact.
+
+Moved tasks are subtracted from the owners' ``user_task_stats`` counters
+in the same transaction. Archived tasks are read-only; ``task_service.get_tasks`` returns them only
+when asked to (``include_archived``), while ``get_task_by_id`` and
+``delete_task`` fall back to ``tasks_archive``. The job only runs when
+ARCHIVE_AFTER_DAYS is set.
+"""
+
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import and_, delete, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.models import Task, TaskArchive
+from app.services import task_stats
+from app.utils.background import PeriodicTask
+from app.utils.coalesce import invalidate
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("id", "title", "completed", "priority", "created_at", "updated_at", "owner_id", "version")
+
+
+async def archive_batch(session: AsyncSession, cutoff: datetime, batch_size: int) -> tuple[int, set[int]]:
+    """Move up to ``batch_size`` eligible tasks; the caller commits.
+
+    Returns:
+        (tasks moved, their owners)
+    """
+    rows = (
+        await session.execute(
+            select(Task.id, Task.owner_id, Task.priority)
+            .where(Task.completed == True, Task.updated_at < cutoff)  # noqa: E712
+            .order_by(Task.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    ).all()
+    if not rows:
+        return 0, set()
+    ids = [row.id for row in rows]
+    owners = {row.owner_id for row in rows}
+    # The owner predicate lets Postgres prune to those owners' hash partitions
+    selected = and_(Task.id.in_(ids), Task.owner_id.in_(owners))
+    now = datetime.now(timezone.utc)
+    source = select(*(getattr(Task, column) for column in _COLUMNS), literal(now, TaskArchive.archived_at.type))
+    await session.execute(insert(TaskArchive).from_select([*_COLUMNS, "archived_at"], source.where(selected)))
+    await session.execute(delete(Task).where(selected))
+    removed: dict[int, Counter] = defaultdict(Counter)
+    for row in rows:
+        removed[row.owner_id].update(task_stats.delta((True, row.priority), None))
+    for owner_id, change in removed.items():
+        await task_stats.apply_delta(session, owner_id, change)
+    return len(ids), owners
+
+
+async def run_archival(
+    session_factory: Callable[[], AsyncSession],
+    after_days: float,
+    batch_size: int = 1000,
+    pause: float = 0.2,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Archive everything eligible, batch by batch; returns tasks moved."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=after_days)
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        async with session_factory() as session:
+            count, owners = await archive_batch(session, cutoff, batch_size)
+            await session.commit()
+        if not count:
+            break
+        for owner_id in owners:
+            invalidate(owner_id)
+        moved += count
+        batches += 1
+        if count < batch_size:
+            break
+        await asyncio.sleep(pause)
+    if moved:
+        logger.info("Archived %s completed tasks in %s batches", moved, batches)
+    return moved
+
+
+@lru_cache
+def get_archive_job() -> PeriodicTask:
+    """Periodic archival run (started/stopped in main.lifespan when enabled)."""
+    settings = get_settings()
+    return PeriodicTask(
+        "task-archival",
+        lambda: run_archival(
+            lambda: get_sessionmaker()(),
+            settings.ARCHIVE_AFTER_DAYS,
+            settings.ARCHIVE_BATCH_SIZE,
+            settings.ARCHIVE_BATCH_PAUSE_MS / 1000,
+        ),
+        settings.ARCHIVE_INTERVAL,
+        run_immediately=False,
+    )
@@ -0,0 +1,191 @@
+"""Idempotency-Key handling for retried writes.
+
+The first request with a given key inserts a row with
+``INSERT ... ON CONFLICT DO NOTHING``, in the same transaction as the write
+it guards. It then stores the response status, body, body hash and the
+headers listed in STORED_HEADERS (the new task's ``ETag``) before commit. On Postgres, a concurrent duplicate's insert blocks on the
+primary-key index until that transaction ends. The duplicate then reads the
+finished row (``SELECT ... FOR UPDATE``) and replays the stored response, so
+exactly one request executes. If the write fails, its transaction rolls back
+and takes the key row with it, so a retry executes again.
+
+Keys are scoped per user and expire after IDEMPOTENCY_TTL_HOURS; a periodic
+job deletes expired rows.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Awaitable, Callable, Mapping
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.exceptions import IdempotencyKeyInProgressError, IdempotencyKeyReusedError
+from app.models import IdempotencyKey
+from app.utils.background import PeriodicTask
+from app.utils.datetime_utils import ensure_aware_utc
+
+logger = logging.getLogger(__name__)
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Response headers stored with the body and replayed with it
+STORED_HEADERS = ("ETag", "Location")
+_table = IdempotencyKey.__table__
+
+
+async def request_fingerprint(request: Request) -> str:
+    """Hash of method, path and body; a reused key must match it."""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url.path}\n".encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=get_settings().IDEMPOTENCY_TTL_HOURS)
+
+
+async def claim(session: AsyncSession, user_id: int, key: str, fingerprint: str) -> Optional[Response]:
+    """Claim ``key`` for this request, or return the stored response to replay.
+
+    Returns:
+        ``None`` if this request owns the key and should execute; otherwise
+        the original response.
+
+    Raises:
+        IdempotencyKeyReusedError: The key was used for a different request.
+        IdempotencyKeyInProgressError: The original request hasn't completed.
+    """
+    insert = pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+    inserted = await session.execute(
+        insert(_table)
+        .values(user_id=user_id, key=key, request_hash=fingerprint, created_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(index_elements=["user_id", "key"])
+    )
+    if inserted.rowcount == 1:
+        return None
+
+    row = (
+        await session.execute(
+            select(_table).where(_table.c.user_id == user_id, _table.c.key == key).with_for_update()
+        )
+    ).one()
+    if ensure_aware_utc(row.created_at) < datetime.now(timezone.utc) - _ttl():
+        # Expired but not yet cleaned up: take it over as a fresh key.
+        await session.execute(
+            update(_table)
+            .where(_table.c.user_id == user_id, _table.c.key == key)
+            .values(
+                request_hash=fingerprint,
+                status_code=None,
+                response_body=None,
+                response_headers=None,
+                response_hash=None,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+        return None
+    if row.request_hash != fingerprint:
+        raise IdempotencyKeyReusedError(key)
+    if row.status_code is None:
+        raise IdempotencyKeyInProgressError(key)
+    headers = {**json.loads(row.response_headers or "{}"), REPLAYED_HEADER: "true"}
+    if row.response_body is None:
+        return Response(status_code=row.status_code, headers=headers)  # e.g. 204 from DELETE
+    return JSONResponse(content=json.loads(row.response_body), status_code=row.status_code, headers=headers)
+
+
+async def store(
+    session: AsyncSession,
+    user_id: int,
+    key: str,
+    status_code: int,
+    body: Any,
+    headers: Optional[Mapping[str, str]] = None,
+) -> None:
+    """Record the response for ``key`` (same transaction as the write).
+
+    ``body`` is ``None`` for a response without one (e.g. 204).
+    """
+    payload = None if body is None else json.dumps(body, separators=(",", ":"), sort_keys=True)
+    await session.execute(
+        update(_table)
+        .where(_table.c.user_id == user_id, _table.c.key == key)
+        .values(
+            status_code=status_code,
+            response_body=payload,
+            response_headers=json.dumps(dict(headers)) if headers else None,
+            response_hash=None if payload is None else hashlib.sha256(payload.encode()).hexdigest(),
+        )
+    )
+
+
+async def run_idempotent(
+    session: AsyncSession,
+    request: Request,
+    user_id: int,
+    key: Optional[str],
+    operation: Callable[[], Awaitable[Any]],
+    response_model: Optional[type[BaseModel]],
+    status_code: int = 200,
+    response: Optional[Response] = None,
+) -> Any:
+    """Execute ``operation`` at most once per ``key``.
+
+    Without a key this just awaits ``operation``. Errors are not stored: the
+    request's rollback discards the claimed key too, so a retry executes
+    again. STORED_HEADERS that ``operation`` set on ``response`` are replayed
+    too. ``response_model=None`` is for endpoints without a body (204).
+    """
+    if key is None:
+        return await operation()
+    try:
+        replay = await claim(session, user_id, key, await request_fingerprint(request))
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=422, detail=e.message)
+    except IdempotencyKeyInProgressError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+    if replay is not None:
+        return replay
+
+    result = await operation()
+    body = None if response_model is None else jsonable_encoder(response_model.model_validate(result))
+    headers = {}
+    if response is not None:
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+    await store(session, user_id, key, status_code, body, headers)
+    return body
+
+
+async def purge_expired() -> int:
+    """Delete keys older than IDEMPOTENCY_TTL_HOURS; returns rows removed."""
+    cutoff = datetime.now(timezone.utc) - _ttl()
+    async with get_sessionmaker()() as session:
+        result = await session.execute(delete(_table).where(_table.c.created_at < cutoff))
+        await session.commit()
+    if result.rowcount:
+        logger.info("Purged %s expired idempotency keys", result.rowcount)
+    return result.rowcount
+
+
+@lru_cache
+def get_cleanup_job() -> PeriodicTask:
+    """Periodic purge of expired keys (started/stopped in main.lifespan)."""
+    return PeriodicTask(
+        "idempotency-key-cleanup",
+        purge_expired,
+        get_settings().IDEMPOTENCY_CLEANUP_INTERVAL,
+        run_immediately=False,
+    )
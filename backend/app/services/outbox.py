@@ -0,0 +1,284 @@
+"""Transactional outbox for task side effects.
+
+``task_service`` adds an ``OutboxEvent`` in the same transaction as each
+task write, so a side effect is recorded if and only if the write commits.
+The ``OutboxDispatcher`` (started in main.lifespan) drains the table in the
+background and hands each event to the registered handlers; request latency
+never waits on them.
+
+Each batch is claimed in a short transaction: due events are selected with
+``FOR UPDATE SKIP LOCKED`` (so workers never contend for the same rows) and
+their ``available_at`` is pushed out by OUTBOX_LEASE_SECONDS. Handlers then
+run outside any transaction. Handled events are deleted; failed ones are
+retried with exponential backoff until OUTBOX_MAX_ATTEMPTS, then kept as
+dead letters. A worker that dies mid-batch just lets the lease expire, so
+delivery is at-least-once: handlers must tolerate duplicates (dedupe on
+``OutboxMessage.id``).
+"""
+
+import asyncio
+import json
+import logging
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_table = OutboxEvent.__table__
+_PENDING_KEY = "outbox.pending"
+
+
+@dataclass(frozen=True)
+class OutboxMessage:
+    """An outbox event as handed to handlers."""
+
+    id: int
+    topic: str
+    user_id: int
+    payload: dict
+    attempt: int  # 1 on first delivery
+    created_at: datetime
+
+
+Handler = Callable[[OutboxMessage], Awaitable[None]]
+
+
+def enqueue(session: AsyncSession, topic: str, user_id: int, payload: dict) -> None:
+    """Add an event to the outbox; it is written by this session's commit."""
+    session.add(OutboxEvent(topic=topic, user_id=user_id, payload=json.dumps(payload, separators=(",", ":"))))
+    session.info[_PENDING_KEY] = True
+
+
+class OutboxDispatcher:
+    """Background loop that claims due outbox events and runs the handlers."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        *,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        lease_seconds: float = 60.0,
+        handler_timeout: float = 30.0,
+        max_attempts: int = 10,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.handler_timeout = handler_timeout
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._handlers: list[tuple[str, Handler]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.dispatched = 0
+        self.retried = 0
+        self.dead = 0
+
+    # -------------------------------------------------
+    # Handlers
+    # -------------------------------------------------
+    def register(self, handler: Handler, topic_prefix: str = "") -> Handler:
+        """Run ``handler`` for every event whose topic starts with ``topic_prefix`` (idempotent)."""
+        if (topic_prefix, handler) not in self._handlers:
+            self._handlers.append((topic_prefix, handler))
+        return handler
+
+    def unregister(self, handler: Handler) -> None:
+        self._handlers = [(prefix, h) for prefix, h in self._handlers if h != handler]
+
+    # -------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Schedule the dispatch loop on the running event loop (idempotent)."""
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="outbox-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._wakeup = None
+
+    def wake(self) -> None:
+        """Skip the rest of the poll interval (called after an outbox commit)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    # -------------------------------------------------
+    # Dispatch
+    # -------------------------------------------------
+    async def dispatch_once(self) -> int:
+        """Claim, handle and settle one batch; returns the number claimed."""
+        messages = await self._claim()
+        if messages:
+            errors = await asyncio.gather(*(self._deliver(message) for message in messages))
+            await self._settle(messages, errors)
+        return len(messages)
+
+    async def _claim(self) -> list[OutboxMessage]:
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as session:
+            async with session.begin():
+                rows = (
+                    await session.execute(
+                        select(_table)
+                        .where(_table.c.dead_at.is_(None), _table.c.available_at <= now)
+                        .order_by(_table.c.id)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if rows:
+                    await session.execute(
+                        update(_table)
+                        .where(_table.c.id.in_([row.id for row in rows]))
+                        .values(
+                            available_at=now + timedelta(seconds=self.lease_seconds),
+                            attempts=_table.c.attempts + 1,
+                        )
+                    )
+        return [
+            OutboxMessage(
+                id=row.id,
+                topic=row.topic,
+                user_id=row.user_id,
+                payload=json.loads(row.payload),
+                attempt=row.attempts + 1,
+                created_at=row.created_at,
+            )
+            for row in rows
+        ]
+
+    async def _deliver(self, message: OutboxMessage) -> Optional[str]:
+        """Run the matching handlers; returns an error description on failure."""
+        try:
+            for prefix, handler in self._handlers:
+                if message.topic.startswith(prefix):
+                    await asyncio.wait_for(handler(message), self.handler_timeout)
+        except Exception as e:
+            logger.warning(
+                "Outbox event %s (%s) failed on attempt %s: %r", message.id, message.topic, message.attempt, e
+            )
+            return repr(e)[:500]
+        return None
+
+    async def _settle(self, messages: list[OutboxMessage], errors: list[Optional[str]]) -> None:
+        now = datetime.now(timezone.utc)
+        done = [message.id for message, error in zip(messages, errors) if error is None]
+        async with self.session_factory() as session:
+            async with session.begin():
+                if done:
+                    await session.execute(delete(_table).where(_table.c.id.in_(done)))
+                for message, error in zip(messages, errors):
+                    if error is None:
+                        continue
+                    if message.attempt >= self.max_attempts:
+                        values = {"dead_at": now, "last_error": error}
+                        self.dead += 1
+                        logger.error(
+                            "Outbox event %s (%s) is dead after %s attempts", message.id, message.topic, message.attempt
+                        )
+                    else:
+                        values = {"available_at": now + self.backoff(message.attempt), "last_error": error}
+                        self.retried += 1
+                    await session.execute(update(_table).where(_table.c.id == message.id).values(**values))
+        self.dispatched += len(done)
+
+    def backoff(self, attempt: int) -> timedelta:
+        """Exponential backoff with jitter before retry number ``attempt + 1``."""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempt - 1))
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    async def snapshot(self) -> dict:
+        """Backlog and counters (backlog is database-wide, counters per worker)."""
+        async with self.session_factory() as session:
+            pending, dead, oldest = (
+                await session.execute(
+                    select(
+                        func.count().filter(_table.c.dead_at.is_(None)),
+                        func.count().filter(_table.c.dead_at.is_not(None)),
+                        func.min(_table.c.created_at).filter(_table.c.dead_at.is_(None)),
+                    )
+                )
+            ).one()
+        return {
+            "running": self.running,
+            "handlers": len(self._handlers),
+            "pending": pending,
+            "dead": dead,
+            "oldest_pending_at": oldest.isoformat() if oldest else None,
+            "dispatched": self.dispatched,
+            "retried": self.retried,
+            "dead_lettered": self.dead,
+        }
+
+
+@lru_cache
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    """Return the worker's dispatcher (started/stopped in main.lifespan)."""
+    settings = get_settings()
+    return OutboxDispatcher(
+        lambda: get_sessionmaker()(),
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL,
+        lease_seconds=settings.OUTBOX_LEASE_SECONDS,
+        handler_timeout=settings.OUTBOX_HANDLER_TIMEOUT,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        retry_base_seconds=settings.OUTBOX_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.OUTBOX_RETRY_MAX_SECONDS,
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session: Session) -> None:
+    if session.info.pop(_PENDING_KEY, False):
+        get_outbox_dispatcher().wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
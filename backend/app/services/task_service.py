@@ -1,42 +1,86 @@
-"""Task service layer for business logic for the simplified Task model."""
+"""Task service layer for business logic for the simplified Task model.
 
+Each write also applies its change to the user's counters in
+``user_task_stats`` (see ``task_stats``), and creations and completions
+to the ``task_rollups`` time buckets (see ``analytics``), in the same
+transaction.
+
+Every statement on ``tasks`` filters on ``owner_id``. When ``tasks`` is hash
+partitioned by owner (migration 10), that predicate lets Postgres prune each
+query to a single partition, so keep it in any query added here.
+"""
+
+import heapq
 import logging
 from datetime import datetime, timezone
-from typing import Optional
+from collections.abc import Collection
+from typing import NoReturn, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import and_, delete, select, update
 
-from app.models import Task
+from app import audit, change_feed
+from app.models import Task, TaskArchive
+from app.services import analytics, outbox, task_stats
 from app.schemas import TaskCreate, TaskUpdate
-from app.exceptions import TaskNotFoundError
+from app.exceptions import TaskArchivedError, TaskCompletedError, TaskNotFoundError, TaskVersionConflictError
+from app.tracing import traced
+from app.utils.coalesce import coalesce, invalidate_on_commit
+from app.utils.datetime_utils import ensure_aware_utc
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# A version, or any of several (an If-Match list of ETags)
+ExpectedVersion = int | Collection[int]
+
 
+@traced()
 async def create_task(session: AsyncSession, task_data: TaskCreate, user_id: int) -> Task:
     """Create a new task for a specific user."""
     task = Task(
         owner_id=user_id,
         title=task_data.title.strip(),
         completed=False,
+        priority=task_data.priority,
         created_at=datetime.now(timezone.utc),
         updated_at=datetime.now(timezone.utc)
     )
     session.add(task)
+    # No refresh: every column is set client-side, and a refresh would look the
+    # row up by id alone, without the owner predicate
     await session.flush()
-    await session.refresh(task)
-    logger.info(f"Created task {task.id} for user {user_id}")
+    await task_stats.apply_delta(session, user_id, task_stats.delta(None, (task.completed, task.priority)))
+    await analytics.record_created(session, user_id, task.created_at)
+    invalidate_on_commit(session, user_id)
+    _emit(session, "task.created", user_id, task.id, task)
+    logger.info("Created task %s for user %s", task.id, user_id)
     return task
 
 
+def _emit(
+    session: AsyncSession, change_type: str, user_id: int, task_id: int, task: Optional[Task] = None
+) -> None:
+    """Publish a task change to the live feed, outbox and audit log, all on commit."""
+    change = change_feed.record(session, change_type, user_id, task_id, task)
+    outbox.enqueue(session, change_type, user_id, change)
+    audit.record(session, change)
+
+
+@traced()
+@coalesce()
 async def get_tasks(
     session: AsyncSession,
     user_id: int,
-    status: Optional[str] = None
-) -> list[Task]:
-    """Get all tasks for a specific user with optional status filtering."""
+    status: Optional[str] = None,
+    include_archived: bool = False,
+    limit: Optional[int] = None,
+) -> list[Task | TaskArchive]:
+    """Get all tasks for a specific user with optional status filtering.
+
+    Archived (old completed) tasks are only read with ``include_archived``;
+    they are merged in by creation time and have ``archived`` set.
+    ``limit`` keeps only the newest tasks.
+    """
     query = select(Task).where(Task.owner_id == user_id)
 
     if status == "completed":
@@ -45,51 +89,235 @@ async def get_tasks(
         query = query.where(Task.completed == False)
 
     query = query.order_by(Task.created_at.desc())
+    if limit is not None:
+        query = query.limit(limit)
     result = await session.execute(query)
-    tasks = result.scalars().all()
-    return list(tasks)
+    tasks = list(result.scalars().all())
+
+    if include_archived and status != "pending":
+        archived_query = (
+            select(TaskArchive).where(TaskArchive.owner_id == user_id).order_by(TaskArchive.created_at.desc())
+        )
+        if limit is not None:
+            archived_query = archived_query.limit(limit)
+        archived = await session.execute(archived_query)
+        by_created = lambda t: ensure_aware_utc(t.created_at)  # noqa: E731
+        tasks = list(heapq.merge(tasks, archived.scalars().all(), key=by_created, reverse=True))[:limit]
+    return tasks
+
 
+@traced()
+@coalesce()
+async def get_task_by_id(session: AsyncSession, task_id: int, user_id: int) -> Task | TaskArchive:
+    """Get a single task by ID, ensuring ownership.
 
-async def get_task_by_id(session: AsyncSession, task_id: int, user_id: int) -> Task:
-    """Get a single task by ID, ensuring ownership."""
+    Falls back to ``tasks_archive``, so an archived task (``archived`` set)
+    stays reachable by id.
+    """
     query = select(Task).where(and_(Task.id == task_id, Task.owner_id == user_id))
     result = await session.execute(query)
     task = result.scalar_one_or_none()
+    if task is None:
+        archived_query = select(TaskArchive).where(TaskArchive.id == task_id, TaskArchive.owner_id == user_id)
+        task = (await session.execute(archived_query)).scalar_one_or_none()
 
     if not task:
         raise TaskNotFoundError(task_id)
     return task
 
 
-async def update_task(session: AsyncSession, task_id: int, task_data: TaskUpdate, user_id: int) -> Task:
-    """Update an existing task, ensuring ownership."""
-    task = await get_task_by_id(session, task_id, user_id)
+@traced()
+async def update_task(
+    session: AsyncSession,
+    task_id: int,
+    task_data: TaskUpdate,
+    user_id: int,
+    *,
+    expected_version: Optional[ExpectedVersion] = None,
+    require_incomplete: bool = False,
+) -> Task:
+    """Update an existing task, ensuring ownership.
 
-    update_data = task_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(task, field, value)
+    Applied as one conditional ``UPDATE ... RETURNING``: the version/completed
+    checks are atomic with the write, and no lock is taken beyond the
+    UPDATE's own (see ``_conditional_update`` for counted fields).
 
-    task.updated_at = datetime.now(timezone.utc)
-    await session.flush()
-    await session.refresh(task)
-    logger.info(f"Updated task {task_id} for user {user_id}")
+    Args:
+        expected_version: Only update if the task is still at this version
+                          (or at one of these versions).
+        require_incomplete: Refuse to edit a completed task.
+
+    Raises:
+        TaskNotFoundError: No such task for this user.
+        TaskVersionConflictError: The task's version isn't ``expected_version``.
+        TaskCompletedError: ``require_incomplete`` and the task is completed.
+        TaskArchivedError: The task is archived (read-only).
+    """
+    values = task_data.model_dump(exclude_unset=True)
+    task = await _conditional_update(
+        session, task_id, user_id, values, expected_version=expected_version, require_incomplete=require_incomplete
+    )
+    invalidate_on_commit(session, user_id)
+    _emit(session, "task.updated", user_id, task_id, task)
+    logger.info("Updated task %s for user %s", task_id, user_id)
     return task
 
 
-async def delete_task(session: AsyncSession, task_id: int, user_id: int) -> None:
-    """Delete a task, ensuring ownership."""
-    task = await get_task_by_id(session, task_id, user_id)
-    await session.delete(task)
-    await session.flush()
-    logger.info(f"Deleted task {task_id} for user {user_id}")
+@traced()
+async def delete_task(
+    session: AsyncSession, task_id: int, user_id: int, *, expected_version: Optional[ExpectedVersion] = None
+) -> None:
+    """Delete a task, ensuring ownership (and its version, if given).
+
+    A task not in ``tasks`` is looked for in ``tasks_archive``. Archived
+    tasks were already taken out of the counters when they were archived.
+    """
+    stmt = (
+        delete(Task)
+        .where(Task.id == task_id, Task.owner_id == user_id)
+        .returning(Task.completed, Task.priority)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(_version_is(expected_version))
+    deleted = (await session.execute(stmt.execution_options(synchronize_session=False))).first()
+    if deleted is not None:
+        await task_stats.apply_delta(session, user_id, task_stats.delta(tuple(deleted), None))
+    elif not await _delete_archived(session, task_id, user_id, expected_version):
+        await _raise_write_failure(session, task_id, user_id, expected_version)
+    invalidate_on_commit(session, user_id)
+    _emit(session, "task.deleted", user_id, task_id)
+    logger.info("Deleted task %s for user %s", task_id, user_id)
+
+
+async def _delete_archived(
+    session: AsyncSession, task_id: int, user_id: int, expected_version: Optional[ExpectedVersion]
+) -> bool:
+    """Delete the task from ``tasks_archive``; False if no row matched."""
+    stmt = (
+        delete(TaskArchive)
+        .where(TaskArchive.id == task_id, TaskArchive.owner_id == user_id)
+        .returning(TaskArchive.id)
+    )
+    if expected_version is not None:
+        stmt = stmt.where(_version_is(expected_version, TaskArchive))
+    return (await session.execute(stmt.execution_options(synchronize_session=False))).first() is not None
 
 
-async def update_task_status(session: AsyncSession, task_id: int, completed: bool, user_id: int) -> Task:
+@traced()
+async def update_task_status(
+    session: AsyncSession,
+    task_id: int,
+    completed: bool,
+    user_id: int,
+    *,
+    expected_version: Optional[ExpectedVersion] = None,
+) -> Task:
     """Update only the completion status of a task, ensuring ownership."""
-    task = await get_task_by_id(session, task_id, user_id)
-    task.completed = completed
-    task.updated_at = datetime.now(timezone.utc)
-    await session.flush()
-    await session.refresh(task)
-    logger.info(f"Updated task {task_id} status to completed={completed} for user {user_id}")
+    task = await _conditional_update(
+        session, task_id, user_id, {"completed": completed}, expected_version=expected_version
+    )
+    invalidate_on_commit(session, user_id)
+    _emit(session, "task.updated", user_id, task_id, task)
+    logger.info("Updated task %s status to completed=%s for user %s", task_id, completed, user_id)
+    return task
+
+
+async def _conditional_update(
+    session: AsyncSession,
+    task_id: int,
+    user_id: int,
+    values: dict,
+    *,
+    expected_version: Optional[ExpectedVersion] = None,
+    require_incomplete: bool = False,
+) -> Task:
+    """``UPDATE tasks ... WHERE id/owner [/version/not completed] RETURNING *``.
+
+    When ``values`` touch a counted field, the counter delta needs the old
+    values. On Postgres the same statement returns them: the update joins
+    ``(SELECT completed, priority ... FOR UPDATE) AS old`` and returns
+    ``old.*`` next to the new row. That lock is the one the UPDATE takes
+    anyway, and it makes ``old`` the row actually updated even under
+    concurrent writers. SQLite has no such form, but it allows one writer at
+    a time, so a read earlier in the same transaction gives the old values.
+    """
+    counted = bool(values.keys() & task_stats.COUNTED_FIELDS)
+    on_postgres = session.bind.dialect.name == "postgresql"
+    before = None
+    if counted and not on_postgres:
+        before = (
+            await session.execute(
+                select(Task.completed, Task.priority).where(Task.id == task_id, Task.owner_id == user_id)
+            )
+        ).first()
+    stmt = (
+        update(Task)
+        .where(Task.id == task_id, Task.owner_id == user_id)
+        .values(**values, version=Task.version + 1, updated_at=datetime.now(timezone.utc))
+    )
+    returning = [Task]
+    if counted and on_postgres:
+        old = (
+            select(Task.id, Task.completed, Task.priority)
+            .where(Task.id == task_id, Task.owner_id == user_id)
+            .with_for_update()
+            .subquery("old")
+        )
+        stmt = stmt.where(Task.id == old.c.id)
+        returning += [old.c.completed, old.c.priority]
+    if expected_version is not None:
+        stmt = stmt.where(_version_is(expected_version))
+    if require_incomplete:
+        stmt = stmt.where(Task.completed == False)  # noqa: E712
+    stmt = stmt.returning(*returning).execution_options(synchronize_session=False, populate_existing=True)
+    row = (await session.execute(stmt)).first()
+    if row is None:
+        await _raise_write_failure(session, task_id, user_id, expected_version, require_incomplete)
+    task = row[0]
+    if counted:
+        if on_postgres:
+            before = row[1:]
+        await task_stats.apply_delta(
+            session, user_id, task_stats.delta(tuple(before), (task.completed, task.priority))
+        )
+        if task.completed and not before[0]:
+            await analytics.record_completed(session, user_id, task.created_at, task.updated_at)
     return task
+
+
+def _version_is(expected: ExpectedVersion, model: type[Task] | type[TaskArchive] = Task):
+    if isinstance(expected, int):
+        return model.version == expected
+    return model.version.in_(sorted(expected))
+
+
+async def _raise_write_failure(
+    session: AsyncSession,
+    task_id: int,
+    user_id: int,
+    expected_version: Optional[ExpectedVersion],
+    require_incomplete: bool = False,
+) -> NoReturn:
+    """Explain why a conditional write matched no row (failure path only)."""
+    current = (
+        await session.execute(
+            select(Task.version, Task.completed).where(Task.id == task_id, Task.owner_id == user_id)
+        )
+    ).first()
+    archived = current is None
+    if archived:
+        current = (
+            await session.execute(
+                select(TaskArchive.version).where(TaskArchive.id == task_id, TaskArchive.owner_id == user_id)
+            )
+        ).first()
+    if current is None:
+        raise TaskNotFoundError(task_id)
+    expected = {expected_version} if isinstance(expected_version, int) else expected_version
+    if expected is not None and current.version not in expected:
+        raise TaskVersionConflictError(task_id, current.version)
+    if archived:
+        raise TaskArchivedError(task_id)
+    if require_incomplete and current.completed:
+        raise TaskCompletedError(task_id)
+    raise TaskVersionConflictError(task_id, current.version)  # changed between the two statements
@@ -0,0 +1,180 @@
+"""Per-user task counters behind ``GET /api/tasks/stats``.
+
+``user_task_stats`` holds one row of counters per user: total, completed and
+one per priority. Every write in ``task_service`` works out how it changes
+those counters and applies the change in the same transaction, as a single
+upsert (``total = total + :delta``); nothing is recounted. Reading a user's
+stats is then one primary-key lookup, whatever the number of tasks.
+
+The counters cover live tasks; the archive job subtracts what it moves out.
+``repair`` recounts from ``tasks`` one batch of users at a time and
+corrects any drift (say, from rows changed by hand). ``get_repair_job()``
+runs it every TASK_STATS_REPAIR_INTERVAL seconds.
+"""
+
+import logging
+from collections.abc import Callable, Mapping
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.models import Task, User, UserTaskStats
+from app.utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+_table = UserTaskStats.__table__
+PRIORITIES = ("low", "medium", "high")
+COUNTERS = ("total", "completed", *(f"{priority}_priority" for priority in PRIORITIES))
+# Task fields whose change moves the counters
+COUNTED_FIELDS = frozenset({"completed", "priority"})
+
+
+def delta(before: Optional[tuple[bool, str]], after: Optional[tuple[bool, str]]) -> dict[str, int]:
+    """Counter changes for one task going from ``before`` to ``after``.
+
+    Each side is ``(completed, priority)``, or None when the task doesn't
+    exist (before a create, after a delete).
+    """
+    change = dict.fromkeys(COUNTERS, 0)
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        completed, priority = state
+        change["total"] += sign
+        change["completed"] += sign if completed else 0
+        if priority in PRIORITIES:
+            change[f"{priority}_priority"] += sign
+    return {name: value for name, value in change.items() if value}
+
+
+def _insert(session: AsyncSession):
+    return pg_insert if session.bind.dialect.name == "postgresql" else sqlite_insert
+
+
+async def apply_delta(session: AsyncSession, user_id: int, change: Mapping[str, int]) -> None:
+    """Add ``change`` to the user's counters in one upsert (no-op if empty)."""
+    change = {name: value for name, value in change.items() if value}
+    if not change:
+        return
+    stmt = _insert(session)(_table).values(
+        user_id=user_id, updated_at=datetime.now(timezone.utc), **{name: change.get(name, 0) for name in COUNTERS}
+    )
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={**{name: _table.c[name] + stmt.excluded[name] for name in change}, "updated_at": stmt.excluded.updated_at},
+        )
+    )
+
+
+async def get_stats(session: AsyncSession, user_id: int) -> dict:
+    """The user's counters (all zero for a user without tasks)."""
+    row = (await session.execute(select(_table).where(_table.c.user_id == user_id))).first()
+    counts = {name: getattr(row, name) if row is not None else 0 for name in COUNTERS}
+    return {
+        "total": counts["total"],
+        "completed": counts["completed"],
+        "pending": counts["total"] - counts["completed"],
+        "by_priority": {priority: counts[f"{priority}_priority"] for priority in PRIORITIES},
+    }
+
+
+# -------------------------------------------------
+# Repair
+# -------------------------------------------------
+def recount_query(user_ids: Optional[list[int]] = None):
+    """``SELECT owner_id, <COUNTERS...> FROM tasks GROUP BY owner_id``."""
+    stmt = select(
+        Task.owner_id,
+        func.count().label("total"),
+        func.sum(case((Task.completed == True, 1), else_=0)).label("completed"),  # noqa: E712
+        *(
+            func.sum(case((Task.priority == priority, 1), else_=0)).label(f"{priority}_priority")
+            for priority in PRIORITIES
+        ),
+    ).group_by(Task.owner_id)
+    if user_ids is not None:
+        stmt = stmt.where(Task.owner_id.in_(user_ids))
+    return stmt
+
+
+async def repair_batch(session: AsyncSession, user_ids: list[int]) -> int:
+    """Recount ``user_ids`` and overwrite any counters that drifted; the caller commits.
+
+    The users' counter rows are locked before counting. A concurrent write
+    for one of them then waits to apply its delta, so its task change is
+    either already committed and counted here, or added on top afterwards.
+
+    Returns:
+        Users whose counters were corrected.
+    """
+    current = {
+        row.user_id: tuple(getattr(row, name) for name in COUNTERS)
+        for row in await session.execute(select(_table).where(_table.c.user_id.in_(user_ids)).with_for_update())
+    }
+    counted = {
+        row.owner_id: tuple(getattr(row, name) for name in COUNTERS)
+        for row in await session.execute(recount_query(user_ids))
+    }
+    zeros = (0,) * len(COUNTERS)
+    fixed = 0
+    for user_id in user_ids:
+        expected = counted.get(user_id, zeros)
+        if current.get(user_id, zeros) == expected:
+            continue
+        stmt = _insert(session)(_table).values(
+            user_id=user_id, updated_at=datetime.now(timezone.utc), **dict(zip(COUNTERS, expected))
+        )
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={name: stmt.excluded[name] for name in (*COUNTERS, "updated_at")},
+            )
+        )
+        fixed += 1
+    return fixed
+
+
+async def repair(session_factory: Callable[[], AsyncSession], batch_size: int = 1000) -> int:
+    """Recount every user's counters, one committed batch at a time; returns users fixed."""
+    fixed = 0
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            user_ids = list(
+                (
+                    await session.execute(
+                        select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+                    )
+                ).scalars()
+            )
+            if not user_ids:
+                break
+            fixed += await repair_batch(session, user_ids)
+            await session.commit()
+        last_id = user_ids[-1]
+        if len(user_ids) < batch_size:
+            break
+    if fixed:
+        logger.warning("Repaired drifted task counters for %s users", fixed)
+    return fixed
+
+
+@lru_cache
+def get_repair_job() -> PeriodicTask:
+    """Periodic counter repair (started/stopped in main.lifespan when enabled)."""
+    settings = get_settings()
+    return PeriodicTask(
+        "task-stats-repair",
+        lambda: repair(lambda: get_sessionmaker()(), settings.TASK_STATS_REPAIR_BATCH_SIZE),
+        settings.TASK_STATS_REPAIR_INTERVAL,
+        run_immediately=False,
+    )
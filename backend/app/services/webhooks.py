@@ -0,0 +1,474 @@
+"""Outgoing webhooks for task changes.
+
+Subscriptions are managed through /api/webhooks. Delivery is an outbox
+handler (see app.services.outbox), so it never runs on the request path and
+a failed delivery is retried with the outbox's backoff. Delivery is
+at-least-once: receivers should dedupe on each event's ``id``.
+
+Every worker shares one pooled ``httpx.AsyncClient``. Events bound for the
+same endpoint within WEBHOOK_BATCH_WINDOW_MS are coalesced into one POST::
+
+    {"events": [{"id": 17, "type": "task.updated", "task_id": 3, ...}, ...]}
+
+Each POST is signed: ``X-Webhook-Signature: sha256=<hex>`` is the
+HMAC-SHA256 of ``"<X-Webhook-Timestamp>.<body>"`` keyed with the
+subscription's secret. Each endpoint has a concurrency limit and a circuit
+breaker. After WEBHOOK_BREAKER_THRESHOLD consecutive failures the endpoint
+fails fast for WEBHOOK_BREAKER_COOLDOWN seconds, then one trial request is
+let through.
+
+Webhook URLs are user input, so the server must not become a proxy into its
+own network. A URL's host must resolve only to public addresses: loopback,
+private, link-local (cloud metadata), shared and reserved ranges are
+refused. It is checked when the webhook is created, and again for every
+connection the deliverer opens, since DNS can change after registration.
+That second check lives in the connection pool (``PublicAddressBackend``):
+it resolves the host once, off the event loop, and connects to the vetted
+address itself, so DNS can't change between the check and the connect. TLS
+SNI and the Host header keep the original hostname, and keep-alive
+connections are not re-resolved. WEBHOOK_ALLOW_PRIVATE_DESTINATIONS turns
+both checks off (local development against a receiver on localhost).
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import secrets
+import socket
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import httpcore
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.exceptions import WebhookCircuitOpenError, WebhookDeliveryError, WebhookNotFoundError
+from app.models import WebhookSubscription
+from app.schemas import WebhookCreate
+from app.services.outbox import OutboxMessage
+from app.utils.coalesce import coalesce
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+# Subscription changes on another worker are picked up within this long
+SUBSCRIPTION_CACHE_SECONDS = 5.0
+
+
+# -------------------------------------------------
+# Subscriptions
+# -------------------------------------------------
+async def create_webhook(session: AsyncSession, user_id: int, data: WebhookCreate) -> WebhookSubscription:
+    """Subscribe ``data.url`` to the user's task events with a fresh secret.
+
+    Raises:
+        ValueError: The URL isn't https, or its host doesn't resolve to
+                    public addresses only.
+    """
+    url = str(data.url)
+    settings = get_settings()
+    if url.startswith("http://") and not settings.WEBHOOK_ALLOW_HTTP:
+        raise ValueError("Webhook URLs must use https.")
+    if not settings.WEBHOOK_ALLOW_PRIVATE_DESTINATIONS:
+        await check_destination(url)
+    webhook = WebhookSubscription(
+        user_id=user_id,
+        url=url,
+        secret=secrets.token_urlsafe(32),
+        events=",".join(data.events),
+    )
+    session.add(webhook)
+    await session.flush()
+    await session.refresh(webhook)
+    get_webhook_deliverer().invalidate(user_id)
+    logger.info("Created webhook %s for user %s", webhook.id, user_id)
+    return webhook
+
+
+async def list_webhooks(session: AsyncSession, user_id: int) -> list[WebhookSubscription]:
+    result = await session.execute(
+        select(WebhookSubscription).where(WebhookSubscription.user_id == user_id).order_by(WebhookSubscription.id)
+    )
+    return list(result.scalars().all())
+
+
+async def delete_webhook(session: AsyncSession, webhook_id: int, user_id: int) -> None:
+    webhook = await session.get(WebhookSubscription, webhook_id)
+    if webhook is None or webhook.user_id != user_id:
+        raise WebhookNotFoundError(webhook_id)
+    await session.delete(webhook)
+    await session.flush()
+    deliverer = get_webhook_deliverer()
+    deliverer.invalidate(user_id)
+    deliverer.evict(webhook_id)
+    logger.info("Deleted webhook %s for user %s", webhook_id, user_id)
+
+
+# -------------------------------------------------
+# Destination check
+# -------------------------------------------------
+async def resolve(host: str, port: int) -> list[str]:
+    """Every address ``host`` resolves to (``getaddrinfo`` runs in the loop's executor)."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+def is_public_address(address: str) -> bool:
+    """False for loopback, private, link-local, shared, reserved and multicast addresses."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # drop an IPv6 zone id
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def public_addresses(host: str, port: int) -> list[str]:
+    """Resolve ``host``; raise ValueError unless every address is public."""
+    try:
+        addresses = await resolve(host, port)
+    except (OSError, UnicodeError):
+        raise ValueError(f"Webhook host {host!r} could not be resolved.")
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        raise ValueError(f"Webhook host {host!r} resolves to a non-public address.")
+    return addresses
+
+
+async def check_destination(url: str) -> None:
+    """Raise ValueError unless every address of ``url``'s host is public."""
+    parsed = httpx.URL(url)
+    await public_addresses(parsed.host, parsed.port or (443 if parsed.scheme == "https" else 80))
+
+
+class PublicAddressBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that only connects to public addresses.
+
+    The host is resolved once; if every address is public, the connection
+    is made to one of those addresses, never to a second lookup's result.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend):
+        self.backend = backend
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await public_addresses(host, port)
+        except ValueError as e:
+            raise httpcore.ConnectError(str(e)) from e
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self.backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except httpcore.ConnectError as e:
+                error = e
+        raise error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        raise httpcore.ConnectError("Webhooks are only delivered over TCP.")
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+def public_only_transport(
+    limits: httpx.Limits, network_backend: Optional[httpcore.AsyncNetworkBackend] = None
+) -> httpx.AsyncHTTPTransport:
+    """An httpx transport whose connections go through ``PublicAddressBackend``.
+
+    ``network_backend`` replaces the socket layer underneath (tests).
+    """
+    transport = httpx.AsyncHTTPTransport(limits=limits)
+    # httpx has no public hook for the network backend; wrap the pool's own
+    pool = transport._pool
+    pool._network_backend = PublicAddressBackend(network_backend or pool._network_backend)
+    return transport
+
+
+# -------------------------------------------------
+# Signing
+# -------------------------------------------------
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    digest = hmac.new(secret.encode(), timestamp.encode() + b"." + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify(secret: str, timestamp: str, body: bytes, signature: str) -> bool:
+    """Check a delivery's signature (what a receiver should do)."""
+    return hmac.compare_digest(sign(secret, timestamp, body), signature)
+
+
+# -------------------------------------------------
+# Delivery
+# -------------------------------------------------
+@dataclass(frozen=True)
+class Endpoint:
+    id: int
+    url: str
+    secret: str
+    events: tuple[str, ...]
+
+    def wants(self, topic: str) -> bool:
+        return topic.startswith(self.events)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial)."""
+
+    def __init__(self, threshold: int, cooldown: float, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.clock() - self.opened_at >= self.cooldown:
+            self.state = "half_open"  # this caller is the trial
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.threshold:
+            self.state = "open"
+            self.opened_at = self.clock()
+
+
+class _EndpointQueue:
+    """Pending events, concurrency limit and breaker for one endpoint."""
+
+    def __init__(self, endpoint: Endpoint, concurrency: int, breaker: CircuitBreaker):
+        self.endpoint = endpoint
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.breaker = breaker
+        self.pending: list[tuple[dict, asyncio.Future]] = []
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+class WebhookDeliverer:
+    """Batches, signs and POSTs task events to subscribed endpoints."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        *,
+        timeout: float = 10.0,
+        max_connections: int = 100,
+        batch_window: float = 0.05,
+        max_batch_size: int = 100,
+        endpoint_concurrency: int = 4,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+        allow_private_destinations: bool = False,
+        # Used as is instead of the network, without the destination check (in-process receivers)
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.session_factory = session_factory
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.endpoint_concurrency = endpoint_concurrency
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.allow_private_destinations = allow_private_destinations
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queues: dict[int, _EndpointQueue] = {}
+        self._cache: dict[int, tuple[float, list[Endpoint]]] = {}
+        self._sends: set[asyncio.Task] = set()
+        self.requests = 0
+        self.events_delivered = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            transport = self.transport
+            if transport is None and not self.allow_private_destinations:
+                transport = public_only_transport(limits)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=limits,
+                transport=transport,
+                headers={"User-Agent": "todo-api-webhooks"},
+            )
+
+    async def stop(self) -> None:
+        for queue in self._queues.values():
+            if queue.pending:
+                self._flush(queue)
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._queues.clear()
+
+    def invalidate(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
+
+    def evict(self, endpoint_id: int) -> None:
+        """Forget a deleted endpoint's queue; its unsent events are dropped."""
+        queue = self._queues.pop(endpoint_id, None)
+        if queue is None:
+            return
+        if queue.flush_handle is not None:
+            queue.flush_handle.cancel()
+        for _, future in queue.pending:
+            if not future.done():
+                future.set_result(None)
+        queue.pending = []
+
+    async def handle(self, message: OutboxMessage) -> None:
+        """Outbox handler: deliver one event to the user's matching endpoints.
+
+        Raises if any endpoint failed, so the outbox retries the event
+        (endpoints that already got it see a duplicate ``id``).
+        """
+        endpoints = [e for e in await self._endpoints(message.user_id) if e.wants(message.topic)]
+        if not endpoints:
+            return
+        event = {"id": message.id, **message.payload}
+        results = await asyncio.gather(*(self.deliver(e, event) for e in endpoints), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def deliver(self, endpoint: Endpoint, event: dict) -> None:
+        """Queue ``event`` for ``endpoint``; returns once its batch is accepted."""
+        queue = self._queues.get(endpoint.id)
+        if queue is None or queue.endpoint != endpoint:
+            breaker = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            queue = self._queues[endpoint.id] = _EndpointQueue(endpoint, self.endpoint_concurrency, breaker)
+        future = asyncio.get_running_loop().create_future()
+        queue.pending.append((event, future))
+        if len(queue.pending) >= self.max_batch_size:
+            self._flush(queue)
+        elif queue.flush_handle is None:
+            queue.flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush, queue)
+        await future
+
+    def _flush(self, queue: _EndpointQueue) -> None:
+        if queue.flush_handle is not None:
+            queue.flush_handle.cancel()
+            queue.flush_handle = None
+        while queue.pending:
+            batch, queue.pending = queue.pending[: self.max_batch_size], queue.pending[self.max_batch_size :]
+            task = asyncio.create_task(self._send(queue, batch))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _send(self, queue: _EndpointQueue, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        endpoint = queue.endpoint
+        error: Optional[Exception] = None
+        async with queue.semaphore:
+            if not queue.breaker.allow():
+                error = WebhookCircuitOpenError(endpoint.url)
+            else:
+                try:
+                    await self._post(endpoint, [event for event, _ in batch])
+                    queue.breaker.record_success()
+                    self.events_delivered += len(batch)
+                except WebhookDeliveryError as e:
+                    queue.breaker.record_failure()
+                    self.failures += 1
+                    error = e
+        for _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    async def _post(self, endpoint: Endpoint, events: list[dict]) -> None:
+        if self._client is None:
+            await self.start()
+        body = json.dumps({"events": events}, separators=(",", ":")).encode()
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            TIMESTAMP_HEADER: timestamp,
+            SIGNATURE_HEADER: sign(endpoint.secret, timestamp, body),
+        }
+        self.requests += 1
+        try:
+            response = await self._client.post(endpoint.url, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            raise WebhookDeliveryError(endpoint.url, repr(e))
+        if not 200 <= response.status_code < 300:
+            raise WebhookDeliveryError(endpoint.url, f"HTTP {response.status_code}")
+
+    async def _endpoints(self, user_id: int) -> list[Endpoint]:
+        cached = self._cache.get(user_id)
+        if cached is not None and time.monotonic() < cached[0]:
+            return cached[1]
+        endpoints = await _load_endpoints(self.session_factory, user_id)
+        if cached is not None:
+            # Endpoints deleted through another worker
+            for endpoint_id in {e.id for e in cached[1]} - {e.id for e in endpoints}:
+                self.evict(endpoint_id)
+        self._cache[user_id] = (time.monotonic() + SUBSCRIPTION_CACHE_SECONDS, endpoints)
+        return endpoints
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "events_delivered": self.events_delivered,
+            "failures": self.failures,
+            "open_circuits": [q.endpoint.url for q in self._queues.values() if q.breaker.state != "closed"],
+        }
+
+
+@coalesce()
+async def _load_endpoints(session_factory: Callable[[], AsyncSession], user_id: int) -> list[Endpoint]:
+    # Coalesced: a burst of events for one user runs a single query
+    async with session_factory() as session:
+        rows = (
+            await session.execute(
+                select(WebhookSubscription).where(
+                    WebhookSubscription.user_id == user_id, WebhookSubscription.active == True  # noqa: E712
+                )
+            )
+        ).scalars().all()
+    return [Endpoint(row.id, row.url, row.secret, tuple(row.events.split(","))) for row in rows]
+
+
+@lru_cache
+def get_webhook_deliverer() -> WebhookDeliverer:
+    """Return the worker's deliverer (started and registered in main.lifespan)."""
+    settings = get_settings()
+    return WebhookDeliverer(
+        lambda: get_sessionmaker()(),
+        timeout=settings.WEBHOOK_TIMEOUT,
+        max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        batch_window=settings.WEBHOOK_BATCH_WINDOW_MS / 1000,
+        max_batch_size=settings.WEBHOOK_MAX_BATCH_SIZE,
+        endpoint_concurrency=settings.WEBHOOK_ENDPOINT_CONCURRENCY,
+        breaker_threshold=settings.WEBHOOK_BREAKER_THRESHOLD,
+        breaker_cooldown=settings.WEBHOOK_BREAKER_COOLDOWN,
+        allow_private_destinations=settings.WEBHOOK_ALLOW_PRIVATE_DESTINATIONS,
+    )
@@ -0,0 +1,191 @@
+"""Slow-query recorder attached to the engine.
+
+SQLAlchemy cursor-execute events time every statement and add the time to
+the current request's ``db_time_ms`` (see app.request_context). Statements slower
+than the threshold are kept in a fixed-size ring buffer together with their
+duration, the route that issued them and the *shape* of their parameters
+(types only, never values). Fast statements cost two ``perf_counter`` calls.
+
+On Postgres a sample of slow statements can also be explained: an
+``EXPLAIN (FORMAT JSON)`` runs as a background task on its own connection
+and the plan is attached to the entry when it arrives. EXPLAIN without
+ANALYZE never executes the statement, so DML is safe to explain.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import get_settings
+from app.request_context import current_request
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENT_LENGTH = 2000
+EXPLAIN_TIMEOUT = 5.0
+_EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+
+@dataclass
+class SlowQuery:
+    """One statement that exceeded the threshold."""
+
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    params: Any
+    route: Optional[str]
+    executemany: bool = False
+    explain: Optional[Any] = None
+    explain_error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        entry = {
+            "recorded_at": self.recorded_at.isoformat().replace("+00:00", "Z"),
+            "duration_ms": round(self.duration_ms, 3),
+            "statement": self.statement,
+            "params": self.params,
+            "route": self.route,
+            "executemany": self.executemany,
+        }
+        if self.explain is not None:
+            entry["explain"] = self.explain
+        if self.explain_error:
+            entry["explain_error"] = self.explain_error
+        return entry
+
+
+def param_shape(parameters: Any) -> Any:
+    """Describe parameters by type only, so no values leave the process."""
+    if isinstance(parameters, dict):
+        return {key: _type_name(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_type_name(value) for value in parameters]
+    return _type_name(parameters)
+
+
+def _type_name(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements fed by engine events.
+
+    Attributes:
+        threshold: Seconds a statement must take to be recorded
+            (``None`` records nothing; statements are still timed).
+        entries: Most recent slow statements (oldest dropped first).
+        total: Slow statements seen since start, including dropped ones.
+        explain_sample_rate: Fraction of slow Postgres statements explained
+            (0 disables EXPLAIN capture).
+    """
+
+    def __init__(self, threshold: Optional[float], capacity: int = 100, explain_sample_rate: float = 0.0):
+        self.threshold = threshold
+        self.entries: deque[SlowQuery] = deque(maxlen=capacity)
+        self.total = 0
+        self.explain_sample_rate = explain_sample_rate
+        self._tasks: set[asyncio.Task] = set()
+
+    def install(self, engine: AsyncEngine) -> None:
+        """Attach the timing listeners to ``engine``."""
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before)
+        event.listen(sync_engine, "after_cursor_execute", self._after(engine))
+
+    def snapshot(self, limit: Optional[int] = None) -> dict:
+        entries = [entry.as_dict() for entry in reversed(self.entries)]
+        return {
+            "threshold_ms": None if self.threshold is None else self.threshold * 1000,
+            "total": self.total,
+            "capacity": self.entries.maxlen,
+            "entries": entries[:limit] if limit else entries,
+        }
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.total = 0
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._slow_query_start = time.perf_counter()
+
+    def _after(self, engine: AsyncEngine):
+        explain = self.explain_sample_rate > 0 and engine.dialect.name == "postgresql"
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+            elapsed = time.perf_counter() - context._slow_query_start
+            ctx = current_request()
+            if ctx is not None:
+                ctx.db_time_ms += elapsed * 1000
+                ctx.db_queries += 1
+            if self.threshold is None or elapsed < self.threshold or conn.info.get("slow_query_explain"):
+                return
+            entry = SlowQuery(
+                recorded_at=datetime.now(timezone.utc),
+                duration_ms=elapsed * 1000,
+                statement=statement[:MAX_STATEMENT_LENGTH],
+                params=[param_shape(p) for p in parameters[:1]] + [f"... x{len(parameters)}"]
+                if executemany
+                else param_shape(parameters),
+                route=ctx.route if ctx is not None else None,
+                executemany=executemany,
+            )
+            self.entries.append(entry)
+            self.total += 1
+            logger.warning(
+                "Slow query (%.1f ms): %.200s", entry.duration_ms, statement, extra={"slow_query_ms": entry.duration_ms}
+            )
+            if (
+                explain
+                and not executemany
+                and statement.lstrip()[:6].lower().startswith(_EXPLAINABLE)
+                and random.random() < self.explain_sample_rate
+            ):
+                self._schedule_explain(engine, entry, statement, parameters)
+
+        return after_cursor_execute
+
+    def _schedule_explain(self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._explain(engine, entry, statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        try:
+            async with asyncio.timeout(EXPLAIN_TIMEOUT):
+                async with engine.connect() as conn:
+                    conn.info["slow_query_explain"] = True
+                    try:
+                        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                        plan = result.scalar()
+                    finally:
+                        conn.info.pop("slow_query_explain", None)
+            entry.explain = plan
+        except Exception as e:
+            entry.explain_error = str(e) or type(e).__name__
+
+
+@lru_cache
+def get_slow_query_log() -> SlowQueryLog:
+    """Process-wide recorder (installed on the engine in database.get_engine)."""
+    settings = get_settings()
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    return SlowQueryLog(
+        threshold=threshold / 1000 if threshold > 0 else None,
+        capacity=settings.SLOW_QUERY_CAPACITY,
+        explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    )
@@ -0,0 +1,363 @@
+"""Lightweight distributed tracing.
+
+Spans follow the W3C Trace Context model: 16-byte trace ids, 8-byte span
+ids and the ``traceparent`` header, so traces join those of callers and
+downstream services. Spans are created for:
+
+- each HTTP request (``TracingMiddleware``, the root span),
+- the auth and session dependencies,
+- each ``task_service`` function (``@traced``),
+- each SQL statement (engine cursor events, see ``install``).
+
+When a root span ends, its whole trace is handed to the configured exporter
+(TRACING_EXPORTER): ``memory`` keeps recent traces for
+GET /api/admin/traces, ``file`` appends JSON lines from a background thread,
+and ``package.module:factory`` plugs in anything else.
+
+Overhead when disabled or not sampled: child spans are only created under a
+recording parent, so instrumented code does a single ContextVar lookup.
+"""
+
+import importlib
+import json
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
+from typing import Any, Optional, Protocol
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+
+TRACEPARENT_HEADER = b"traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+MAX_STATEMENT_LENGTH = 500
+
+
+# -------------------------------------------------
+# Spans
+# -------------------------------------------------
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: Optional[str] = None
+    # Spans of the whole trace collected so far, shared by the root and its children
+    trace: list["Span"] = field(default_factory=list, repr=False)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return None if self.end_ns is None else (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.trace.append(self)
+
+    def as_dict(self) -> dict:
+        span = {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": _round(self.duration_ms),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            span["error"] = self.error
+        return span
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The recording span of the current task, if any."""
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a child of the current span (no-op outside a sampled trace)."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(name, parent.trace_id, _new_id(8), parent.span_id, attributes=attributes, trace=parent.trace)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.set_error(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+def traced(name: Optional[str] = None):
+    """Decorate an async function so each call records a span.
+
+    Put it outermost (above ``@coalesce``) so every caller gets its own span.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current_span.get() is None:
+                return await fn(*args, **kwargs)
+            with start_span(span_name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inject(headers: dict[str, str]) -> dict[str, str]:
+    """Add the current ``traceparent`` to outgoing request headers."""
+    span = _current_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+    return headers
+
+
+def parse_traceparent(value: str) -> Optional[tuple[str, str, bool]]:
+    """Return (trace_id, parent_span_id, sampled) or ``None`` if invalid."""
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+def _new_id(nbytes: int) -> str:
+    return random.getrandbits(nbytes * 8).to_bytes(nbytes, "big").hex()
+
+
+# -------------------------------------------------
+# Exporters
+# -------------------------------------------------
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps the most recent traces in memory (local use and tests)."""
+
+    def __init__(self, max_traces: int = 200):
+        self.traces: deque[list[dict]] = deque(maxlen=max_traces)
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append([span.as_dict() for span in spans])
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileExporter:
+    """Appends one JSON line per span; writes happen on a background thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._drain, name="trace-file-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, spans: list[Span]) -> None:
+        self._queue.put([span.as_dict() for span in spans])
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _drain(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            while (batch := self._queue.get()) is not None:
+                fh.writelines(json.dumps(span) + "\n" for span in batch)
+                fh.flush()
+
+
+def load_exporter(spec: str) -> SpanExporter:
+    """Build an exporter from TRACING_EXPORTER (``memory``, ``file`` or ``module:factory``)."""
+    if spec == "memory":
+        return InMemoryExporter()
+    if spec == "file":
+        return FileExporter(get_settings().TRACING_FILE)
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+
+# -------------------------------------------------
+# Tracer
+# -------------------------------------------------
+class Tracer:
+    """Starts sampled root spans and exports finished traces.
+
+    Attributes:
+        sample_rate: Fraction of new traces recorded. Requests carrying a
+            ``traceparent`` follow the caller's sampled flag instead.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def should_sample(self, trace_id: str) -> bool:
+        # Ratio on the trace id, so every service makes the same decision.
+        return int(trace_id[16:], 16) < self.sample_rate * 2**64
+
+    @contextmanager
+    def start_root(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Record a root span (continuing ``traceparent`` when valid)."""
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = _new_id(16), None
+            sampled = self.should_sample(trace_id)
+        if not self.enabled or not sampled:
+            yield None
+            return
+
+        span = Span(name, trace_id, _new_id(8), parent_id, attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.set_error(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self.exporter.export(span.trace)
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+@lru_cache
+def get_tracer() -> Tracer:
+    """Process-wide tracer; disabled unless TRACING_ENABLED is set."""
+    settings = get_settings()
+    exporter = load_exporter(settings.TRACING_EXPORTER) if settings.TRACING_ENABLED else None
+    return Tracer(exporter, settings.TRACING_SAMPLE_RATE)
+
+
+# -------------------------------------------------
+# Instrumentation
+# -------------------------------------------------
+class TracingMiddleware:
+    """Root span per HTTP request, named after the matched route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracer = get_tracer()
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == TRACEPARENT_HEADER:
+                traceparent = value.decode("latin-1")
+                break
+
+        with tracer.start_root(f"{scope['method']} {scope['path']}", traceparent) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_traced(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.attributes["http.status_code"] = message["status"]
+                    if message["status"] >= 500:
+                        span.status = "error"
+                await send(message)
+
+            span.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+            try:
+                await self.app(scope, receive, send_traced)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{scope['method']} {route}"
+                    span.attributes["http.route"] = route
+
+
+def install(engine: AsyncEngine) -> None:
+    """Record a span for each SQL statement run under a sampled trace."""
+    sync_engine = engine.sync_engine
+    system = engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        context._trace_span = Span(
+            f"sql {verb}",
+            parent.trace_id,
+            _new_id(8),
+            parent.span_id,
+            attributes={"db.system": system, "db.statement": statement[:MAX_STATEMENT_LENGTH]},
+            trace=parent.trace,
+        )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None and span.end_ns is None:
+            span.set_error(exception_context.original_exception)
+            span.end()
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
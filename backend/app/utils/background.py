@@ -0,0 +1,62 @@
+"""Helpers for long-running background jobs started from the app lifespan."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run an async callable every ``interval`` seconds until stopped.
+
+    Failures are logged and never stop the loop, so one bad iteration
+    (e.g. the database being briefly unreachable) doesn't kill the job.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[object]],
+        interval: float,
+        *,
+        run_immediately: bool = True,
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_immediately = run_immediately
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Schedule the loop on the running event loop (idempotent)."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        """Cancel the loop and wait for it to exit."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        if not self.run_immediately:
+            await asyncio.sleep(self.interval)
+        while True:
+            try:
+                await self.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Background job %s failed", self.name)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,162 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+Concurrent calls to a decorated coroutine with the same user and the same
+arguments share one in-flight execution (and therefore one DB query) and its
+result. The shared call belongs to no single request: it runs on its own
+short-lived session from ``get_sessionmaker()`` and in a fresh context, so
+cancelling or closing any caller's session can't fail the others. Every
+caller gets its own detached copies of the ORM instances returned.
+
+A caller whose session is already inside a transaction (e.g. it wrote
+earlier in the request) runs uncoalesced on that session, so it reads its own
+uncommitted writes.
+
+Writes call ``invalidate_on_commit(session, user_id)``: once the write
+commits, reads issued after it never join a future that was started before
+the commit.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any, Optional, TypeVar
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstanceState, Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+T = TypeVar("T")
+
+# user_id -> {call key -> in-flight future}
+_inflight: dict[Hashable, dict[tuple, asyncio.Future]] = {}
+# session.info key: users whose in-flight reads are dropped on commit
+_PENDING_KEY = "coalesce_invalidate"
+
+
+def coalesce(
+    *,
+    user_arg: str = "user_id",
+    session_arg: str = "session",
+    exclude: Iterable[str] = (),
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Share one in-flight call between identical concurrent invocations.
+
+    Args:
+        user_arg: Name of the parameter holding the user the read belongs to.
+        session_arg: Name of the ``AsyncSession`` parameter, if any. It is left
+                     out of the call key, and the shared call gets its own
+                     session.
+        exclude: Further parameters left out of the call key.
+
+    Returns:
+        A decorator for async functions. The wrapped function keeps its
+        signature, so it can decorate FastAPI endpoints as well.
+    """
+    excluded = frozenset(exclude) | {session_arg}
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(fn)
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            session: Optional[AsyncSession] = bound.arguments.get(session_arg)
+            if session is not None and session.in_transaction():
+                return await fn(*args, **kwargs)
+            user_id = bound.arguments[user_arg]
+            key = (name,) + tuple(
+                (arg, value)
+                for arg, value in bound.arguments.items()
+                if arg not in excluded
+            )
+            try:
+                hash(key)
+            except TypeError:
+                # Unhashable arguments can't be matched; run uncoalesced.
+                return await fn(*args, **kwargs)
+
+            loop = asyncio.get_running_loop()
+            calls = _inflight.setdefault(user_id, {})
+            future = calls.get(key)
+            if future is None or future.get_loop() is not loop:
+                if session is None:
+                    call = fn(*args, **kwargs)  # opens its own sessions, if any
+                else:
+                    call = _on_own_session(fn, bound.arguments, session_arg, session.bind)
+                # A fresh context: the shared call isn't part of the first caller's request
+                future = loop.create_task(call, context=contextvars.Context())
+                calls[key] = future
+                future.add_done_callback(functools.partial(_discard, user_id, key))
+            # Shield so one caller's cancellation doesn't fail the others.
+            return _detached_copy(await asyncio.shield(future))
+
+        return wrapper
+
+    return decorator
+
+
+async def _on_own_session(
+    fn: Callable[..., Awaitable[T]], arguments: dict[str, Any], session_arg: str, bind: Any
+) -> T:
+    """Run ``fn`` on a short-lived session bound to the caller's engine."""
+    from app.database import get_sessionmaker
+
+    async with get_sessionmaker()(bind=bind) as session:
+        return await fn(**{**arguments, session_arg: session})
+
+
+def _detached_copy(value: Any) -> Any:
+    """A caller's own copy of a shared result: lists and ORM instances are copied."""
+    if isinstance(value, list):
+        return [_detached_copy(item) for item in value]
+    state = sa_inspect(value, raiseerr=False)
+    if not isinstance(state, InstanceState):
+        return value
+    copy = state.mapper.class_manager.new_instance()
+    for attr in state.mapper.column_attrs:
+        if attr.key in state.dict:
+            set_committed_value(copy, attr.key, state.dict[attr.key])
+    if state.key is not None:
+        make_transient_to_detached(copy)
+    return copy
+
+
+def invalidate(user_id: Hashable) -> None:
+    """Detach all in-flight reads of a user.
+
+    Callers already waiting keep their result; any read issued after this
+    call starts a fresh query instead of joining a pre-write future.
+    """
+    _inflight.pop(user_id, None)
+
+
+def invalidate_on_commit(session: AsyncSession, user_id: Hashable) -> None:
+    """``invalidate(user_id)`` once ``session`` commits (nothing on rollback)."""
+    session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _discard(user_id: Hashable, key: tuple, future: asyncio.Future) -> None:
+    """Drop a finished future from the registry (unless it was replaced)."""
+    if not future.cancelled():
+        future.exception()  # mark retrieved; awaiters re-raise it themselves
+    calls = _inflight.get(user_id)
+    if calls is not None and calls.get(key) is future:
+        del calls[key]
+        if not calls:
+            del _inflight[user_id]
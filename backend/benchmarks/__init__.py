@@ -0,0 +1,6 @@
+"""Benchmarks and startup measurements for the Todo API backend.
+
+Not part of the default test run (pytest.ini only collects ``tests/``).
+The load-test and cold-start modules are run directly from the backend
+directory; the micro-benchmarks run with ``pytest benchmarks/``.
+"""
@@ -0,0 +1,191 @@
+"""Table and index size report for task archival.
+
+Seeds a database with tasks, a share of them completed long ago, and
+measures the ``tasks`` table and its indexes before and after
+``run_archival`` moves the old completed ones to ``tasks_archive``. It also
+times the dashboard query (``get_tasks`` for one user) on both sides.
+
+Sizes are compacted first: VACUUM on SQLite, VACUUM FULL on Postgres.
+Without that, space freed by the move stays allocated to the table until
+autovacuum or ``pg_repack`` reclaims it.
+
+Usage (from the backend directory):
+    python -m benchmarks.archive_report --tasks 100000 --output archive.json
+    python -m benchmarks.archive_report --database-url postgresql://... --tasks 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.migrations import ensure_schema
+from app.models import Task, User
+from app.services import task_service
+from app.services.archive import run_archival
+
+SEED = 1234
+ARCHIVE_AFTER_DAYS = 90
+INSERT_CHUNK = 5000
+
+
+async def seed(engine: AsyncEngine, tasks: int, users: int, archivable: float) -> None:
+    """Insert ``tasks`` tasks; ``archivable`` of them completed > ARCHIVE_AFTER_DAYS ago."""
+    rng = random.Random(SEED)
+    now = datetime.now(timezone.utc)
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "id": i,
+                    "email": f"archive{i}@example.com",
+                    "full_name": f"User {i}",
+                    "phone_number": f"{1_000_000_000 + i}",
+                    "password_hash": "x",
+                    "created_at": now,
+                }
+                for i in range(1, users + 1)
+            ],
+        )
+        for start in range(0, tasks, INSERT_CHUNK):
+            rows = []
+            for _ in range(start, min(start + INSERT_CHUNK, tasks)):
+                old = rng.random() < archivable
+                created = now - timedelta(days=rng.uniform(ARCHIVE_AFTER_DAYS + 1, 720) if old else rng.uniform(0, 60))
+                rows.append(
+                    {
+                        "title": f"task {rng.getrandbits(32):08x}",
+                        "completed": old or rng.random() < 0.2,
+                        "priority": rng.choice(("low", "medium", "high")),
+                        "created_at": created,
+                        "updated_at": created,
+                        "owner_id": rng.randint(1, users),
+                        "version": 1,
+                    }
+                )
+            await conn.execute(insert(Task), rows)
+
+
+async def table_sizes(engine: AsyncEngine, table: str) -> dict:
+    """Bytes used by ``table`` and by its indexes, after compaction."""
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text(f"VACUUM FULL ANALYZE {table}"))
+            row = (
+                await conn.execute(text(f"SELECT pg_table_size('{table}'), pg_indexes_size('{table}')"))
+            ).one()
+        return {"table_bytes": row[0], "index_bytes": row[1], "rows": await _count(engine, table)}
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM"))
+        indexes = [
+            name
+            for (name,) in await conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t"), {"t": table}
+            )
+        ]
+        sizes = dict((await conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))).all())
+    return {
+        "table_bytes": sizes.get(table, 0),
+        "index_bytes": sum(sizes.get(name, 0) for name in indexes),
+        "rows": await _count(engine, table),
+    }
+
+
+async def _count(engine: AsyncEngine, table: str) -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"SELECT COUNT(*) FROM {table}"))).scalar_one()
+
+
+async def dashboard_ms(engine: AsyncEngine, user_id: int, repeat: int = 20) -> float:
+    """Median latency of one user's ``get_tasks``, in milliseconds."""
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    timings = []
+    for _ in range(repeat):
+        async with factory() as session:
+            started = time.perf_counter()
+            await task_service.get_tasks(session, user_id)
+            timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def _reduction(before: int, after: int) -> float:
+    return round(100 * (before - after) / before, 1) if before else 0.0
+
+
+async def run(database_url: str, tasks: int, users: int, archivable: float, batch_size: int) -> dict:
+    engine = create_async_engine(database_url)
+    try:
+        await ensure_schema(engine, auto_migrate=True)
+        await seed(engine, tasks, users, archivable)
+        before = await table_sizes(engine, "tasks")
+        query_before = await dashboard_ms(engine, 1)
+
+        started = time.perf_counter()
+        moved = await run_archival(
+            async_sessionmaker(engine, expire_on_commit=False), ARCHIVE_AFTER_DAYS, batch_size, pause=0
+        )
+        elapsed = time.perf_counter() - started
+
+        after = await table_sizes(engine, "tasks")
+        archive = await table_sizes(engine, "tasks_archive")
+        query_after = await dashboard_ms(engine, 1)
+    finally:
+        await engine.dispose()
+
+    return {
+        "meta": {
+            "database": make_url(database_url).get_backend_name(),
+            "tasks": tasks,
+            "users": users,
+            "archivable_fraction": archivable,
+            "batch_size": batch_size,
+        },
+        "archived": moved,
+        "archival_seconds": round(elapsed, 3),
+        "tasks_before": before,
+        "tasks_after": after,
+        "tasks_archive": archive,
+        "reduction_pct": {
+            "table": _reduction(before["table_bytes"], after["table_bytes"]),
+            "indexes": _reduction(before["index_bytes"], after["index_bytes"]),
+        },
+        "dashboard_query_ms": {"before": query_before, "after": query_after},
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--archivable", type=float, default=0.6, help="share of tasks old enough to archive")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", default=None, help="also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{tmp}/archive.db"
+        if database_url.startswith("postgresql://"):
+            database_url = database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        report = asyncio.run(run(database_url, args.tasks, args.users, args.archivable, args.batch_size))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
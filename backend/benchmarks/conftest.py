@@ -0,0 +1,133 @@
+"""Fixtures for the micro-benchmarks (``pytest benchmarks/``).
+
+Datasets are seeded deterministically so runs are comparable across
+machines and commits; async code runs on a dedicated event loop because
+pytest-benchmark calls a plain function repeatedly.
+"""
+
+import asyncio
+import os
+import random
+import tracemalloc
+from collections.abc import Callable, Coroutine, Iterator
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("BETTER_AUTH_SECRET", "benchmark-secret-key-at-least-32-bytes")
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+from app.models import Task, User
+
+SEED = 20240101
+BENCH_USER_ID = 1
+DATASET_SIZES = (10, 100, 1000)
+ALLOCATION_CALLS = 20
+
+
+@pytest.fixture(scope="session")
+def loop() -> Iterator[asyncio.AbstractEventLoop]:
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def run_async(loop) -> Callable[..., Callable[[], Any]]:
+    """Wrap ``coro_fn(*args)`` as a sync callable for ``benchmark``."""
+
+    def wrap(coro_fn: Callable[..., Coroutine], *args: Any) -> Callable[[], Any]:
+        return lambda: loop.run_until_complete(coro_fn(*args))
+
+    return wrap
+
+
+def seed_tasks(count: int, user_id: int = BENCH_USER_ID) -> list[Task]:
+    """Deterministic tasks: same titles, priorities and timestamps every run."""
+    rng = random.Random(SEED + count)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tasks = []
+    for i in range(count):
+        created = start + timedelta(minutes=i)
+        tasks.append(
+            Task(
+                owner_id=user_id,
+                title=f"task {i} " + "x" * rng.randint(5, 60),
+                completed=rng.random() < 0.3,
+                priority=rng.choice(("low", "medium", "high")),
+                created_at=created,
+                updated_at=created,
+            )
+        )
+    return tasks
+
+
+@pytest.fixture(params=DATASET_SIZES, ids=lambda n: f"{n}_tasks")
+def dataset_size(request) -> int:
+    return request.param
+
+
+@pytest.fixture
+def session(loop, dataset_size) -> Iterator[AsyncSession]:
+    """Session on a fresh in-memory DB seeded with ``dataset_size`` tasks."""
+
+    async def setup():
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:", poolclass=StaticPool, connect_args={"check_same_thread": False}
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        session = async_sessionmaker(engine, expire_on_commit=False)()
+        session.add(
+            User(
+                id=BENCH_USER_ID,
+                email="bench@example.com",
+                full_name="Bench User",
+                father_name="Bench",
+                phone_number="1000000000",
+                password_hash="x",
+            )
+        )
+        session.add_all(seed_tasks(dataset_size))
+        await session.commit()
+        return engine, session
+
+    engine, session = loop.run_until_complete(setup())
+    yield session
+    loop.run_until_complete(session.close())
+    loop.run_until_complete(engine.dispose())
+
+
+@pytest.fixture
+def track_allocations(benchmark) -> Callable[[Callable[[], Any]], None]:
+    """Record per-call allocations of ``fn`` in the benchmark's extra_info.
+
+    Runs ``fn`` ALLOCATION_CALLS more times under tracemalloc (outside the
+    timed rounds, so tracing overhead doesn't skew the timings) and stores:
+
+    - ``alloc_peak_bytes``: peak traced memory above the starting point,
+    - ``alloc_net_bytes_per_call``: memory still held afterwards, per call.
+    """
+
+    def measure(fn: Callable[[], Any]) -> None:
+        fn()  # warm caches so one-off imports/compilation aren't counted
+        tracemalloc.start()
+        try:
+            start_current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            for _ in range(ALLOCATION_CALLS):
+                fn()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info.update(
+            alloc_peak_bytes=peak - start_current,
+            alloc_net_bytes_per_call=(current - start_current) // ALLOCATION_CALLS,
+        )
+
+    return measure
@@ -0,0 +1,344 @@
+"""Load-test harness for the Todo API.
+
+Drives the API either in-process through ``httpx.ASGITransport`` (no network,
+isolates app + DB cost) or over real sockets against a local server started
+as a subprocess (``uvicorn`` or the multi-worker ``app.serve``). Works against
+SQLite (a temporary file by default) or any Postgres given by --database-url.
+
+Scenarios:
+    dashboard    GET /api/tasks + GET /api/users/me (frontend polling)
+    crud         create, read, update, status change, delete
+    login        POST /api/auth/login bursts
+    bulk_import  BULK_BATCH task creations back to back
+
+Results are JSON (RPS and p50/p95/p99 latency per scenario and per request
+kind). ``--compare baseline.json`` flags regressions beyond --threshold and
+exits with status 1 when any are found.
+
+Usage (from the backend directory):
+    python -m benchmarks.loadtest --mode asgi --duration 10 --output out.json
+    python -m benchmarks.loadtest --mode socket --workers 4 --database-url postgresql://...
+    python -m benchmarks.loadtest --compare benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+
+from app.health import percentile
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BULK_BATCH = 50
+PASSWORD = "benchmark-password"
+
+
+# -------------------------------------------------
+# Statistics
+# -------------------------------------------------
+def summarize(latencies_ms: list[float], errors: int, elapsed: float) -> dict:
+    """RPS and latency distribution for one group of requests."""
+    count = len(latencies_ms)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies_ms), 3) if latencies_ms else None,
+            "p50": _round(percentile(latencies_ms, 50)),
+            "p95": _round(percentile(latencies_ms, 95)),
+            "p99": _round(percentile(latencies_ms, 99)),
+            "max": _round(max(latencies_ms) if latencies_ms else None),
+        },
+    }
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 3)
+
+
+# -------------------------------------------------
+# Recording
+# -------------------------------------------------
+@dataclass
+class Recorder:
+    """Collects per-request latencies grouped by request kind."""
+
+    latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, kind: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[kind].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[kind] += 1
+        return response
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    headers: dict[str, str]
+    task_ids: list[int] = field(default_factory=list)
+
+
+# -------------------------------------------------
+# Scenarios
+# -------------------------------------------------
+async def dashboard(client: httpx.AsyncClient, rec: Recorder, user: VirtualUser) -> None:
+    await rec.request(client, "list_tasks", "GET", "/api/tasks", headers=user.headers)
+    await rec.request(client, "users_me", "GET", "/api/users/me", headers=user.headers)
+
+
+async def crud(client: httpx.AsyncClient, rec: Recorder, user: VirtualUser) -> None:
+    created = await rec.request(
+        client, "create", "POST", "/api/tasks", json={"title": "crud task"}, headers=user.headers
+    )
+    if created.status_code != 201:
+        return
+    task_id = created.json()["id"]
+    await rec.request(client, "get", "GET", f"/api/tasks/{task_id}", headers=user.headers)
+    await rec.request(client, "update", "PUT", f"/api/tasks/{task_id}", json={"title": "renamed"}, headers=user.headers)
+    await rec.request(
+        client, "status", "PATCH", f"/api/tasks/{task_id}/status", json={"completed": True}, headers=user.headers
+    )
+    await rec.request(client, "delete", "DELETE", f"/api/tasks/{task_id}", headers=user.headers)
+
+
+async def login(client: httpx.AsyncClient, rec: Recorder, user: VirtualUser) -> None:
+    await rec.request(
+        client, "login", "POST", "/api/auth/login", data={"username": user.email, "password": PASSWORD}
+    )
+
+
+async def bulk_import(client: httpx.AsyncClient, rec: Recorder, user: VirtualUser) -> None:
+    for i in range(BULK_BATCH):
+        await rec.request(
+            client, "import_create", "POST", "/api/tasks", json={"title": f"imported {i}"}, headers=user.headers
+        )
+
+
+SCENARIOS: dict[str, Callable[[httpx.AsyncClient, Recorder, VirtualUser], Awaitable[None]]] = {
+    "dashboard": dashboard,
+    "crud": crud,
+    "login": login,
+    "bulk_import": bulk_import,
+}
+
+
+# -------------------------------------------------
+# Targets
+# -------------------------------------------------
+def _server_env(database_url: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "BETTER_AUTH_SECRET": os.environ.get("BETTER_AUTH_SECRET", "loadtest-secret-key-at-least-32-bytes"),
+        "TESTING": "0",
+        # Per-request access logs would otherwise end up in the measurements.
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+
+
+@contextlib.asynccontextmanager
+async def asgi_client(database_url: str) -> AsyncIterator[httpx.AsyncClient]:
+    """In-process client: runs the app's lifespan and talks ASGI directly."""
+    os.environ.update(_server_env(database_url))
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def socket_client(database_url: str, workers: int, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    """Real-socket client against a local server subprocess."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    if workers > 1:
+        command = [sys.executable, "-m", "app.serve", "--workers", str(workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app"]
+    command += ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    proc = subprocess.Popen(
+        command,
+        cwd=BACKEND_DIR,
+        env=_server_env(database_url),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline or proc.poll() is not None:
+                    raise RuntimeError("benchmark server failed to start")
+                await asyncio.sleep(0.05)
+            yield client
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+async def create_users(client: httpx.AsyncClient, count: int) -> list[VirtualUser]:
+    users = []
+    for _ in range(count):
+        email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+        phone = "".join(random.choices("0123456789", k=12))
+        response = await client.post(
+            "/api/auth/register",
+            json={
+                "email": email,
+                "password": PASSWORD,
+                "full_name": "Bench User",
+                "father_name": "Bench",
+                "phone_number": phone,
+            },
+        )
+        response.raise_for_status()
+        token = (
+            await client.post("/api/auth/login", data={"username": email, "password": PASSWORD})
+        ).json()["access_token"]
+        user = VirtualUser(email=email, headers={"Authorization": f"Bearer {token}"})
+        for i in range(20):  # something for the dashboard to list
+            await client.post("/api/tasks", json={"title": f"seed {i}"}, headers=user.headers)
+        users.append(user)
+    return users
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    users: list[VirtualUser],
+    concurrency: int,
+    duration: float,
+) -> dict:
+    """Run ``concurrency`` loops of one scenario for ``duration`` seconds."""
+    scenario = SCENARIOS[name]
+    rec = Recorder()
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+
+    async def loop(worker: int) -> None:
+        user = users[worker % len(users)]
+        while time.perf_counter() < deadline:
+            await scenario(client, rec, user)
+
+    await asyncio.gather(*(loop(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    everything = [ms for values in rec.latencies.values() for ms in values]
+    result = summarize(everything, sum(rec.errors.values()), elapsed)
+    result["by_request"] = {
+        kind: summarize(values, rec.errors[kind], elapsed) for kind, values in sorted(rec.latencies.items())
+    }
+    return result
+
+
+async def run(args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{tmp}/loadtest.db"
+        if args.mode == "asgi":
+            target = asgi_client(database_url)
+        else:
+            target = socket_client(database_url, args.workers, args.concurrency)
+
+        async with target as client:
+            users = await create_users(client, args.users)
+            results = {}
+            for name in args.scenarios:
+                results[name] = await run_scenario(client, name, users, args.concurrency, args.duration)
+
+    return {
+        "meta": {
+            "mode": args.mode,
+            "database": database_url.split("://", 1)[0],
+            "workers": args.workers if args.mode == "socket" else 1,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "users": args.users,
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "scenarios": results,
+    }
+
+
+# -------------------------------------------------
+# Baseline comparison
+# -------------------------------------------------
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """List regressions: RPS drops or p95/p99 increases beyond ``threshold``."""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if base["rps"] and result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {result['rps']} < baseline {base['rps']}")
+        for pct in ("p95", "p99"):
+            now, then = result["latency_ms"][pct], base["latency_ms"][pct]
+            if now is not None and then and now > then * (1 + threshold):
+                regressions.append(f"{name}: {pct} {now}ms > baseline {then}ms")
+        if result["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {result['errors']} > baseline {base['errors']}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("asgi", "socket"), default="asgi")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1, help="socket mode: >1 uses app.serve")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.threshold)
+        report["comparison"] = {"baseline": str(args.compare), "threshold": args.threshold, "regressions": regressions}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
+    return 1 if report.get("comparison", {}).get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""List and insert latency of an unpartitioned vs hash-partitioned ``tasks``.
+
+Postgres only. Builds each layout in its own schema (``bench_plain`` and
+``bench_hash``), seeds it with synthetic rows server-side (generate_series,
+in committed chunks), then times the real service calls against it:
+
+- ``list``: ``task_service.get_tasks`` for random users;
+- ``insert``: ``task_service.create_task`` plus commit.
+
+The hash layout is made by ``partition_tasks_by_owner``, the same code as
+migration 10. Seeding 100M rows takes a while and needs tens of GB of disk;
+pass --keep to reuse the seeded schemas on the next run (--reuse).
+
+Usage (from the backend directory):
+    python -m benchmarks.partition_bench --database-url postgresql://... --rows 100000000
+    python -m benchmarks.partition_bench --database-url postgresql://... --rows 1000000 --partitions 32
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from app.health import percentile
+from app.migrations import partition_tasks_by_owner
+from app.schemas import TaskCreate
+from app.services import task_service
+
+SEED = 1234
+SEED_CHUNK = 5_000_000
+
+
+def _engine(database_url: str, schema: str) -> AsyncEngine:
+    return create_async_engine(database_url, connect_args={"server_settings": {"search_path": schema}})
+
+
+async def build(database_url: str, schema: str, rows: int, users: int, partitions: int) -> None:
+    """(Re)create ``schema`` with the app's tables, partitioned if asked, and seed it."""
+    admin = create_async_engine(database_url)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    await admin.dispose()
+
+    engine = _engine(database_url, schema)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+            if partitions:
+                await conn.run_sync(partition_tasks_by_owner, partitions)
+            await conn.execute(
+                text(
+                    "INSERT INTO users (id, email, full_name, phone_number, password_hash, created_at) "
+                    "SELECT g, 'bench' || g || '@example.com', 'User ' || g, (1000000000 + g)::text, 'x', now() "
+                    "FROM generate_series(1, :users) AS g"
+                ),
+                {"users": users},
+            )
+            await conn.execute(text("SELECT setval(pg_get_serial_sequence('users', 'id'), :users)"), {"users": users})
+        for start in range(1, rows + 1, SEED_CHUNK):
+            stop = min(start + SEED_CHUNK - 1, rows)
+            async with engine.begin() as conn:
+                await conn.execute(
+                    text(
+                        "INSERT INTO tasks (title, completed, priority, created_at, updated_at, owner_id, version) "
+                        "SELECT 'task ' || g, random() < 0.3, (ARRAY['low','medium','high'])[1 + g % 3], "
+                        "now() - (g % 100000) * interval '1 minute', now(), 1 + (hashint4(g) & 2147483647) % :users, 1 "
+                        "FROM generate_series(:start, :stop) AS g"
+                    ),
+                    {"start": start, "stop": stop, "users": users},
+                )
+            print(f"[{schema}] seeded {stop:,}/{rows:,} rows", flush=True)
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE tasks"))
+    finally:
+        await engine.dispose()
+
+
+async def measure(database_url: str, schema: str, users: int, samples: int) -> dict:
+    """Time ``samples`` list and insert calls; returns p50/p95/p99 in ms and sizes."""
+    rng = random.Random(SEED)
+    engine = _engine(database_url, schema)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    timings: dict[str, list[float]] = {"list": [], "insert": []}
+    try:
+        for _ in range(samples):
+            user_id = rng.randint(1, users)
+            async with factory() as session:
+                started = time.perf_counter()
+                await task_service.get_tasks(session, user_id)
+                timings["list"].append((time.perf_counter() - started) * 1000)
+
+                started = time.perf_counter()
+                await task_service.create_task(session, TaskCreate(title="bench insert"), user_id)
+                await session.commit()
+                timings["insert"].append((time.perf_counter() - started) * 1000)
+        async with engine.connect() as conn:
+            table_bytes, index_bytes = (
+                await conn.execute(
+                    text(
+                        "SELECT COALESCE(SUM(pg_table_size(c.oid)), 0), COALESCE(SUM(pg_indexes_size(c.oid)), 0) "
+                        "FROM pg_class c WHERE c.oid = 'tasks'::regclass "
+                        "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'tasks'::regclass)"
+                    )
+                )
+            ).one()
+    finally:
+        await engine.dispose()
+    return {
+        **{
+            op: {p: round(percentile(values, q), 3) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))}
+            for op, values in timings.items()
+        },
+        "table_bytes": table_bytes,
+        "index_bytes": index_bytes,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    layouts = {"bench_plain": 0, "bench_hash": args.partitions}
+    report = {
+        "meta": {"rows": args.rows, "users": args.users, "partitions": args.partitions, "samples": args.samples},
+        "layouts": {},
+    }
+    for schema, partitions in layouts.items():
+        if not args.reuse:
+            await build(args.database_url, schema, args.rows, args.users, partitions)
+        report["layouts"][schema.removeprefix("bench_")] = await measure(
+            args.database_url, schema, args.users, args.samples
+        )
+        if not args.keep:
+            admin = create_async_engine(args.database_url)
+            async with admin.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+            await admin.dispose()
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Postgres connection string")
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--partitions", type=int, default=16)
+    parser.add_argument("--samples", type=int, default=1000, help="timed calls per operation and layout")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded schemas")
+    parser.add_argument("--reuse", action="store_true", help="measure schemas kept by an earlier --keep run")
+    parser.add_argument("--output", default=None, help="also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    if args.database_url.startswith("postgresql://"):
+        args.database_url = args.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if not args.database_url.startswith("postgresql+asyncpg://"):
+        parser.error("partitioning is Postgres-only; pass a postgresql:// URL")
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+"""Micro-benchmarks for task_service and auth hot paths.
+
+Run from the backend directory (pytest-benchmark is a dev dependency):
+    pytest benchmarks/ --benchmark-only
+    pytest benchmarks/ --benchmark-autosave              # store a baseline
+    pytest benchmarks/ --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Each benchmark also records tracemalloc allocations in ``extra_info``
+(peak and net bytes per call), which ``--benchmark-json`` includes.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.auth import create_access_token, get_current_user_id
+from app.change_feed import ChangeHub
+from app.services.webhooks import Endpoint, WebhookDeliverer
+from app.schemas import TaskCreate, TaskResponse
+from app.services import task_service
+from app.utils.datetime_utils import ensure_aware_utc
+
+from benchmarks.conftest import BENCH_USER_ID, seed_tasks
+from benchmarks.webhook_receiver import create_receiver
+
+
+# -------------------------------------------------
+# task_service
+# -------------------------------------------------
+def test_create_task(benchmark, session, run_async, track_allocations):
+    payload = TaskCreate(title="  benchmark task  ", priority="high")
+    fn = run_async(task_service.create_task, session, payload, BENCH_USER_ID)
+    # Fixed rounds: every call grows the table, so keep runs comparable.
+    benchmark.pedantic(fn, rounds=200, iterations=1, warmup_rounds=5)
+    track_allocations(fn)
+
+
+def test_get_tasks(benchmark, session, run_async, track_allocations, dataset_size):
+    fn = run_async(task_service.get_tasks, session, BENCH_USER_ID)
+    tasks = benchmark(fn)
+    assert len(tasks) == dataset_size
+    track_allocations(fn)
+
+
+def test_get_tasks_filtered(benchmark, session, run_async, track_allocations):
+    fn = run_async(task_service.get_tasks, session, BENCH_USER_ID, "completed")
+    benchmark(fn)
+    track_allocations(fn)
+
+
+def test_update_task_status(benchmark, session, run_async, track_allocations):
+    state = {"completed": False}
+
+    async def toggle():
+        state["completed"] = not state["completed"]
+        return await task_service.update_task_status(session, 1, state["completed"], BENCH_USER_ID)
+
+    fn = run_async(toggle)
+    benchmark(fn)
+    track_allocations(fn)
+
+
+# -------------------------------------------------
+# auth
+# -------------------------------------------------
+def test_create_access_token(benchmark, track_allocations):
+    fn = lambda: create_access_token({"sub": str(BENCH_USER_ID), "email": "bench@example.com"})
+    benchmark(fn)
+    track_allocations(fn)
+
+
+def test_get_current_user_id(benchmark, run_async, track_allocations):
+    header = f"Bearer {create_access_token({'sub': str(BENCH_USER_ID)})}"
+    fn = run_async(get_current_user_id, header)
+    assert benchmark(fn) == BENCH_USER_ID
+    track_allocations(fn)
+
+
+# -------------------------------------------------
+# Change feed
+# -------------------------------------------------
+def test_change_feed_publish_with_10k_idle_streams(benchmark, track_allocations):
+    hub = ChangeHub(queue_size=100)
+    for user_id in range(10_000):
+        hub.subscribe(user_id)
+    watchers = [hub.subscribe(BENCH_USER_ID) for _ in range(3)]
+    change = {"type": "task.updated", "user_id": BENCH_USER_ID, "task_id": 1, "version": 2, "task": None}
+
+    def publish():
+        hub.publish(change)
+        for subscription in watchers:
+            subscription.queue.get_nowait()
+
+    benchmark(publish)
+    track_allocations(publish)
+    assert hub.stats()["connections"] == 10_003
+
+
+# -------------------------------------------------
+# Webhooks
+# -------------------------------------------------
+WEBHOOK_EVENTS = 1000
+
+
+def test_webhook_delivery_batched(benchmark, run_async):
+    """1000 events to one endpoint through a pooled client and in-process receiver."""
+    import httpx
+
+    receiver = create_receiver("bench-secret")
+    deliverer = WebhookDeliverer(
+        lambda: None,
+        batch_window=0.005,
+        allow_private_destinations=True,  # in-process receiver, nothing to resolve
+        transport=httpx.ASGITransport(app=receiver),
+    )
+    endpoint = Endpoint(1, "https://receiver.bench/hook", "bench-secret", ("task.",))
+    events = [
+        {"id": i, "type": "task.updated", "user_id": BENCH_USER_ID, "task_id": i} for i in range(WEBHOOK_EVENTS)
+    ]
+
+    async def deliver_all():
+        await asyncio.gather(*(deliverer.deliver(endpoint, event) for event in events))
+
+    benchmark(run_async(deliver_all))
+    run_async(deliverer.stop)()
+    if benchmark.stats is not None:  # None under --benchmark-disable
+        benchmark.extra_info["events_per_second"] = round(WEBHOOK_EVENTS / benchmark.stats.stats.mean)
+    assert receiver.state.receiver.stats()["bad_signatures"] == 0
+
+
+# -------------------------------------------------
+# Serialization and utils
+# -------------------------------------------------
+def test_task_response_serialization(benchmark, track_allocations, dataset_size):
+    tasks = seed_tasks(dataset_size)
+    for i, task in enumerate(tasks, start=1):
+        task.id = i
+
+    def serialize():
+        return [TaskResponse.model_validate(task).model_dump(mode="json") for task in tasks]
+
+    assert len(benchmark(serialize)) == dataset_size
+    track_allocations(serialize)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime(2025, 1, 1, 12),
+        datetime(2025, 1, 1, 12, tzinfo=timezone.utc),
+        datetime(2025, 1, 1, 7, tzinfo=timezone(timedelta(hours=-5))),
+    ],
+    ids=["naive", "utc", "offset"],
+)
+def test_ensure_aware_utc(benchmark, track_allocations, value):
+    fn = lambda: ensure_aware_utc(value)
+    assert benchmark(fn).tzinfo is not None
+    track_allocations(fn)
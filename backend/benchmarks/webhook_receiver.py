@@ -0,0 +1,89 @@
+"""Stand-in webhook receiver for local testing and delivery benchmarks.
+
+Verifies each delivery's HMAC signature, counts requests and events, and
+reports them at ``GET /stats``. Setting ``state.fail_status`` (or
+--fail-status) makes it answer every delivery with that status, to exercise
+retries and circuit breakers.
+
+``create_receiver(secret)`` returns the ASGI app, so tests can drive it
+in-process through ``httpx.ASGITransport``; or run it on a socket:
+
+    python -m benchmarks.webhook_receiver --secret <secret> --port 9000
+"""
+
+import argparse
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.services.webhooks import SIGNATURE_HEADER, TIMESTAMP_HEADER, verify
+
+
+@dataclass
+class ReceiverState:
+    secret: str
+    fail_status: Optional[int] = None
+    requests: int = 0
+    bad_signatures: int = 0
+    events: list[dict] = field(default_factory=list)
+    batch_sizes: list[int] = field(default_factory=list)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "events": len(self.events),
+            "unique_events": len({event["id"] for event in self.events}),
+            "bad_signatures": self.bad_signatures,
+            "max_batch": max(self.batch_sizes, default=0),
+        }
+
+
+def create_receiver(secret: str) -> Starlette:
+    state = ReceiverState(secret)
+
+    async def receive(request: Request) -> Response:
+        state.requests += 1
+        body = await request.body()
+        timestamp = request.headers.get(TIMESTAMP_HEADER, "")
+        if not verify(state.secret, timestamp, body, request.headers.get(SIGNATURE_HEADER, "")):
+            state.bad_signatures += 1
+            return Response(status_code=401)
+        if state.fail_status is not None:
+            return Response(status_code=state.fail_status)
+        events = json.loads(body)["events"]
+        state.events.extend(events)
+        state.batch_sizes.append(len(events))
+        return Response(status_code=204)
+
+    async def stats(request: Request) -> Response:
+        return JSONResponse(state.stats())
+
+    app = Starlette(routes=[Route("/hook", receive, methods=["POST"]), Route("/stats", stats)])
+    app.state.receiver = state
+    return app
+
+
+def main(argv: list[str] | None = None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--secret", required=True, help="the subscription's signing secret")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--fail-status", type=int, default=None, help="answer every delivery with this status")
+    args = parser.parse_args(argv)
+
+    app = create_receiver(args.secret)
+    app.state.receiver.fail_status = args.fail_status
+    print(f"Receiving webhooks at http://{args.host}:{args.port}/hook (stats at /stats)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
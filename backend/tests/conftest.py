@@ -12,6 +12,8 @@ Sets up test database, fixtures, and overrides for testing.
 """
 
 
+import inspect
+
 import pytest
 import pytest_asyncio
 from collections.abc import AsyncGenerator
@@ -25,15 +27,35 @@ from contextlib import asynccontextmanager
 import app.models  # noqa: F401
 
 from app.database import get_session
+from app.loop_watchdog import assert_loop_not_blocked
 
 
 # Test database URL - SQLite in-memory for testing
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
+# Async tests fail if they block the event loop longer than this
+LOOP_BLOCK_BUDGET_MS = float(os.getenv("LOOP_BLOCK_BUDGET_MS", "500"))
+
 # Test user ID for auth tests (must be integers for JWT auth)
 TEST_USER_ID = 123
 TEST_USER_ID_2 = 456
 
+@pytest_asyncio.fixture(autouse=True)
+async def loop_block_budget(request):
+    """Fail async tests that block the event loop beyond LOOP_BLOCK_BUDGET_MS.
+
+    Opt out with ``@pytest.mark.allow_loop_blocking`` for tests that block
+    on purpose.
+    """
+    if not inspect.iscoroutinefunction(request.function) or request.node.get_closest_marker(
+        "allow_loop_blocking"
+    ):
+        yield
+        return
+    async with assert_loop_not_blocked(LOOP_BLOCK_BUDGET_MS):
+        yield
+
+
 @pytest.fixture(scope="session")
 def test_database_url() -> str:
     """Return the in-memory SQLite database URL for tests."""
@@ -127,7 +149,7 @@ def client(test_engine: AsyncEngine, test_session: AsyncSession) -> TestClient:
     """
     from fastapi import FastAPI
     from fastapi.middleware.cors import CORSMiddleware
-    from app.routes import tasks, system
+    from app.routes import analytics, audit, bootstrap, tasks, system, webhooks
 
     # Create a test-specific lifespan that doesn't connect to production DB
     @asynccontextmanager
@@ -150,6 +172,10 @@ def client(test_engine: AsyncEngine, test_session: AsyncSession) -> TestClient:
 
     test_app.include_router(tasks.router)
     test_app.include_router(system.router)
+    test_app.include_router(webhooks.router)
+    test_app.include_router(audit.router)
+    test_app.include_router(bootstrap.router)
+    test_app.include_router(analytics.router)
 
     @test_app.get("/")
     async def root():
@@ -160,7 +186,9 @@ def client(test_engine: AsyncEngine, test_session: AsyncSession) -> TestClient:
         return {"status": "healthy", "database": {"status": "test"}}
 
     async def override_get_session() -> AsyncGenerator[AsyncSession, None]:
-        yield test_session
+        # Like get_db, a failed request's writes are rolled back (to a savepoint here)
+        async with test_session.begin_nested():
+            yield test_session
 
     test_app.dependency_overrides[get_session] = override_get_session
 
@@ -0,0 +1,119 @@
+"""Tests for the task activity rollups and trend queries."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Task, TaskArchive
+from app.schemas import TaskCreate, TaskUpdate
+from app.services import analytics, task_service
+
+DAY = datetime(2026, 3, 4, tzinfo=timezone.utc)  # a Wednesday
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def test_median_hours_interpolates_within_bin():
+    """Test the histogram median: bin bounds are 0-1h, 1-4h, 4-12h, ..."""
+    assert analytics.median_hours([0] * 10) is None
+    assert analytics.median_hours([0, 2, 0, 0, 0, 0, 0, 0, 0, 0]) == 2.5
+    assert analytics.median_hours([1, 0, 3, 0, 0, 0, 0, 0, 0, 0]) == 6.67
+    assert analytics.median_hours([0, 0, 0, 0, 0, 0, 0, 0, 0, 1]) == 720.0
+
+
+@pytest.mark.asyncio
+async def test_writes_are_rolled_up_as_events(test_session, test_user_id):
+    """Test that creations and pending-to-completed transitions land in hour and day buckets."""
+    tasks = [await task_service.create_task(test_session, TaskCreate(title=f"T{i}"), test_user_id) for i in range(3)]
+    await test_session.execute(
+        update(Task).where(Task.id == tasks[0].id).values(created_at=datetime.now(timezone.utc) - timedelta(hours=3))
+    )
+    await task_service.update_task(test_session, tasks[0].id, TaskUpdate(completed=True), test_user_id)
+    await task_service.update_task_status(test_session, tasks[1].id, True, test_user_id)
+    # Already completed: no second completion event
+    await task_service.update_task_status(test_session, tasks[1].id, True, test_user_id)
+    await task_service.delete_task(test_session, tasks[2].id, test_user_id)
+
+    now = datetime.now(timezone.utc)
+    for granularity in ("hour", "day"):
+        series = await analytics.trends(test_session, test_user_id, granularity, since=now - timedelta(days=1))
+        assert series["summary"]["created"] == 3
+        assert series["summary"]["completed"] == 2
+    summary = series["summary"]
+    assert summary["mean_hours_to_complete"] == pytest.approx(1.5, abs=0.01)
+    assert 0 < summary["median_hours_to_complete"] <= 1
+
+
+@pytest.mark.asyncio
+async def test_weekly_and_global_series(test_session, test_user_id, other_user_id):
+    """Test summing day buckets into ISO weeks and over users."""
+    done_in_2h = analytics.completion(DAY, DAY + timedelta(hours=2))
+    rows = [
+        analytics._row(test_user_id, "day", DAY, {"created": 2}),
+        analytics._row(test_user_id, "day", DAY + timedelta(days=1), {"created": 1, **done_in_2h}),
+        analytics._row(other_user_id, "day", DAY + timedelta(days=7), {"created": 5}),
+    ]
+    await analytics._upsert(test_session, rows)
+
+    weekly = await analytics.trends(test_session, test_user_id, "week")
+    assert [(p["bucket"], p["created"], p["completed"]) for p in weekly["points"]] == [(DAY - timedelta(days=2), 3, 1)]
+    assert weekly["points"][0]["median_hours_to_complete"] == 2.5
+
+    daily_global = await analytics.trends(test_session, None, "day", since=DAY, until=DAY + timedelta(days=8))
+    assert [p["created"] for p in daily_global["points"]] == [2, 1, 5]
+    assert daily_global["summary"]["created"] == 8
+
+
+@pytest.mark.asyncio
+async def test_backfill_rebuilds_history_in_chunks(session_factory, test_session, test_user_id):
+    """Test that backfill counts stored tasks before the cutoff, and can be rerun."""
+    await test_session.execute(
+        insert(Task),
+        [
+            {"title": "done", "completed": True, "priority": "low", "owner_id": test_user_id,
+             "created_at": DAY, "updated_at": DAY + timedelta(hours=30), "version": 1},
+            {"title": "open", "completed": False, "priority": "low", "owner_id": test_user_id,
+             "created_at": DAY, "updated_at": DAY, "version": 1},
+            {"title": "too new", "completed": False, "priority": "low", "owner_id": test_user_id,
+             "created_at": DAY + timedelta(days=10), "updated_at": DAY + timedelta(days=10), "version": 1},
+        ],
+    )
+    await test_session.execute(
+        insert(TaskArchive).values(
+            id=999, title="archived", completed=True, priority="low", owner_id=test_user_id, version=1,
+            created_at=DAY - timedelta(days=1), updated_at=DAY, archived_at=DAY,
+        )
+    )
+    await test_session.commit()
+
+    for _ in range(2):
+        assert await analytics.backfill(session_factory, until=DAY + timedelta(days=5), chunk_size=1) == 3
+        series = await analytics.trends(test_session, test_user_id, "day", since=DAY - timedelta(days=3))
+        assert [(p["bucket"], p["created"], p["completed"]) for p in series["points"]] == [
+            (DAY - timedelta(days=1), 1, 0),
+            (DAY, 2, 1),
+            (DAY + timedelta(days=1), 0, 1),
+        ]
+        assert series["summary"]["mean_hours_to_complete"] == 27.0
+
+
+def test_trends_endpoint(client, auth_headers):
+    """Test the caller's trends, range validation and the admin-only global view."""
+    client.post("/api/tasks", json={"title": "Counted"}, headers=auth_headers)
+
+    response = client.get("/api/analytics/trends", params={"granularity": "hour"}, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["granularity"] == "hour"
+    assert body["summary"]["created"] == 1
+    assert len(body["points"]) == 1
+
+    too_long = {"granularity": "hour", "since": "2020-01-01T00:00:00Z"}
+    assert client.get("/api/analytics/trends", params=too_long, headers=auth_headers).status_code == 400
+    assert client.get("/api/analytics/trends/global", headers=auth_headers).status_code == 403
@@ -2,6 +2,8 @@
 
 import pytest
 
+from app.config import get_settings
+
 def test_list_tasks_empty(client, auth_headers):
     """Test GET /api/tasks returns an empty list when no tasks exist."""
     response = client.get("/api/tasks", headers=auth_headers)
@@ -160,3 +162,23 @@ def test_db_health_endpoint(client):
     assert data["database_ok"] is True
     assert "sample_time" in data
 
+
+def test_permissions_endpoint_is_read_only(client, auth_headers, other_auth_headers, test_user_id, monkeypatch):
+    """Test that /api/system/permissions is admin-only and reports privileges without running DDL."""
+    monkeypatch.setenv("ADMIN_USER_IDS", str(test_user_id))
+    get_settings.cache_clear()
+    try:
+        assert client.get("/api/system/permissions").status_code == 401
+        assert client.get("/api/system/permissions", headers=other_auth_headers).status_code == 403
+
+        response = client.get("/api/system/permissions", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["dialect"] == "sqlite"
+        assert data["can_create_table"] is True
+        assert "checked_at" in data
+        # Served from cache on repeat calls
+        repeat = client.get("/api/system/permissions", headers=auth_headers)
+        assert repeat.json()["checked_at"] == data["checked_at"]
+    finally:
+        get_settings.cache_clear()
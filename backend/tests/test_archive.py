@@ -0,0 +1,154 @@
+"""Tests for archiving old completed tasks into tasks_archive."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.exceptions import TaskNotFoundError, TaskVersionConflictError
+from app.models import Task, TaskArchive
+from app.schemas import TaskCreate
+from app.services import task_service
+from app.services.archive import archive_batch, run_archival
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _seed(session, user_id, *, old_completed=0, old_pending=0, recent_completed=0):
+    """Create tasks; "old" ones were last updated 200 days ago. Returns old completed ids."""
+    old_ids = []
+    for index in range(old_completed + old_pending + recent_completed):
+        task = await task_service.create_task(session, TaskCreate(title=f"Task {index}"), user_id)
+        completed = index < old_completed or index >= old_completed + old_pending
+        old = index < old_completed + old_pending
+        await session.execute(
+            update(Task)
+            .where(Task.id == task.id)
+            .values(
+                completed=completed,
+                created_at=datetime.now(timezone.utc) - timedelta(days=300 - index),
+                updated_at=datetime.now(timezone.utc) - timedelta(days=200 if old else 1),
+            )
+        )
+        if index < old_completed:
+            old_ids.append(task.id)
+    await session.commit()
+    return old_ids
+
+
+async def _count(session, model):
+    return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_archive_batch_moves_only_old_completed_tasks(test_session, test_user_id):
+    """Test that pending and recently completed tasks stay in the hot table."""
+    old_ids = await _seed(test_session, test_user_id, old_completed=3, old_pending=2, recent_completed=2)
+    cutoff = datetime.now(timezone.utc) - timedelta(days=90)
+
+    moved, owners = await archive_batch(test_session, cutoff, batch_size=10)
+    await test_session.commit()
+
+    assert (moved, owners) == (3, {test_user_id})
+    assert await _count(test_session, Task) == 4
+    archived = (await test_session.execute(select(TaskArchive).order_by(TaskArchive.id))).scalars().all()
+    assert [task.id for task in archived] == old_ids
+    assert all(task.completed and task.version == 1 and task.archived_at is not None for task in archived)
+
+
+@pytest.mark.asyncio
+async def test_run_archival_works_in_batches(session_factory, test_session, test_user_id):
+    """Test that archival commits batch by batch and honours max_batches."""
+    await _seed(test_session, test_user_id, old_completed=5, recent_completed=1)
+
+    assert await run_archival(session_factory, after_days=90, batch_size=2, pause=0, max_batches=1) == 2
+    assert await _count(test_session, TaskArchive) == 2
+    assert await run_archival(session_factory, after_days=90, batch_size=2, pause=0) == 3
+    assert await run_archival(session_factory, after_days=90, batch_size=2, pause=0) == 0
+    assert (await _count(test_session, Task), await _count(test_session, TaskArchive)) == (1, 5)
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_includes_archived_only_on_request(session_factory, test_session, test_user_id):
+    """Test that archived tasks are hidden by default and merged newest first on request."""
+    await _seed(test_session, test_user_id, old_completed=2, old_pending=1, recent_completed=1)
+    await run_archival(session_factory, after_days=90, pause=0)
+
+    live = await task_service.get_tasks(test_session, test_user_id)
+    assert len(live) == 2
+    assert not any(isinstance(task, TaskArchive) for task in live)
+
+    everything = await task_service.get_tasks(test_session, test_user_id, include_archived=True)
+    assert len(everything) == 4
+    assert [isinstance(task, TaskArchive) for task in everything] == [False, False, True, True]
+    assert [task.title for task in everything] == ["Task 3", "Task 2", "Task 1", "Task 0"]
+
+    pending = await task_service.get_tasks(test_session, test_user_id, status="pending", include_archived=True)
+    assert [task.title for task in pending] == ["Task 2"]
+
+
+@pytest.mark.asyncio
+async def test_archived_tasks_are_reachable_by_id(session_factory, test_session, test_user_id):
+    """Test that get_task_by_id falls back to tasks_archive (still per owner)."""
+    (task_id,) = await _seed(test_session, test_user_id, old_completed=1)
+    await run_archival(session_factory, after_days=90, pause=0)
+
+    task = await task_service.get_task_by_id(test_session, task_id, test_user_id)
+    assert isinstance(task, TaskArchive) and task.archived
+    with pytest.raises(TaskNotFoundError):
+        await task_service.get_task_by_id(test_session, task_id, test_user_id + 1)
+
+
+@pytest.mark.asyncio
+async def test_delete_task_removes_archived_task(session_factory, test_session, test_user_id):
+    """Test that delete_task falls back to tasks_archive and honours the version."""
+    (task_id,) = await _seed(test_session, test_user_id, old_completed=1)
+    await run_archival(session_factory, after_days=90, pause=0)
+
+    with pytest.raises(TaskVersionConflictError):
+        await task_service.delete_task(test_session, task_id, test_user_id, expected_version=7)
+    await task_service.delete_task(test_session, task_id, test_user_id, expected_version=1)
+    await test_session.commit()
+
+    assert await _count(test_session, TaskArchive) == 0
+    with pytest.raises(TaskNotFoundError):
+        await task_service.delete_task(test_session, task_id, test_user_id)
+
+
+@pytest.mark.asyncio
+async def test_archived_task_endpoints(client, auth_headers, session_factory, test_session, test_user_id):
+    """Test that an archived task can be fetched and deleted, but not edited."""
+    (task_id,) = await _seed(test_session, test_user_id, old_completed=1)
+    await run_archival(session_factory, after_days=90, pause=0)
+
+    response = client.get(f"/api/tasks/{task_id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["archived"] is True
+    assert response.headers["ETag"] == '"1"'
+
+    assert client.put(f"/api/tasks/{task_id}", json={"title": "New"}, headers=auth_headers).status_code == 409
+    status = client.patch(f"/api/tasks/{task_id}/status", json={"completed": False}, headers=auth_headers)
+    assert status.status_code == 409
+
+    assert client.delete(f"/api/tasks/{task_id}", headers=auth_headers).status_code == 204
+    assert client.get(f"/api/tasks/{task_id}", headers=auth_headers).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_list_endpoint_include_archived(client, auth_headers, session_factory, test_session, test_user_id):
+    """Test the include_archived query parameter and the archived flag."""
+    await _seed(test_session, test_user_id, old_completed=1, recent_completed=1)
+    await run_archival(session_factory, after_days=90, pause=0)
+
+    default = client.get("/api/tasks", headers=auth_headers)
+    assert default.status_code == 200
+    assert [task["archived"] for task in default.json()] == [False]
+
+    response = client.get("/api/tasks", params={"include_archived": "true"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [task["archived"] for task in response.json()] == [False, True]
@@ -0,0 +1,147 @@
+"""Tests for the batched, append-only audit log."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app import audit
+from app.audit import AuditLog, get_audit_log
+from app.schemas import TaskCreate
+from app.services import task_service
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _entry(user_id, minutes, task_id=1, action="task.updated"):
+    return {
+        "occurred_at": T0 + timedelta(minutes=minutes),
+        "user_id": user_id,
+        "action": action,
+        "task_id": task_id,
+        "version": 1,
+        "request_id": None,
+        "details": None,
+    }
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_entries_are_buffered_on_commit_only(test_session, test_user_id):
+    """Test that committed task writes reach the buffer and rolled-back ones don't."""
+    audit_log = get_audit_log()
+    before = audit_log.stats()["buffered"]
+
+    task_id = (await task_service.create_task(test_session, TaskCreate(title="Audited"), test_user_id)).id
+    assert audit_log.stats()["buffered"] == before
+    await test_session.commit()
+    await task_service.delete_task(test_session, task_id, test_user_id)
+    await test_session.rollback()
+
+    assert audit_log.stats()["buffered"] == before + 1
+    entry = audit_log._buffer[-1]
+    assert (entry["action"], entry["task_id"], entry["version"]) == ("task.created", task_id, 1)
+
+
+@pytest.mark.asyncio
+async def test_flush_and_query_by_user_and_time(session_factory, test_session, test_user_id, other_user_id):
+    """Test batched flushing and the indexed user/time-range query."""
+    audit_log = AuditLog(session_factory, batch_size=2)
+    for minutes in range(5):
+        audit_log.enqueue(_entry(test_user_id, minutes, task_id=minutes % 2))
+    audit_log.enqueue(_entry(other_user_id, 2))
+
+    assert await audit_log.flush() == 6
+    assert audit_log.stats()["buffered"] == 0
+
+    entries = await audit.query(
+        test_session, test_user_id, since=T0 + timedelta(minutes=1), until=T0 + timedelta(minutes=4)
+    )
+    assert [e.occurred_at.minute for e in entries] == [3, 2, 1]
+    entries = await audit.query(test_session, test_user_id, task_id=0, limit=2)
+    assert [e.occurred_at.minute for e in entries] == [4, 2]
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_newest", [0, 1]), ("drop_oldest", [1, 2])])
+def test_overflow_policy_bounds_memory(session_factory, policy, kept):
+    """Test that a full buffer drops entries per AUDIT_OVERFLOW_POLICY."""
+    audit_log = AuditLog(session_factory, max_buffer=2, overflow_policy=policy)
+    accepted = [audit_log.enqueue(_entry(1, minutes)) for minutes in range(3)]
+
+    assert accepted == [True, True, False]
+    assert [e["occurred_at"].minute for e in audit_log._buffer] == kept
+    assert audit_log.stats()["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_entries_for_retry():
+    """Test that entries of a failed flush go back to the buffer."""
+
+    def broken_factory():
+        raise ConnectionError("database down")
+
+    audit_log = AuditLog(broken_factory, batch_size=2)
+    for minutes in range(3):
+        audit_log.enqueue(_entry(1, minutes))
+
+    with pytest.raises(ConnectionError):
+        await audit_log.flush()
+    assert [e["occurred_at"].minute for e in audit_log._buffer] == [0, 1, 2]
+    assert audit_log.stats()["failed_flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting(session_factory, test_session, test_user_id):
+    """Test that reaching AUDIT_BATCH_SIZE wakes the flusher before the interval."""
+    audit_log = AuditLog(session_factory, batch_size=3, flush_interval=60)
+    audit_log.start()
+    try:
+        for minutes in range(3):
+            audit_log.enqueue(_entry(test_user_id, minutes))
+        for _ in range(100):
+            if audit_log.stats()["written"] == 3:
+                break
+            await asyncio.sleep(0.01)
+        assert audit_log.stats()["written"] == 3
+    finally:
+        await audit_log.stop()
+
+
+@pytest.mark.asyncio
+async def test_audit_endpoint(client, auth_headers, session_factory, test_user_id, other_user_id):
+    """Test that GET /api/audit returns only the caller's history, newest first."""
+    audit_log = AuditLog(session_factory)
+    audit_log.enqueue({**_entry(test_user_id, 0), "details": '{"title": "A"}'})
+    audit_log.enqueue(_entry(test_user_id, 5, action="task.deleted"))
+    audit_log.enqueue(_entry(other_user_id, 3))
+    await audit_log.flush()
+
+    response = client.get("/api/audit", headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [e["action"] for e in body] == ["task.deleted", "task.updated"]
+    assert body[1]["details"] == {"title": "A"}
+
+    paged = client.get("/api/audit", params={"until": body[0]["occurred_at"]}, headers=auth_headers).json()
+    assert [e["action"] for e in paged] == ["task.updated"]
+
+
+@pytest.mark.asyncio
+async def test_keyset_paging_keeps_entries_sharing_a_timestamp(client, auth_headers, session_factory, test_user_id):
+    """Test that paging by (occurred_at, id) doesn't skip a batch written at one instant."""
+    audit_log = AuditLog(session_factory)
+    for task_id in range(5):
+        audit_log.enqueue(_entry(test_user_id, 1, task_id=task_id))
+    await audit_log.flush()
+
+    seen, params = [], {"limit": 2}
+    while page := client.get("/api/audit", params=params, headers=auth_headers).json():
+        seen += [e["task_id"] for e in page]
+        params = {"limit": 2, "until": page[-1]["occurred_at"], "before_id": page[-1]["id"]}
+    assert seen == [4, 3, 2, 1, 0]
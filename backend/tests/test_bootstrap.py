@@ -0,0 +1,96 @@
+"""Tests for the one-request dashboard bootstrap."""
+
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from app.models import User
+from app.schemas import TaskCreate
+from app.services import bootstrap, task_service
+
+
+def _user(user_id):
+    return User(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        full_name="Boot Strap",
+        phone_number=str(user_id),
+        password_hash="x",
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+@pytest_asyncio.fixture
+async def existing_user(test_session, test_user_id):
+    test_session.add(_user(test_user_id))
+    await test_session.flush()
+    return test_user_id
+
+
+def test_bootstrap_bundles_profile_tasks_and_stats(client, auth_headers, existing_user):
+    """Test that one response carries the profile, the first page and the counts."""
+    for title in ("First", "Second", "Third"):
+        client.post("/api/tasks", json={"title": title}, headers=auth_headers)
+
+    response = client.get("/api/bootstrap", params={"limit": 2}, headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user"]["id"] == existing_user
+    assert [task["title"] for task in body["tasks"]] == ["Third", "Second"]
+    assert body["has_more_tasks"] is True
+    assert body["stats"]["total"] == 3
+
+
+def test_bootstrap_etag_covers_the_bundle(client, auth_headers, existing_user):
+    """Test 304 on an unchanged bundle and a new ETag after any write."""
+    first = client.get("/api/bootstrap", headers=auth_headers)
+    etag = first.headers["ETag"]
+
+    unchanged = client.get("/api/bootstrap", headers={**auth_headers, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers["ETag"] == etag
+
+    client.post("/api/tasks", json={"title": "New"}, headers=auth_headers)
+    changed = client.get("/api/bootstrap", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_bootstrap_unknown_user(client, auth_headers):
+    """Test 404 when the token's user no longer exists."""
+    assert client.get("/api/bootstrap", headers=auth_headers).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_match_sequential(tmp_path, test_user_id):
+    """Test that fanning the reads out over separate connections gives the same bundle."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/bootstrap.db")
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with factory() as session:
+            session.add(_user(test_user_id))
+            for title in ("One", "Two"):
+                await task_service.create_task(session, TaskCreate(title=title), test_user_id)
+            await session.commit()
+
+            sequential = await bootstrap.load(session, test_user_id, task_limit=5)
+            concurrent = await bootstrap.load(session, test_user_id, task_limit=5, session_factory=factory)
+    finally:
+        await engine.dispose()
+
+    assert concurrent["user"].id == sequential["user"].id
+    assert [task.id for task in concurrent["tasks"]] == [task.id for task in sequential["tasks"]]
+    assert concurrent["stats"] == sequential["stats"] == {
+        "total": 2,
+        "completed": 0,
+        "pending": 2,
+        "by_priority": {"low": 0, "medium": 2, "high": 0},
+    }
+    assert concurrent["has_more_tasks"] is False
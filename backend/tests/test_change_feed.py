@@ -0,0 +1,100 @@
+"""Tests for the live task change feed (hub, commit hooks and SSE frames)."""
+
+import json
+
+import pytest
+from app.change_feed import ChangeFeed, ChangeHub, MemoryBroker, _encode_notify, get_change_feed
+from app.schemas import TaskCreate
+from app.services import task_service
+
+
+def _change(user_id, task_id=1, change_type="task.updated"):
+    return {"type": change_type, "user_id": user_id, "task_id": task_id, "version": 1, "task": None}
+
+
+@pytest.mark.asyncio
+async def test_hub_routes_changes_to_owner_only():
+    """Test that a change reaches every connection of its user and nobody else."""
+    hub = ChangeHub(queue_size=10)
+    mine = [hub.subscribe(1), hub.subscribe(1)]
+    other = hub.subscribe(2)
+
+    hub.publish(_change(1))
+
+    assert [sub.queue.qsize() for sub in mine] == [1, 1]
+    assert other.queue.empty()
+    assert hub.stats()["connections"] == 3
+
+    hub.unsubscribe(other)
+    assert hub.stats()["users"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_dropped():
+    """Test that a full queue drops that consumer without affecting others."""
+    hub = ChangeHub(queue_size=2)
+    slow, fast = hub.subscribe(1), hub.subscribe(1)
+
+    for task_id in range(3):
+        hub.publish(_change(1, task_id))
+        fast.queue.get_nowait()
+
+    assert slow.dropped
+    assert not fast.dropped
+    assert hub.stats()["dropped_consumers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_changes_publish_on_commit_only(test_session, test_user_id):
+    """Test that task_service events are sent after commit and discarded on rollback."""
+    subscription = get_change_feed().hub.subscribe(test_user_id)
+    try:
+        task = await task_service.create_task(test_session, TaskCreate(title="Live"), test_user_id)
+        assert subscription.queue.empty()
+
+        await test_session.commit()
+        change = subscription.queue.get_nowait()
+        assert change["type"] == "task.created"
+        assert change["task"]["title"] == "Live"
+
+        await task_service.delete_task(test_session, task.id, test_user_id)
+        await test_session.rollback()
+        assert subscription.queue.empty()
+    finally:
+        get_change_feed().hub.unsubscribe(subscription)
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_sse_frames():
+    """Test the SSE framing: events, keep-alives and the reset on drop."""
+    hub = ChangeHub(queue_size=1)
+    feed = ChangeFeed(hub, MemoryBroker(hub), heartbeat_seconds=0.01)
+    stream = feed.stream(7)
+
+    assert await anext(stream) == "retry: 3000\n\n"
+    assert await anext(stream) == ": keep-alive\n\n"
+
+    hub.publish(_change(7, change_type="task.deleted"))
+    frame = await anext(stream)
+    assert frame.startswith("event: task.deleted\ndata: ")
+    assert json.loads(frame.split("data: ", 1)[1])["task_id"] == 1
+
+    hub.publish(_change(7))
+    hub.publish(_change(7))  # queue of one overflows
+    assert await anext(stream) == "event: reset\ndata: {}\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert hub.stats()["connections"] == 0
+
+
+def test_oversized_notify_payload_omits_snapshot():
+    """Test that NOTIFY payloads stay under the Postgres limit."""
+    change = {**_change(1), "task": {"title": "x" * 10_000}}
+    payload = json.loads(_encode_notify(change))
+    assert payload["task"] is None
+    assert payload["task_id"] == 1
+
+
+def test_stream_requires_auth(client):
+    """Test that the change stream is per authenticated user."""
+    assert client.get("/api/tasks/stream").status_code in (401, 403)
@@ -0,0 +1,125 @@
+"""Unit tests for single-flight read coalescing."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.schemas import TaskCreate
+from app.services.task_service import create_task, get_tasks
+from app.utils.coalesce import _inflight, coalesce, invalidate
+
+TEST_USER_ID = 123
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_call(session_factory):
+    """Test that identical concurrent calls execute the function once, on a session of its own."""
+    sessions = []
+    release = asyncio.Event()
+
+    @coalesce()
+    async def read(session, user_id: int, status: str | None = None):
+        sessions.append(session)
+        await release.wait()
+        return [user_id, status]
+
+    callers = [session_factory() for _ in range(3)]
+    first = asyncio.ensure_future(read(callers[0], TEST_USER_ID))
+    second = asyncio.ensure_future(read(callers[1], TEST_USER_ID))
+    other = asyncio.ensure_future(read(callers[2], TEST_USER_ID, "pending"))
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(first, second, other)
+    assert len(sessions) == 2
+    assert not any(session in callers for session in sessions)
+    assert results[0] == results[1] == [TEST_USER_ID, None]
+    assert results[0] is not results[1]
+    assert results[2] == [TEST_USER_ID, "pending"]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_detaches_in_flight_read(session_factory):
+    """Test that a read issued after invalidate() does not join the old future."""
+    calls = 0
+    release = asyncio.Event()
+
+    @coalesce()
+    async def read(session, user_id: int):
+        nonlocal calls
+        calls += 1
+        call_number = calls
+        await release.wait()
+        return call_number
+
+    before = asyncio.ensure_future(read(session_factory(), TEST_USER_ID))
+    await asyncio.sleep(0)
+    invalidate(TEST_USER_ID)
+    after = asyncio.ensure_future(read(session_factory(), TEST_USER_ID))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await before == 1
+    assert await after == 2
+
+
+@pytest.mark.asyncio
+async def test_get_tasks_returns_detached_copies(test_session, session_factory):
+    """Test that each caller of a coalesced get_tasks gets its own detached instances."""
+    await create_task(test_session, TaskCreate(title="Shared"), user_id=TEST_USER_ID)
+    await test_session.commit()
+
+    first, second = await asyncio.gather(
+        get_tasks(session_factory(), TEST_USER_ID),
+        get_tasks(session_factory(), TEST_USER_ID),
+    )
+    assert [t.title for t in first] == [t.title for t in second] == ["Shared"]
+    assert first[0] is not second[0]
+    assert inspect(first[0]).detached
+
+
+@pytest.mark.asyncio
+async def test_cancelled_first_caller_does_not_fail_joined_callers(test_session, session_factory):
+    """Test that cancelling the caller that started the shared read, and closing its session, is harmless."""
+    await create_task(test_session, TaskCreate(title="Survives"), user_id=TEST_USER_ID)
+    await test_session.commit()
+
+    first_session = session_factory()
+    first = asyncio.ensure_future(get_tasks(first_session, TEST_USER_ID))
+    await asyncio.sleep(0)
+    joined = asyncio.ensure_future(get_tasks(session_factory(), TEST_USER_ID))
+    await asyncio.sleep(0)
+    first.cancel()
+    await first_session.close()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert [t.title for t in await joined] == ["Survives"]
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_on_commit(test_session):
+    """Test that a write detaches in-flight reads when it commits, not when it flushes."""
+    release = asyncio.Event()
+
+    @coalesce()
+    async def read(session, user_id: int):
+        await release.wait()
+
+    pending = asyncio.ensure_future(read(test_session, TEST_USER_ID))
+    await asyncio.sleep(0)
+    await create_task(test_session, TaskCreate(title="Write"), user_id=TEST_USER_ID)
+    assert TEST_USER_ID in _inflight
+    await test_session.commit()
+    assert TEST_USER_ID not in _inflight
+
+    release.set()
+    await pending
@@ -0,0 +1,110 @@
+"""Tests for optimistic concurrency control (row versions, ETag and If-Match)."""
+
+import pytest
+from app.exceptions import TaskVersionConflictError
+from app.schemas import TaskCreate, TaskUpdate
+from app.services import task_service
+
+
+def _create(client, auth_headers, title="Task"):
+    response = client.post("/api/tasks", json={"title": title}, headers=auth_headers)
+    assert response.status_code == 201
+    return response
+
+
+def test_reads_and_writes_return_etag(client, auth_headers):
+    """Test that the ETag tracks the task's version across writes."""
+    created = _create(client, auth_headers)
+    task_id = created.json()["id"]
+    assert created.headers["ETag"] == '"1"'
+    assert created.json()["version"] == 1
+
+    updated = client.put(f"/api/tasks/{task_id}", json={"title": "Renamed"}, headers=auth_headers)
+    assert updated.headers["ETag"] == '"2"'
+
+    fetched = client.get(f"/api/tasks/{task_id}", headers=auth_headers)
+    assert fetched.headers["ETag"] == '"2"'
+    assert fetched.json()["version"] == 2
+
+
+def test_matching_if_match_applies_write(client, auth_headers):
+    """Test that a write conditioned on the current ETag succeeds."""
+    created = _create(client, auth_headers)
+    task_id = created.json()["id"]
+    headers = {**auth_headers, "If-Match": created.headers["ETag"]}
+
+    response = client.patch(f"/api/tasks/{task_id}/status", json={"completed": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["completed"] is True
+    assert response.headers["ETag"] == '"2"'
+
+
+def test_stale_if_match_is_rejected(client, auth_headers):
+    """Test that a lost update is refused with 412 and the current ETag."""
+    created = _create(client, auth_headers)
+    task_id = created.json()["id"]
+    stale = {**auth_headers, "If-Match": created.headers["ETag"]}
+
+    assert client.put(f"/api/tasks/{task_id}", json={"title": "First"}, headers=stale).status_code == 200
+    response = client.put(f"/api/tasks/{task_id}", json={"title": "Second"}, headers=stale)
+
+    assert response.status_code == 412
+    assert response.headers["ETag"] == '"2"'
+    assert client.get(f"/api/tasks/{task_id}", headers=auth_headers).json()["title"] == "First"
+
+
+def test_stale_if_match_blocks_delete(client, auth_headers):
+    """Test that DELETE honours If-Match."""
+    task_id = _create(client, auth_headers).json()["id"]
+    client.patch(f"/api/tasks/{task_id}/status", json={"completed": True}, headers=auth_headers)
+
+    stale = client.delete(f"/api/tasks/{task_id}", headers={**auth_headers, "If-Match": '"1"'})
+    assert stale.status_code == 412
+
+    current = client.delete(f"/api/tasks/{task_id}", headers={**auth_headers, "If-Match": 'W/"2"'})
+    assert current.status_code == 204
+
+
+def test_if_match_wildcard_and_garbage(client, auth_headers):
+    """Test that ``*`` is unconditional and an unparseable ETag never matches."""
+    task_id = _create(client, auth_headers).json()["id"]
+    url = f"/api/tasks/{task_id}"
+
+    garbage = client.put(url, json={"title": "X"}, headers={**auth_headers, "If-Match": '"abc"'})
+    assert garbage.status_code == 412
+    wildcard = client.put(url, json={"title": "X"}, headers={**auth_headers, "If-Match": "*"})
+    assert wildcard.status_code == 200
+
+
+def test_if_match_lists(client, auth_headers):
+    """Test that a comma-separated If-Match matches any listed ETag (RFC 9110)."""
+    task_id = _create(client, auth_headers).json()["id"]
+    url = f"/api/tasks/{task_id}"
+
+    stale = client.put(url, json={"title": "X"}, headers={**auth_headers, "If-Match": '"7", "8"'})
+    assert stale.status_code == 412
+    listed = client.put(url, json={"title": "X"}, headers={**auth_headers, "If-Match": '"abc", "9", "1"'})
+    assert listed.status_code == 200
+    assert listed.headers["ETag"] == '"2"'
+    wildcard = client.put(url, json={"title": "Y"}, headers={**auth_headers, "If-Match": '"1", *'})
+    assert wildcard.status_code == 200
+
+
+def test_if_match_on_missing_task_is_404(client, auth_headers):
+    """Test that a missing task is reported as 404 rather than a conflict."""
+    response = client.put("/api/tasks/99999", json={"title": "X"}, headers={**auth_headers, "If-Match": '"1"'})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_service_conditional_update(test_session, test_user_id):
+    """Test that the service bumps the version and raises on a stale one."""
+    task = await task_service.create_task(test_session, TaskCreate(title="Service"), test_user_id)
+    updated = await task_service.update_task(
+        test_session, task.id, TaskUpdate(title="Renamed"), test_user_id, expected_version=1
+    )
+    assert (updated.title, updated.version) == ("Renamed", 2)
+
+    with pytest.raises(TaskVersionConflictError) as exc_info:
+        await task_service.update_task_status(test_session, task.id, True, test_user_id, expected_version=1)
+    assert exc_info.value.current_version == 2
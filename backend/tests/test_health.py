@@ -0,0 +1,52 @@
+"""Unit tests for the background database health prober."""
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.health import HealthProber, percentile
+
+
+def test_percentile_nearest_rank():
+    """Test nearest-rank percentiles over a small window."""
+    values = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 99) == 5.0
+    assert percentile([], 50) is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_reports_window(test_engine):
+    """Test that probes are recorded and summarized from memory."""
+    prober = HealthProber(test_engine, interval=60, window=3, timeout=5)
+    for _ in range(4):
+        await prober.probe()
+
+    snapshot = await prober.snapshot()
+    assert snapshot["status"] == "healthy"
+    assert snapshot["window"] == {"samples": 3, "failures": 0}
+    assert snapshot["latency_ms"]["p95"] is not None
+    assert snapshot["last_check"].endswith("Z")
+    assert "class" in snapshot["pool"]
+
+
+@pytest.mark.asyncio
+async def test_latest_reuses_fresh_sample(test_engine):
+    """Test that a fresh sample is served without probing again."""
+    prober = HealthProber(test_engine, interval=60, window=10, timeout=5)
+    first = await prober.latest()
+    second = await prober.latest()
+    assert first is second
+    assert len(prober.samples) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_marks_unhealthy():
+    """Test that probe errors are reported instead of raised."""
+    engine = create_async_engine("sqlite+aiosqlite:////nonexistent-dir/todo.db")
+    prober = HealthProber(engine, interval=60, window=10, timeout=5)
+
+    snapshot = await prober.snapshot()
+    assert snapshot["status"] == "unhealthy"
+    assert snapshot["error"]
+    assert snapshot["latency_ms"]["p50"] is None
+    await engine.dispose()
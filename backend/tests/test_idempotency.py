@@ -0,0 +1,104 @@
+"""Tests for Idempotency-Key support on task writes."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.models import IdempotencyKey
+from app.services.idempotency import claim
+
+
+def test_retried_create_replays_first_response(client, auth_headers):
+    """Test that a retried POST returns the stored response without a duplicate."""
+    headers = {**auth_headers, "Idempotency-Key": "create-1"}
+    first = client.post("/api/tasks", json={"title": "Buy milk"}, headers=headers)
+    second = client.post("/api/tasks", json={"title": "Buy milk"}, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.headers["ETag"] == first.headers["ETag"] == '"1"'
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(client.get("/api/tasks", headers=auth_headers).json()) == 1
+
+
+def test_key_reused_with_different_body_is_rejected(client, auth_headers):
+    """Test that a key can't be replayed for a different request."""
+    headers = {**auth_headers, "Idempotency-Key": "create-2"}
+    assert client.post("/api/tasks", json={"title": "A"}, headers=headers).status_code == 201
+    response = client.post("/api/tasks", json={"title": "B"}, headers=headers)
+    assert response.status_code == 422
+    assert "already used" in response.json()["detail"]
+
+
+def test_keys_are_scoped_per_user(client, auth_headers, other_auth_headers):
+    """Test that two users may use the same key independently."""
+    for headers in (auth_headers, other_auth_headers):
+        response = client.post("/api/tasks", json={"title": "Mine"}, headers={**headers, "Idempotency-Key": "k"})
+        assert response.status_code == 201
+        assert "Idempotent-Replayed" not in response.headers
+
+
+def test_failed_request_is_not_stored(client, auth_headers):
+    """Test that errors release the key so a retry executes again."""
+    headers = {**auth_headers, "Idempotency-Key": "status-1"}
+    for _ in range(2):
+        response = client.patch("/api/tasks/999/status", json={"completed": True}, headers=headers)
+        assert response.status_code == 404
+
+
+def test_status_change_replay(client, auth_headers):
+    """Test that a retried PATCH /status replays the stored task."""
+    task_id = client.post("/api/tasks", json={"title": "T"}, headers=auth_headers).json()["id"]
+    headers = {**auth_headers, "Idempotency-Key": "status-2"}
+    first = client.patch(f"/api/tasks/{task_id}/status", json={"completed": True}, headers=headers)
+    second = client.patch(f"/api/tasks/{task_id}/status", json={"completed": True}, headers=headers)
+    assert first.json() == second.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.headers["ETag"] == first.headers["ETag"] == '"2"'
+
+
+def test_update_replay(client, auth_headers):
+    """Test that a retried PUT replays the stored task instead of editing again."""
+    task_id = client.post("/api/tasks", json={"title": "T"}, headers=auth_headers).json()["id"]
+    headers = {**auth_headers, "Idempotency-Key": "update-1", "If-Match": '"1"'}
+    first = client.put(f"/api/tasks/{task_id}", json={"title": "Renamed"}, headers=headers)
+    second = client.put(f"/api/tasks/{task_id}", json={"title": "Renamed"}, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.headers["ETag"] == first.headers["ETag"] == '"2"'
+
+
+def test_delete_replay(client, auth_headers):
+    """Test that a retried DELETE replays 204 rather than returning 404."""
+    task_id = client.post("/api/tasks", json={"title": "T"}, headers=auth_headers).json()["id"]
+    headers = {**auth_headers, "Idempotency-Key": "delete-1"}
+    first = client.delete(f"/api/tasks/{task_id}", headers=headers)
+    second = client.delete(f"/api/tasks/{task_id}", headers=headers)
+
+    assert first.status_code == second.status_code == 204
+    assert second.content == b""
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert client.delete(f"/api/tasks/{task_id}", headers=auth_headers).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_expired_key_is_taken_over(test_session, test_user_id):
+    """Test that a key past its TTL executes again instead of replaying."""
+    test_session.add(
+        IdempotencyKey(
+            user_id=test_user_id,
+            key="old",
+            request_hash="a" * 64,
+            status_code=201,
+            response_body="{}",
+            created_at=datetime.now(timezone.utc) - timedelta(days=30),
+        )
+    )
+    await test_session.flush()
+
+    assert await claim(test_session, test_user_id, "old", "b" * 64) is None
+    row = await test_session.get(IdempotencyKey, (test_user_id, "old"), populate_existing=True)
+    assert row.request_hash == "b" * 64
+    assert row.status_code is None
@@ -0,0 +1,31 @@
+"""Tests for the load-test harness's result handling (benchmarks/loadtest.py)."""
+
+from benchmarks.loadtest import compare, summarize
+
+
+def _report(rps: float, p95: float, p99: float, errors: int = 0) -> dict:
+    result = summarize([1.0], errors, 1.0)
+    result.update(rps=rps, latency_ms={**result["latency_ms"], "p95": p95, "p99": p99})
+    return {"scenarios": {"dashboard": result}}
+
+
+def test_summarize_reports_rps_and_percentiles():
+    """Test that a group of latencies is summarized into RPS and percentiles."""
+    result = summarize([float(ms) for ms in range(1, 101)], errors=2, elapsed=2.0)
+    assert result["requests"] == 100
+    assert result["rps"] == 50.0
+    assert result["latency_ms"]["p50"] == 50.0
+    assert result["latency_ms"]["p99"] == 99.0
+    assert result["errors"] == 2
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Test that slower, lower-throughput or failing runs are reported."""
+    baseline = _report(rps=100, p95=10, p99=20)
+    assert compare(_report(rps=95, p95=10.5, p99=21), baseline, threshold=0.10) == []
+
+    regressions = compare(_report(rps=80, p95=12, p99=20, errors=1), baseline, threshold=0.10)
+    assert len(regressions) == 3
+    assert any("rps" in r for r in regressions)
+    assert any("p95" in r for r in regressions)
+    assert any("errors" in r for r in regressions)
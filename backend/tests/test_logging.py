@@ -0,0 +1,89 @@
+"""Tests for the structured, queue-based logging pipeline."""
+
+import json
+import logging
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.auth import get_current_user_id
+from app.config import Settings
+from app.logging_config import ContextFilter, JsonFormatter, SamplingFilter, configure_logging, shutdown_logging
+from app.request_context import RequestContextMiddleware
+
+
+def _record(name: str = "app.test", level: int = logging.INFO, msg: str = "hello %s", args=("world",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_includes_extra_fields():
+    """Test that records render as one JSON object with extras."""
+    record = _record()
+    record.task_id = 7
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["task_id"] == 7
+    assert entry["ts"].endswith("Z")
+
+
+def test_sampling_keeps_warnings_and_unlisted_loggers():
+    """Test that only INFO records from sampled loggers are dropped."""
+    sampler = SamplingFilter(["app.access"], rate=0.0)
+    assert sampler.filter(_record("app.access")) is False
+    assert sampler.filter(_record("app.access", level=logging.WARNING)) is True
+    assert sampler.filter(_record("app.services")) is True
+
+
+def test_request_context_reaches_log_records(auth_headers, test_user_id):
+    """Test that request id, user id and route are stamped on records."""
+    seen = []
+
+    class Capture(logging.Handler):
+        def emit(self, record):
+            seen.append(record)
+
+    capture = Capture()
+    capture.addFilter(ContextFilter())
+    logger = logging.getLogger("app.test.context")
+    logger.addHandler(capture)
+    logger.setLevel(logging.INFO)
+
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int, user_id: int = Depends(get_current_user_id)):
+        logger.info("reading %s", item_id)
+        return {}
+
+    try:
+        with TestClient(app) as client:
+            response = client.get("/items/3", headers={**auth_headers, "X-Request-ID": "req-42"})
+    finally:
+        logger.removeHandler(capture)
+
+    assert response.headers["x-request-id"] == "req-42"
+    record = seen[0]
+    assert record.request_id == "req-42"
+    assert record.user_id == test_user_id
+    assert record.route == "GET /items/{item_id}"
+    assert record.db_time_ms == 0
+
+
+def test_queue_listener_formats_off_the_caller(capsys):
+    """Test that configured logging emits JSON via the listener thread."""
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        configure_logging(Settings(LOG_FORMAT="json", LOG_LEVEL="INFO"))
+        logging.getLogger("app.test.queue").info("created %s", 5, extra={"task_id": 5})
+        logging.getLogger("app.test.queue").debug("not emitted %s", 6)
+        shutdown_logging()  # drains the queue
+    finally:
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith("{")]
+    assert [line["message"] for line in lines] == ["created 5"]
+    assert lines[0]["task_id"] == 5
@@ -0,0 +1,54 @@
+"""Tests for the event-loop blocking detector."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.loop_watchdog import LoopBlockedError, LoopWatchdog, assert_loop_not_blocked
+
+
+def slow_sync_call():
+    time.sleep(0.15)  # stands in for bcrypt or other sync work in a handler
+
+
+@pytest.mark.asyncio
+@pytest.mark.allow_loop_blocking
+async def test_watchdog_counts_block_and_captures_stack(caplog):
+    """Test that a blocking call is counted, logged and attributed."""
+    watchdog = LoopWatchdog(threshold=0.05, interval=0.01)
+    watchdog.start()
+    await asyncio.sleep(0.05)
+    slow_sync_call()
+    await asyncio.sleep(0.05)
+    await watchdog.stop()
+
+    snapshot = watchdog.snapshot()
+    assert snapshot["blocked_total"] == 1
+    assert snapshot["max_block_ms"] >= 100
+    assert snapshot["lag_ms"]["max"] >= 100
+    assert any("slow_sync_call" in line for line in snapshot["recent_blocks"][0]["stack"])
+    assert "Event loop blocked" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_watchdog_quiet_when_loop_is_responsive():
+    """Test that cooperative code doesn't trigger the watchdog."""
+    watchdog = LoopWatchdog(threshold=0.05, interval=0.01)
+    watchdog.start()
+    for _ in range(10):
+        await asyncio.sleep(0.01)
+    await watchdog.stop()
+    assert watchdog.blocked_total == 0
+    assert len(watchdog.lag_ms) > 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.allow_loop_blocking
+async def test_budget_hook_fails_blocking_code():
+    """Test that the test-mode hook raises when the budget is exceeded."""
+    with pytest.raises(LoopBlockedError, match="slow_sync_call"):
+        async with assert_loop_not_blocked(budget_ms=50):
+            await asyncio.sleep(0.02)
+            slow_sync_call()
+            await asyncio.sleep(0.02)
@@ -0,0 +1,100 @@
+"""Unit tests for the versioned migration runner."""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.migrations import (
+    SchemaOutOfDateError,
+    current_version,
+    ensure_schema,
+    head_version,
+    upgrade,
+)
+
+
+@pytest_asyncio.fixture
+async def empty_engine():
+    """Fresh in-memory database with no tables at all."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def unreachable_engine(tmp_path):
+    """Engine whose connections fail (its database directory doesn't exist)."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'app.db'}")
+    yield engine
+    await engine.dispose()
+
+
+async def _table_names(engine) -> set[str]:
+    async with engine.connect() as conn:
+        return set(await conn.run_sync(lambda c: inspect(c).get_table_names()))
+
+
+@pytest.mark.asyncio
+async def test_upgrade_fresh_database_to_head(empty_engine):
+    """Test that all migrations apply in order on an empty database."""
+    assert await current_version(empty_engine) == 0
+
+    applied = await upgrade(empty_engine)
+
+    assert applied == list(range(1, head_version() + 1))
+    assert await current_version(empty_engine) == head_version()
+    assert {"users", "tasks", "schema_version"} <= await _table_names(empty_engine)
+
+
+@pytest.mark.asyncio
+async def test_upgrade_is_idempotent(empty_engine):
+    """Test that a second upgrade (e.g. another worker) applies nothing."""
+    await upgrade(empty_engine)
+    assert await upgrade(empty_engine) == []
+
+
+@pytest.mark.asyncio
+async def test_upgrade_adopts_existing_unversioned_schema(test_engine):
+    """Test that a create_all-era database is brought under version control."""
+    await upgrade(test_engine)
+    assert await current_version(test_engine) == head_version()
+
+
+@pytest.mark.asyncio
+async def test_ensure_schema_without_auto_migrate_raises(empty_engine):
+    """Test that boot fails fast when the schema is behind and migration is off."""
+    with pytest.raises(SchemaOutOfDateError):
+        await ensure_schema(empty_engine, auto_migrate=False)
+
+    await upgrade(empty_engine)
+    assert await ensure_schema(empty_engine, auto_migrate=False) == head_version()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("auto_migrate", [False, True])
+async def test_unreachable_database_is_not_version_zero(unreachable_engine, auto_migrate):
+    """Test that a failed connection propagates instead of reading as an empty schema."""
+    with pytest.raises(OperationalError):
+        await current_version(unreachable_engine)
+    with pytest.raises(OperationalError):
+        await ensure_schema(unreachable_engine, auto_migrate=auto_migrate)
+
+
+@pytest.mark.asyncio
+async def test_lifespan_does_not_swallow_outdated_schema(monkeypatch, empty_engine):
+    """Test that the app refuses to start (not just warns) on an outdated schema with AUTO_MIGRATE off."""
+    from app import main
+    from app.config import get_settings
+
+    monkeypatch.setenv("AUTO_MIGRATE", "false")
+    get_settings.cache_clear()
+    monkeypatch.setattr(main, "configure_logging", lambda settings: None)
+    monkeypatch.setattr(main, "get_engine", lambda: empty_engine)
+    try:
+        with pytest.raises(SchemaOutOfDateError):
+            async with main.lifespan(main.app):
+                pass
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,103 @@
+"""Tests for the transactional outbox and its dispatcher."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models import OutboxEvent
+from app.schemas import TaskCreate
+from app.services import task_service
+from app.services.outbox import OutboxDispatcher
+
+
+@pytest.fixture
+def dispatcher(test_engine):
+    factory = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    return OutboxDispatcher(factory, poll_interval=0.01, max_attempts=2, retry_base_seconds=0)
+
+
+async def _outbox_rows(test_session):
+    return (await test_session.execute(select(OutboxEvent))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_events_are_written_in_the_write_transaction(test_session, test_user_id):
+    """Test that a rolled-back write leaves no outbox event behind."""
+    task = await task_service.create_task(test_session, TaskCreate(title="Outbox"), test_user_id)
+    await test_session.commit()
+    await task_service.delete_task(test_session, task.id, test_user_id)
+    await test_session.rollback()
+
+    rows = await _outbox_rows(test_session)
+    assert [row.topic for row in rows] == ["task.created"]
+    assert rows[0].user_id == test_user_id
+
+
+@pytest.mark.asyncio
+async def test_dispatch_runs_matching_handlers_and_deletes(dispatcher, test_session, test_user_id):
+    """Test that handled events are removed and handlers see only their topics."""
+    created, deleted = [], []
+    dispatcher.register(lambda m: _append(created, m), topic_prefix="task.created")
+    dispatcher.register(lambda m: _append(deleted, m), topic_prefix="task.deleted")
+
+    task = await task_service.create_task(test_session, TaskCreate(title="Outbox"), test_user_id)
+    await task_service.delete_task(test_session, task.id, test_user_id)
+    await test_session.commit()
+
+    assert await dispatcher.dispatch_once() == 2
+    assert [m.payload["task"]["title"] for m in created] == ["Outbox"]
+    assert [m.payload["task_id"] for m in deleted] == [task.id]
+    assert created[0].attempt == 1
+    assert await _outbox_rows(test_session) == []
+    assert await dispatcher.dispatch_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_events_retry_then_dead_letter(dispatcher, test_session, test_user_id):
+    """Test backoff retries and that exhausted events are kept as dead letters."""
+    attempts = []
+
+    async def failing(message):
+        attempts.append(message.attempt)
+        raise RuntimeError("downstream unavailable")
+
+    dispatcher.register(failing)
+    await task_service.create_task(test_session, TaskCreate(title="Outbox"), test_user_id)
+    await test_session.commit()
+
+    assert await dispatcher.dispatch_once() == 1
+    assert await dispatcher.dispatch_once() == 1
+    assert await dispatcher.dispatch_once() == 0
+    assert attempts == [1, 2]
+
+    test_session.expire_all()
+    [row] = await _outbox_rows(test_session)
+    assert row.dead_at is not None
+    assert "downstream unavailable" in row.last_error
+    snapshot = await dispatcher.snapshot()
+    assert (snapshot["pending"], snapshot["dead"], snapshot["retried"]) == (0, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_background_loop_delivers(dispatcher, test_session, test_user_id):
+    """Test that the started dispatcher drains committed events on its own."""
+    delivered = asyncio.Event()
+
+    async def handler(message):
+        delivered.set()
+
+    dispatcher.register(handler)
+    dispatcher.start()
+    try:
+        await task_service.create_task(test_session, TaskCreate(title="Outbox"), test_user_id)
+        await test_session.commit()
+        await asyncio.wait_for(delivered.wait(), timeout=2)
+    finally:
+        await dispatcher.stop()
+
+
+async def _append(received, message):
+    received.append(message)
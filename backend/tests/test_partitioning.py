@@ -0,0 +1,53 @@
+"""Tests for owner hash partitioning support on the tasks table."""
+
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.exceptions import TaskVersionConflictError
+from app.migrations import MIGRATIONS, partition_tasks_by_owner
+from app.schemas import TaskCreate, TaskUpdate
+from app.services import task_service
+
+_TASKS = re.compile(r"\btasks\b")
+
+
+@pytest.fixture
+def statements(test_engine):
+    """SQL sent to the database during the test."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
+
+
+@pytest.mark.asyncio
+async def test_every_task_query_filters_on_owner(statements, test_session, test_user_id):
+    """Test that each statement on tasks carries owner_id, so Postgres can prune partitions."""
+    task = await task_service.create_task(test_session, TaskCreate(title="Pruned"), test_user_id)
+    await task_service.get_tasks(test_session, test_user_id, status="pending", include_archived=True)
+    await task_service.get_task_by_id(test_session, task.id, test_user_id)
+    await task_service.update_task(test_session, task.id, TaskUpdate(title="Renamed"), test_user_id)
+    await task_service.update_task_status(test_session, task.id, True, test_user_id, expected_version=2)
+    with pytest.raises(TaskVersionConflictError):
+        await task_service.delete_task(test_session, task.id, test_user_id, expected_version=1)
+    await task_service.delete_task(test_session, task.id, test_user_id)
+
+    task_statements = [sql for sql in statements if _TASKS.search(sql)]
+    assert len(task_statements) >= 7
+    assert all("owner_id" in sql.partition("WHERE")[2] or sql.startswith("INSERT") for sql in task_statements)
+
+
+@pytest.mark.asyncio
+async def test_partitioning_is_postgres_only(test_engine):
+    """Test that the partitioning migration leaves other backends alone."""
+    async with test_engine.begin() as conn:
+        assert await conn.run_sync(partition_tasks_by_owner, 8) is False
+        with pytest.raises(ValueError):
+            await conn.run_sync(partition_tasks_by_owner, 1)
+    assert MIGRATIONS[9].version == 10
@@ -0,0 +1,41 @@
+"""Unit tests for database privilege introspection."""
+
+import pytest
+from sqlalchemy import text
+
+from app.privileges import PrivilegeCache, introspect_privileges
+
+
+@pytest.mark.asyncio
+async def test_sqlite_introspection_lists_tables(test_engine):
+    """Test that SQLite introspection reports every model table as writable."""
+    result = await introspect_privileges(test_engine)
+
+    assert result["issues"] == []
+    assert result["can_drop_table"] is True
+    assert result["tables"]["tasks"] == {
+        "owner": True,
+        "select": True,
+        "insert": True,
+        "update": True,
+        "delete": True,
+    }
+
+
+@pytest.mark.asyncio
+async def test_introspection_runs_no_ddl(test_engine):
+    """Test that introspection leaves no scratch tables behind."""
+    await introspect_privileges(test_engine)
+
+    async with test_engine.connect() as conn:
+        names = (await conn.execute(text("SELECT name FROM sqlite_master"))).scalars().all()
+    assert "_perm_test" not in names
+
+
+@pytest.mark.asyncio
+async def test_cache_computes_once(test_engine):
+    """Test that the cache serves the same result until refreshed."""
+    cache = PrivilegeCache(test_engine, interval=3600)
+    first = await cache.get()
+    assert await cache.get() is first
+    assert await cache.refresh() is not first
@@ -0,0 +1,77 @@
+"""Tests for the on-demand sampling profiler and its admin endpoint."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.profiler import SamplingProfiler
+from app.routes import admin
+
+
+def blocking_handler():
+    time.sleep(0.2)  # stands in for a sync call (e.g. bcrypt) inside async code
+
+
+@pytest.mark.asyncio
+@pytest.mark.allow_loop_blocking
+async def test_profile_records_loop_stall_with_stack():
+    """Test that a sync call blocking the loop is reported with its stack."""
+
+    async def handler():
+        await asyncio.sleep(0.05)
+        blocking_handler()
+
+    profiler = SamplingProfiler(interval=0.005, lag_threshold=0.05)
+    task = asyncio.create_task(handler())
+    profile = await profiler.run(0.4)
+    await task
+
+    assert profile.sample_count > 0
+    assert "blocking_handler" in profile.to_collapsed()
+    lag = profile.loop_lag_summary()
+    assert lag["max_ms"] >= 100
+    assert any("blocking_handler" in frame for stall in lag["stalls"] for frame in stall["stack"])
+    assert max(stall["duration_ms"] for stall in lag["stalls"]) >= 100
+
+
+@pytest.mark.asyncio
+async def test_speedscope_document_shape():
+    """Test that the speedscope output references frames by index."""
+    profile = await SamplingProfiler(interval=0.005).run(0.05)
+    doc = profile.to_speedscope()
+    sampled = doc["profiles"][0]
+    assert sampled["type"] == "sampled"
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    frame_count = len(doc["shared"]["frames"])
+    assert all(0 <= i < frame_count for sample in sampled["samples"] for i in sample)
+
+
+@pytest.fixture
+def admin_client(monkeypatch, test_user_id):
+    monkeypatch.setenv("ADMIN_USER_IDS", str(test_user_id))
+    monkeypatch.setenv("PROFILER_ENABLED", "true")
+    get_settings.cache_clear()
+    app = FastAPI()
+    app.include_router(admin.router)
+    with TestClient(app) as client:
+        yield client, monkeypatch
+    get_settings.cache_clear()
+
+
+def test_profile_endpoint_requires_admin(admin_client, auth_headers, other_auth_headers):
+    """Test that only ADMIN_USER_IDS may profile, and only when enabled."""
+    client, monkeypatch = admin_client
+    assert client.post("/api/admin/profile?seconds=0.05").status_code == 401
+    assert client.post("/api/admin/profile?seconds=0.05", headers=other_auth_headers).status_code == 403
+
+    response = client.post("/api/admin/profile?seconds=0.05&format=collapsed", headers=auth_headers)
+    assert response.status_code == 200
+    assert "X-Loop-Lag-Max-Ms" in response.headers
+
+    monkeypatch.setenv("PROFILER_ENABLED", "false")
+    get_settings.cache_clear()
+    assert client.post("/api/admin/profile?seconds=0.05", headers=auth_headers).status_code == 404
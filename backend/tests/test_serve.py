@@ -0,0 +1,131 @@
+"""Tests for the multi-worker production server."""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from app.serve import RespawnBackoff, plan_pools
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_plan_pools_keeps_configured_size_within_budget():
+    """Test that configured pools are kept when they fit the budget."""
+    plan = plan_pools(workers=2, max_connections=100, reserved=10, pool_size=5, max_overflow=10)
+    assert (plan.pool_size, plan.max_overflow) == (5, 10)
+    assert plan.total_connections == 30
+
+
+def test_plan_pools_shrinks_overflow_then_size():
+    """Test that many workers share the budget without exceeding it."""
+    plan = plan_pools(workers=16, max_connections=100, reserved=10, pool_size=5, max_overflow=10)
+    assert (plan.pool_size, plan.max_overflow) == (5, 0)
+    assert plan.total_connections <= 90
+
+    plan = plan_pools(workers=64, max_connections=100, reserved=10, pool_size=5, max_overflow=10)
+    assert (plan.pool_size, plan.max_overflow) == (1, 0)
+
+
+def test_plan_pools_counts_listeners_and_keeps_minimum():
+    """Test that per-worker listeners come out of the budget and pools stay usable for bootstrap."""
+    plan = plan_pools(workers=16, max_connections=100, reserved=10, pool_size=5, max_overflow=10, listeners=1)
+    assert (plan.pool_size, plan.max_overflow) == (4, 0)
+    assert plan.total_connections == 80
+
+    plan = plan_pools(workers=20, max_connections=100, reserved=10, pool_size=5, max_overflow=10,
+                      listeners=1, min_pool_size=3)
+    assert plan.pool_size == 3
+    assert plan.total_connections <= 90
+
+    with pytest.raises(ValueError, match="fewer workers"):
+        plan_pools(workers=30, max_connections=100, reserved=10, pool_size=5, max_overflow=10,
+                   listeners=1, min_pool_size=3)
+
+
+def test_respawn_backoff_doubles_then_gives_up():
+    """Test that exits within the window back off exponentially and then give up."""
+    now = [0.0]
+    backoff = RespawnBackoff(max_restarts=4, window=60, base=0.5, max_delay=3, clock=lambda: now[0])
+
+    delays = []
+    for _ in range(4):
+        delays.append(backoff.next_delay())
+        now[0] += 1
+    assert delays == [0.5, 1, 2, 3]
+    assert backoff.next_delay() is None
+
+
+def test_respawn_backoff_forgets_exits_outside_the_window():
+    """Test that occasional crashes spread over time never give up."""
+    now = [0.0]
+    backoff = RespawnBackoff(max_restarts=2, window=60, base=0.5, clock=lambda: now[0])
+
+    for _ in range(10):
+        assert backoff.next_delay() == 0.5
+        now[0] += 61
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork supervisor needs os.fork")
+def test_supervisor_exits_nonzero_when_workers_crash_on_boot():
+    """Test that a crash loop ends the supervisor with a failure status instead of respawning forever."""
+    script = (
+        "import sys\n"
+        "from app.serve import RespawnBackoff, Supervisor, _bind\n"
+        "backoff = RespawnBackoff(max_restarts=3, window=60, base=0.01)\n"
+        "sock = _bind('127.0.0.1', 0)\n"
+        "sys.exit(Supervisor('app.no_such_module:app', sock, 2, 1, 'critical', backoff).run())\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        timeout=30,
+    )
+    assert proc.returncode == 1
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork supervisor needs os.fork")
+def test_supervisor_serves_and_drains_on_sigterm(tmp_path):
+    """Test that workers serve requests and the supervisor exits cleanly on SIGTERM."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_path}/serve.db",
+        "BETTER_AUTH_SECRET": "serve-test-secret",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "2", "--preload", "--graceful-timeout", "5"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as resp:
+                    assert resp.status == 200
+                    break
+            except OSError:
+                assert time.monotonic() < deadline, "server did not start"
+                time.sleep(0.05)
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=15) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
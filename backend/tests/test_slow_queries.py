@@ -0,0 +1,67 @@
+"""Tests for the slow-query recorder."""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_session
+from app.request_context import RequestContextMiddleware
+from app.slow_queries import SlowQueryLog, param_shape
+
+
+def test_param_shape_redacts_values():
+    """Test that only parameter types are kept."""
+    assert param_shape({"email": "a@b.c", "id": 7, "x": None}) == {"email": "str", "id": "int", "x": "null"}
+    assert param_shape(("secret", 1.5)) == ["str", "float"]
+
+
+@pytest.mark.asyncio
+async def test_records_statements_over_threshold(test_engine):
+    """Test that slow statements land in the ring buffer without values."""
+    log = SlowQueryLog(threshold=0, capacity=2)
+    log.install(test_engine)
+    async with test_engine.connect() as conn:
+        for value in ("first-secret", "second-secret", "third-secret"):
+            await conn.execute(text("SELECT :value"), {"value": value})
+
+    snapshot = log.snapshot()
+    assert snapshot["total"] == 3
+    assert len(snapshot["entries"]) == 2
+    entry = snapshot["entries"][0]
+    assert entry["statement"].startswith("SELECT")
+    assert entry["route"] is None
+    assert "secret" not in str(snapshot)
+    assert "explain" not in entry  # EXPLAIN capture is Postgres-only
+
+
+@pytest.mark.asyncio
+async def test_fast_statements_are_not_recorded(test_engine):
+    """Test that statements under the threshold are ignored."""
+    log = SlowQueryLog(threshold=60)
+    log.install(test_engine)
+    async with test_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    assert log.total == 0
+
+
+def test_entries_carry_the_route(test_engine, test_session):
+    """Test that the route template of the issuing request is recorded."""
+    log = SlowQueryLog(threshold=0)
+    log.install(test_engine)
+    app = FastAPI()
+    app.add_middleware(RequestContextMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int, session: AsyncSession = Depends(get_session)):
+        await session.execute(text("SELECT :id"), {"id": item_id})
+        return {}
+
+    async def override_get_session():
+        yield test_session
+
+    app.dependency_overrides[get_session] = override_get_session
+    with TestClient(app) as client:
+        assert client.get("/items/5").status_code == 200
+    assert log.snapshot()["entries"][0]["route"] == "GET /items/{item_id}"
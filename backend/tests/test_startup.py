@@ -0,0 +1,79 @@
+"""Import-time budget tests.
+
+Importing ``app.main`` must stay cheap and side-effect free: no settings,
+engine or passlib context at import, no prints, and a bounded import time
+measured with ``python -X importtime``. Raise IMPORT_TIME_BUDGET_MS for
+slow CI machines rather than deleting the check.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# Modules that must only load on first use
+LAZY_MODULES = ("passlib", "bcrypt", "asyncpg", "aiosqlite")
+
+_PROBE = """
+import json, sys
+import app.main, app.config, app.database
+print(json.dumps({
+    "settings_built": app.config.get_settings.cache_info().currsize,
+    "engine_created": app.database._engine is not None,
+    "lazy_loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def _parse_importtime(stderr: str) -> dict[str, int]:
+    """Map module name -> cumulative import time in microseconds."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum)
+    return cumulative
+
+
+@pytest.fixture(scope="module")
+def import_report():
+    env = {**os.environ, "TESTING": "1", "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return json.loads(proc.stdout), _parse_importtime(proc.stderr)
+
+
+def test_import_has_no_side_effects(import_report):
+    """Test that importing the app builds no settings or engine and prints nothing."""
+    state, _ = import_report
+    assert state["settings_built"] == 0
+    assert state["engine_created"] is False
+
+
+def test_heavy_modules_load_lazily(import_report):
+    """Test that passlib/bcrypt and DB drivers aren't imported by app.main."""
+    state, _ = import_report
+    assert state["lazy_loaded"] == []
+
+
+def test_import_time_budget(import_report):
+    """Test that importing app.main stays within the import-time budget."""
+    _, cumulative = import_report
+    elapsed_ms = cumulative["app.main"] / 1000
+    assert elapsed_ms < IMPORT_TIME_BUDGET_MS, (
+        f"import app.main took {elapsed_ms:.0f}ms (budget {IMPORT_TIME_BUDGET_MS:.0f}ms)"
+    )
@@ -0,0 +1,179 @@
+"""Tests for the per-user task counters and GET /api/tasks/stats."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.exceptions import TaskVersionConflictError
+from app.migrations import upgrade
+from app.models import Task, User, UserTaskStats
+from app.schemas import TaskCreate, TaskUpdate
+from app.services import task_service, task_stats
+from app.services.archive import run_archival
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _recounted(session, user_id):
+    """What the counters should hold, counted from tasks."""
+    row = (await session.execute(task_stats.recount_query([user_id]))).first()
+    return {name: getattr(row, name) if row else 0 for name in task_stats.COUNTERS}
+
+
+async def _counters(session, user_id):
+    stats = await task_stats.get_stats(session, user_id)
+    return {
+        "total": stats["total"],
+        "completed": stats["completed"],
+        **{f"{priority}_priority": count for priority, count in stats["by_priority"].items()},
+    }
+
+
+def test_delta():
+    """Test counter deltas for create, edit and delete."""
+    assert task_stats.delta(None, (False, "medium")) == {"total": 1, "medium_priority": 1}
+    assert task_stats.delta((False, "medium"), (True, "high")) == {
+        "completed": 1,
+        "medium_priority": -1,
+        "high_priority": 1,
+    }
+    assert task_stats.delta((True, "low"), (True, "low")) == {}
+    assert task_stats.delta((True, "low"), None) == {"total": -1, "completed": -1, "low_priority": -1}
+
+
+@pytest.mark.asyncio
+async def test_create_counts_the_requested_priority(test_session, test_user_id):
+    """Test that a task created with a priority is stored and counted with it."""
+    task = await task_service.create_task(test_session, TaskCreate(title="Urgent", priority="high"), test_user_id)
+    assert task.priority == "high"
+
+    stats = await task_stats.get_stats(test_session, test_user_id)
+    assert stats["by_priority"] == {"low": 0, "medium": 0, "high": 1}
+    assert await _counters(test_session, test_user_id) == await _recounted(test_session, test_user_id)
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_every_write(test_session, test_user_id):
+    """Test that each service write keeps the counters equal to a recount."""
+    first = await task_service.create_task(test_session, TaskCreate(title="One"), test_user_id)
+    second = await task_service.create_task(test_session, TaskCreate(title="Two"), test_user_id)
+    await task_service.update_task(test_session, first.id, TaskUpdate(priority="high", completed=True), test_user_id)
+    await task_service.update_task(test_session, second.id, TaskUpdate(title="Renamed"), test_user_id)
+    await task_service.update_task_status(test_session, second.id, True, test_user_id)
+    await task_service.update_task_status(test_session, second.id, False, test_user_id)
+    assert await _counters(test_session, test_user_id) == await _recounted(test_session, test_user_id)
+
+    await task_service.delete_task(test_session, first.id, test_user_id)
+    assert await _counters(test_session, test_user_id) == await _recounted(test_session, test_user_id)
+    assert await task_stats.get_stats(test_session, test_user_id) == {
+        "total": 1,
+        "completed": 0,
+        "pending": 1,
+        "by_priority": {"low": 0, "medium": 1, "high": 0},
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_write_leaves_counters_alone(test_session, test_user_id):
+    """Test that a rejected conditional write applies no delta."""
+    task = await task_service.create_task(test_session, TaskCreate(title="Guarded"), test_user_id)
+    before = await _counters(test_session, test_user_id)
+
+    with pytest.raises(TaskVersionConflictError):
+        await task_service.update_task_status(test_session, task.id, True, test_user_id, expected_version=7)
+    with pytest.raises(TaskVersionConflictError):
+        await task_service.delete_task(test_session, task.id, test_user_id, expected_version=7)
+
+    assert await _counters(test_session, test_user_id) == before
+
+
+@pytest.mark.asyncio
+async def test_archival_subtracts_moved_tasks(session_factory, test_session, test_user_id):
+    """Test that archived tasks leave the live counters in the same transaction."""
+    for title in ("Old", "Recent"):
+        task = await task_service.create_task(test_session, TaskCreate(title=title), test_user_id)
+        await task_service.update_task_status(test_session, task.id, True, test_user_id)
+    await test_session.execute(
+        update(Task).where(Task.title == "Old").values(updated_at=datetime.now(timezone.utc) - timedelta(days=200))
+    )
+    await test_session.commit()
+
+    assert await run_archival(session_factory, after_days=90, pause=0) == 1
+    assert await task_stats.get_stats(test_session, test_user_id) == {
+        "total": 1,
+        "completed": 1,
+        "pending": 0,
+        "by_priority": {"low": 0, "medium": 1, "high": 0},
+    }
+
+
+@pytest.mark.asyncio
+async def test_repair_corrects_drift(session_factory, test_session, test_user_id, other_user_id):
+    """Test that the repair job recounts drifted users and leaves correct ones alone."""
+    now = datetime.now(timezone.utc)
+    await test_session.execute(
+        insert(User),
+        [
+            {"id": user_id, "email": f"u{user_id}@example.com", "full_name": "U", "phone_number": str(user_id),
+             "password_hash": "x", "created_at": now}
+            for user_id in (test_user_id, other_user_id)
+        ],
+    )
+    await task_service.create_task(test_session, TaskCreate(title="Tracked"), test_user_id)
+    # Written behind the service's back: no delta applied
+    await test_session.execute(
+        insert(Task).values(title="Raw", completed=True, priority="low", owner_id=other_user_id,
+                            created_at=now, updated_at=now)
+    )
+    await test_session.execute(update(UserTaskStats).where(UserTaskStats.user_id == test_user_id).values(total=9))
+    await test_session.commit()
+
+    assert await task_stats.repair(session_factory, batch_size=1) == 2
+    assert await task_stats.repair(session_factory) == 0
+    for user_id in (test_user_id, other_user_id):
+        assert await _counters(test_session, user_id) == await _recounted(test_session, user_id)
+
+
+@pytest.mark.asyncio
+async def test_migration_backfills_counters():
+    """Test that migration 11 seeds the counters from existing tasks."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        await upgrade(engine, target=10)
+        now = datetime.now(timezone.utc)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(Task),
+                [
+                    {"title": "a", "completed": True, "priority": "high", "owner_id": 1, "created_at": now,
+                     "updated_at": now, "version": 1},
+                    {"title": "b", "completed": False, "priority": "low", "owner_id": 1, "created_at": now,
+                     "updated_at": now, "version": 1},
+                ],
+            )
+        await upgrade(engine)
+        async with engine.connect() as conn:
+            row = (await conn.execute(text("SELECT * FROM user_task_stats"))).one()
+        assert (row.user_id, row.total, row.completed, row.low_priority, row.high_priority) == (1, 2, 1, 1, 1)
+    finally:
+        await engine.dispose()
+
+
+def test_stats_endpoint(client, auth_headers, other_auth_headers):
+    """Test GET /api/tasks/stats for the caller only."""
+    empty = client.get("/api/tasks/stats", headers=auth_headers)
+    assert empty.status_code == 200
+    assert empty.json() == {"total": 0, "completed": 0, "pending": 0, "by_priority": {"low": 0, "medium": 0, "high": 0}}
+
+    task_id = client.post("/api/tasks", json={"title": "Counted"}, headers=auth_headers).json()["id"]
+    client.patch(f"/api/tasks/{task_id}/status", json={"completed": True}, headers=auth_headers)
+    client.post("/api/tasks", json={"title": "Someone else's"}, headers=other_auth_headers)
+
+    stats = client.get("/api/tasks/stats", headers=auth_headers).json()
+    assert (stats["total"], stats["completed"], stats["pending"]) == (1, 1, 0)
@@ -0,0 +1,83 @@
+"""Tests for request/service/SQL tracing and W3C trace context."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import tracing
+from app.database import get_session
+from app.routes import tasks
+from app.tracing import InMemoryExporter, Tracer, current_span, parse_traceparent, traced
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def test_parse_traceparent():
+    """Test W3C traceparent parsing, including invalid headers."""
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+    assert parse_traceparent("00-" + "0" * 32 + f"-{PARENT_ID}-01") is None
+    assert parse_traceparent("garbage") is None
+
+
+@pytest.mark.asyncio
+async def test_traced_is_passthrough_without_trace():
+    """Test that instrumented code records nothing outside a sampled trace."""
+
+    @traced()
+    async def work():
+        return current_span()
+
+    assert await work() is None
+
+
+@pytest.fixture
+def traced_client(monkeypatch, test_engine, test_session):
+    exporter = InMemoryExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+    monkeypatch.setattr(tracing, "get_tracer", lambda: tracer)
+    tracing.install(test_engine)
+
+    app = FastAPI()
+    app.add_middleware(tracing.TracingMiddleware)
+    app.include_router(tasks.router)
+
+    async def override_get_session():
+        yield test_session
+
+    app.dependency_overrides[get_session] = override_get_session
+    with TestClient(app) as client:
+        yield client, tracer, exporter
+
+
+def test_request_trace_covers_auth_service_and_sql(traced_client, auth_headers):
+    """Test that one request yields a linked tree of spans."""
+    client, _, exporter = traced_client
+    headers = {**auth_headers, "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+    # A write first: the read then runs on the request's own session (coalesced
+    # reads run in a context of their own, outside any request's trace)
+    client.post("/api/tasks", json={"title": "Traced"}, headers=auth_headers)
+    assert client.get("/api/tasks", headers=headers).status_code == 200
+
+    spans = {span["name"]: span for span in exporter.traces[-1]}
+    root = spans["GET /api/tasks"]
+    assert root["trace_id"] == TRACE_ID
+    assert root["parent_id"] == PARENT_ID
+    assert root["attributes"]["http.status_code"] == 200
+    assert spans["depends.get_current_user_id"]["parent_id"] == root["span_id"]
+    service = spans["task_service.get_tasks"]
+    assert service["parent_id"] == root["span_id"]
+    assert spans["sql SELECT"]["parent_id"] == service["span_id"]
+    assert all(span["trace_id"] == TRACE_ID for span in spans.values())
+
+
+def test_sampling_follows_rate_and_caller(traced_client, auth_headers):
+    """Test that unsampled requests export nothing unless the caller sampled."""
+    client, tracer, exporter = traced_client
+    tracer.sample_rate = 0.0
+    client.get("/api/tasks", headers=auth_headers)
+    assert len(exporter.traces) == 0
+
+    client.get("/api/tasks", headers={**auth_headers, "traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert len(exporter.traces) == 1
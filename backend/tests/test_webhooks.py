@@ -0,0 +1,247 @@
+"""Tests for webhook subscriptions and batched, signed delivery."""
+
+import asyncio
+
+import httpcore
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.exceptions import WebhookCircuitOpenError, WebhookDeliveryError
+from app.models import WebhookSubscription
+from app.schemas import TaskCreate
+from app.services import task_service
+from app.services.outbox import OutboxDispatcher, OutboxMessage
+from app.services import webhooks
+from app.services.webhooks import CircuitBreaker, WebhookDeliverer
+
+from benchmarks.webhook_receiver import create_receiver
+
+SECRET = "test-webhook-secret"
+HOOK_URL = "https://receiver.test/hook"
+
+
+@pytest.fixture(autouse=True)
+def dns(monkeypatch):
+    """Resolve hosts from this table instead of DNS (receiver.test is public)."""
+    table = {"receiver.test": ["93.184.216.34"]}
+
+    async def resolve(host, port):
+        if host not in table:
+            raise OSError(f"unknown host {host}")
+        return table[host]
+
+    monkeypatch.setattr(webhooks, "resolve", resolve)
+    return table
+
+
+@pytest.fixture
+def receiver():
+    return create_receiver(SECRET)
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def deliverer(session_factory, receiver):
+    deliverer = WebhookDeliverer(
+        session_factory,
+        batch_window=0.01,
+        max_batch_size=100,
+        breaker_threshold=2,
+        breaker_cooldown=60,
+        transport=httpx.ASGITransport(app=receiver),
+    )
+    await deliverer.start()
+    yield deliverer
+    await deliverer.stop()
+
+
+async def _subscribe(test_session, user_id, events="task."):
+    test_session.add(WebhookSubscription(user_id=user_id, url=HOOK_URL, secret=SECRET, events=events))
+    await test_session.commit()
+
+
+def _message(message_id, user_id, topic="task.updated"):
+    payload = {"type": topic, "user_id": user_id, "task_id": message_id, "task": None}
+    return OutboxMessage(message_id, topic, user_id, payload, 1, None)
+
+
+def test_subscription_crud(client, auth_headers, other_auth_headers):
+    """Test that the secret is shown once and subscriptions are per user."""
+    created = client.post("/api/webhooks", json={"url": HOOK_URL, "events": ["task.created"]}, headers=auth_headers)
+    assert created.status_code == 201
+    assert created.json()["secret"]
+    webhook_id = created.json()["id"]
+
+    listed = client.get("/api/webhooks", headers=auth_headers).json()
+    assert [(w["id"], w["events"]) for w in listed] == [(webhook_id, ["task.created"])]
+    assert "secret" not in listed[0]
+
+    assert client.delete(f"/api/webhooks/{webhook_id}", headers=other_auth_headers).status_code == 404
+    assert client.delete(f"/api/webhooks/{webhook_id}", headers=auth_headers).status_code == 204
+
+
+def test_plain_http_urls_are_rejected(client, auth_headers):
+    """Test that webhooks require https unless WEBHOOK_ALLOW_HTTP is set."""
+    response = client.post("/api/webhooks", json={"url": "http://example.com/hook"}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "address", ["127.0.0.1", "10.1.2.3", "192.168.0.10", "169.254.169.254", "100.64.0.1", "::1", "::ffff:10.0.0.1"]
+)
+def test_non_public_destinations_are_rejected(client, auth_headers, dns, address):
+    """Test that a webhook host resolving to a loopback/private/link-local address is refused."""
+    dns["internal.test"] = ["93.184.216.34", address]
+    response = client.post("/api/webhooks", json={"url": "https://internal.test/hook"}, headers=auth_headers)
+    assert response.status_code == 422
+    assert "non-public" in response.json()["detail"]
+
+    literal = address if ":" not in address else f"[{address}]"
+    dns[address] = [address]
+    assert client.post("/api/webhooks", json={"url": f"https://{literal}/hook"}, headers=auth_headers).status_code == 422
+    unresolvable = client.post("/api/webhooks", json={"url": "https://nowhere.test/hook"}, headers=auth_headers)
+    assert unresolvable.status_code == 422
+
+
+class _RecordingBackend(httpcore.AsyncMockBackend):
+    """Mock sockets that answer 200 and record where they were connected."""
+
+    def __init__(self):
+        super().__init__([b"HTTP/1.1 200 OK\r\n", b"Content-Length: 0\r\n", b"\r\n"])
+        self.connected = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.connected.append((host, port))
+        return await super().connect_tcp(host, port, timeout, local_address, socket_options)
+
+
+@pytest.fixture
+async def network_deliverer(session_factory):
+    """A deliverer on the real (public-only) transport, over mock sockets."""
+    backend = _RecordingBackend()
+    deliverer = WebhookDeliverer(
+        session_factory,
+        batch_window=0.01,
+        transport=webhooks.public_only_transport(httpx.Limits(), network_backend=backend),
+    )
+    await deliverer.start()
+    yield deliverer, backend
+    await deliverer.stop()
+
+
+@pytest.mark.asyncio
+async def test_delivery_connects_to_the_vetted_address(network_deliverer, test_session, test_user_id):
+    """Test that the connection goes to the address that was checked, not a second lookup."""
+    deliverer, backend = network_deliverer
+    await _subscribe(test_session, test_user_id)
+
+    await deliverer.handle(_message(1, test_user_id))
+    assert backend.connected == [("93.184.216.34", 443)]
+
+
+@pytest.mark.asyncio
+async def test_destination_is_rechecked_before_delivery(network_deliverer, dns, test_session, test_user_id):
+    """Test that a host re-pointed at a private address after registration gets no connection."""
+    deliverer, backend = network_deliverer
+    await _subscribe(test_session, test_user_id)
+    dns["receiver.test"] = ["169.254.169.254"]
+
+    with pytest.raises(WebhookDeliveryError, match="non-public"):
+        await deliverer.handle(_message(1, test_user_id))
+    assert backend.connected == []
+
+
+@pytest.mark.asyncio
+async def test_deleted_endpoint_queue_is_evicted(monkeypatch, deliverer, test_session, test_user_id):
+    """Test that deleting a webhook frees its delivery queue."""
+    monkeypatch.setattr(webhooks, "get_webhook_deliverer", lambda: deliverer)
+    await _subscribe(test_session, test_user_id)
+    await deliverer.handle(_message(1, test_user_id))
+    [webhook_id] = list(deliverer._queues)
+
+    await webhooks.delete_webhook(test_session, webhook_id, test_user_id)
+    assert deliverer._queues == {}
+
+
+@pytest.mark.asyncio
+async def test_events_are_batched_and_signed(deliverer, receiver, test_session, test_user_id):
+    """Test that concurrent events for one endpoint share signed requests."""
+    await _subscribe(test_session, test_user_id)
+
+    await asyncio.gather(*(deliverer.handle(_message(i, test_user_id)) for i in range(1, 251)))
+
+    stats = receiver.state.receiver.stats()
+    assert stats["unique_events"] == 250
+    assert stats["bad_signatures"] == 0
+    assert stats["requests"] <= 3
+    assert stats["max_batch"] == 100
+
+
+@pytest.mark.asyncio
+async def test_endpoint_topic_filter(deliverer, receiver, test_session, test_user_id, other_user_id):
+    """Test that endpoints only get their user's events on subscribed topics."""
+    await _subscribe(test_session, test_user_id, events="task.deleted")
+
+    await deliverer.handle(_message(1, test_user_id, "task.created"))
+    await deliverer.handle(_message(2, other_user_id, "task.deleted"))
+    await deliverer.handle(_message(3, test_user_id, "task.deleted"))
+
+    assert [event["id"] for event in receiver.state.receiver.events] == [3]
+
+
+@pytest.mark.asyncio
+async def test_failures_open_the_circuit(deliverer, receiver, test_session, test_user_id):
+    """Test that repeated failures raise (for outbox retry) and then fail fast."""
+    await _subscribe(test_session, test_user_id)
+    receiver.state.receiver.fail_status = 503
+
+    for message_id in (1, 2):
+        with pytest.raises(WebhookDeliveryError, match="HTTP 503"):
+            await deliverer.handle(_message(message_id, test_user_id))
+    with pytest.raises(WebhookCircuitOpenError):
+        await deliverer.handle(_message(3, test_user_id))
+
+    assert receiver.state.receiver.requests == 2
+    assert deliverer.stats()["open_circuits"] == [HOOK_URL]
+
+
+def test_circuit_breaker_half_open_trial():
+    """Test that after the cooldown a single trial decides the circuit's state."""
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=1, cooldown=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_task_writes_reach_webhooks_through_outbox(
+    deliverer, receiver, session_factory, test_session, test_user_id
+):
+    """Test the full path: task write -> outbox -> signed webhook delivery."""
+    await _subscribe(test_session, test_user_id)
+    dispatcher = OutboxDispatcher(session_factory)
+    dispatcher.register(deliverer.handle, topic_prefix="task.")
+
+    await task_service.create_task(test_session, TaskCreate(title="Hooked"), test_user_id)
+    await test_session.commit()
+
+    assert await dispatcher.dispatch_once() == 1
+    [event] = receiver.state.receiver.events
+    assert (event["type"], event["task"]["title"]) == ("task.created", "Hooked")
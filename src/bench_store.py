@@ -0,0 +1,96 @@
+"""Benchmark of the in-memory task store at 1M tasks.
+
+Fills a TaskStore, then times each service operation on random ids and
+prints microseconds per call. For contrast it also times a linear scan for
+one id, as the old list-backed store did for every lookup, update and
+delete. tracemalloc reports the memory held per task (on 100k tasks).
+
+Usage:
+    python -m src.bench_store --tasks 1000000
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from src.services import TaskStore
+
+SEED = 1234
+
+
+def _per_call_us(fn, args: list) -> float:
+    started = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return round((time.perf_counter() - started) / len(args) * 1e6, 3)
+
+
+def _fill(store: TaskStore, tasks: int) -> None:
+    for index in range(tasks):
+        store.add(f"Task {index}", "benchmark task" if index % 2 else None)
+
+
+def run(tasks: int, samples: int) -> dict:
+    rng = random.Random(SEED)
+    store = TaskStore()
+
+    started = time.perf_counter()
+    _fill(store, tasks)
+    add_seconds = time.perf_counter() - started
+
+    # Measured on a separate store: tracemalloc would distort the timings
+    measured = min(tasks, 100_000)
+    tracemalloc.start()
+    sample_store = TaskStore()
+    _fill(sample_store, measured)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sample_store
+
+    ids = [rng.randint(1, tasks) for _ in range(samples)]
+    for task_id in ids[: samples // 3]:
+        task = store.get(task_id)
+        store.set_completed(task, True)
+
+    def toggle(task_id):
+        task = store.get(task_id)
+        store.set_completed(task, not task.completed)
+
+    def update(task_id):
+        store.get(task_id).title = "Renamed"
+
+    timings = {
+        "add": round(add_seconds / tasks * 1e6, 3),
+        "find": _per_call_us(store.get, ids),
+        "update": _per_call_us(update, ids),
+        "toggle": _per_call_us(toggle, ids),
+        "count_completed": _per_call_us(lambda _: store.count(True), ids),
+        "delete": _per_call_us(store.remove, list(dict.fromkeys(ids))),
+    }
+    # The old store's lookup: scan the list until the id matches
+    listed = list(store)
+    scan_ids = ids[:10]
+    timings["linear_scan_find"] = _per_call_us(
+        lambda task_id: next((task for task in listed if task.id == task_id), None), scan_ids
+    )
+    return {
+        "tasks": tasks,
+        "samples": samples,
+        "us_per_call": timings,
+        "bytes_per_task": round(memory / measured, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=100_000, help="random ids per timed operation")
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.tasks, args.samples), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -34,22 +34,21 @@ def handle_add_task():
         print(f"Error: {e}")
 
 def handle_list_tasks():
-    tasks = services.get_all_tasks()
-    if not tasks:
+    if not services.has_tasks():
         print("No tasks found.")
         return
 
     print("\n--- Your Tasks ---")
     print(f"{ 'ID':<4} {'Title':<30} {'Description':<40} {'Status':<10}")
     print(f"{ '----':<4} {'------------------------------':<30} {'----------------------------------------':<40} {'----------':<10}")
-    for task in tasks:
+    for task in services.iter_tasks():
         status = "✅ Complete" if task.completed else "❌ Incomplete"
         description = task.description if task.description else ""
         print(f"{task.id:<4} {task.title:<30} {description:<40} {status:<10}")
     print("------------------")
 
 def handle_update_task():
-    if not services.get_all_tasks():
+    if not services.has_tasks():
         print("No tasks available to perform this action.")
         return
 
@@ -83,7 +82,7 @@ def handle_update_task():
 
 
 def handle_delete_task():
-    if not services.get_all_tasks():
+    if not services.has_tasks():
         print("No tasks available to perform this action.")
         return
 
@@ -98,7 +97,7 @@ def handle_delete_task():
         print(f"Task with ID {task_id} not found.")
 
 def handle_toggle_completion():
-    if not services.get_all_tasks():
+    if not services.has_tasks():
         print("No tasks available to perform this action.")
         return
 
@@ -1,7 +1,8 @@
 from dataclasses import dataclass, field
 from typing import Optional
 
-@dataclass
+# slots=True: no per-instance __dict__, so a million tasks take far less memory
+@dataclass(slots=True)
 class Task:
     id: int
     title: str
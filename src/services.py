@@ -1,27 +1,88 @@
-from typing import List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from src.models import Task
 
-tasks: List[Task] = []
-next_id: int = 1
+
+class TaskStore:
+    """In-memory tasks indexed by id, with constant-time operations.
+
+    ``_tasks`` maps id -> Task; dicts keep insertion order, so it doubles as
+    the listing order and deletes don't shift anything. ``_by_status``
+    holds the ids of completed and of pending tasks (dicts used as ordered
+    sets), so filtering and counting by status never scan every task.
+    Change tasks through the store so the status index stays in step.
+    """
+
+    __slots__ = ("_tasks", "_by_status", "_next_id")
+
+    def __init__(self) -> None:
+        self._tasks: Dict[int, Task] = {}
+        self._by_status: Dict[bool, Dict[int, None]] = {True: {}, False: {}}
+        self._next_id = 1
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self._tasks.values())
+
+    def add(self, title: str, description: Optional[str] = None) -> Task:
+        if not title:
+            raise ValueError("Title cannot be empty.")
+        task = Task(id=self._next_id, title=title, description=description)
+        self._tasks[task.id] = task
+        self._by_status[False][task.id] = None
+        self._next_id += 1
+        return task
+
+    def get(self, task_id: int) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def by_status(self, completed: bool) -> Iterator[Task]:
+        return (self._tasks[task_id] for task_id in self._by_status[completed])
+
+    def count(self, completed: Optional[bool] = None) -> int:
+        return len(self._tasks) if completed is None else len(self._by_status[completed])
+
+    def set_completed(self, task: Task, completed: bool) -> None:
+        if task.completed != completed:
+            del self._by_status[task.completed][task.id]
+            self._by_status[completed][task.id] = None
+            task.completed = completed
+
+    def remove(self, task_id: int) -> bool:
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return False
+        del self._by_status[task.completed][task_id]
+        return True
+
+    def clear(self) -> None:
+        self._tasks.clear()
+        for ids in self._by_status.values():
+            ids.clear()
+        self._next_id = 1
+
+
+store = TaskStore()
 
 def add_task(title: str, description: Optional[str] = None) -> Task:
-    global next_id
-    if not title:
-        raise ValueError("Title cannot be empty.")
-    
-    new_task = Task(id=next_id, title=title, description=description)
-    tasks.append(new_task)
-    next_id += 1
-    return new_task
+    return store.add(title, description)
 
 def get_all_tasks() -> List[Task]:
-    return list(tasks)
+    return list(store)
+
+def iter_tasks() -> Iterator[Task]:
+    """Tasks in creation order, without copying them into a list."""
+    return iter(store)
+
+def has_tasks() -> bool:
+    return len(store) > 0
+
+def get_tasks_by_status(completed: bool) -> List[Task]:
+    return list(store.by_status(completed))
 
 def find_task_by_id(task_id: int) -> Optional[Task]:
-    for task in tasks:
-        if task.id == task_id:
-            return task
-    return None
+    return store.get(task_id)
 
 def update_task(task_id: int, new_title: Optional[str] = None, new_description: Optional[str] = None) -> bool:
     task = find_task_by_id(task_id)
@@ -39,15 +100,12 @@ def update_task(task_id: int, new_title: Optional[str] = None, new_description:
     return True
 
 def delete_task(task_id: int) -> bool:
-    global tasks
-    original_len = len(tasks)
-    tasks = [task for task in tasks if task.id != task_id]
-    return len(tasks) < original_len
+    return store.remove(task_id)
 
 def toggle_task_completion(task_id: int) -> Tuple[bool, Optional[bool]]:
     task = find_task_by_id(task_id)
     if not task:
         return False, None
     
-    task.completed = not task.completed
-    return True, task.completed
\ No newline at end of file
+    store.set_completed(task, not task.completed)
+    return True, task.completed